@@ -1,3 +1,5 @@
+import uuid
+
 import streamlit as st
 import pandas as pd
 try:
@@ -6,80 +8,102 @@ try:
 except ModuleNotFoundError as e:
     st.error(f"Erreur de module : {e}")
 
+from tuma import config, enable_copy_on_write
+from tuma.cache import result_cache
+from tuma.charts import BUCKETS, cap_traces, chart_timeline
+from tuma.diagnostics import Diagnostics
+from tuma.export import (FORMATS, MEDIA_TYPES, cli_command, dashboard_row_limit, export_bytes,
+                         write_indicators, write_rows)
+from tuma.indicators import INDICATORS, SECTIONS, visible_sections
+from tuma.quality import RULES
+from tuma.refresh import BackgroundRefresher
+from tuma.tiles import KPI_STYLESHEET, kpi_grid
+from tuma.timeseries import KINDS
+
 # Configuration de la page
 st.set_page_config(page_title="TUMA PLUS", layout="wide")
 
+# Jeu de données partagé par toutes les sessions du processus
+enable_copy_on_write()
+
+# Mode diagnostic : temps, mémoire et cache par étape (variable TUMA_DIAGNOSTICS ; l'URL
+# "?diagnostic=1" n'est prise en compte que si TUMA_DIAGNOSTICS vaut "url")
+diag = Diagnostics(
+    config.DIAGNOSTICS or (config.DIAGNOSTICS_URL and st.query_params.get("diagnostic") == "1"),
+    session=st.session_state.setdefault("diagnostic_session", uuid.uuid4().hex[:8]),
+)
+
 # Affichage du logo et du titre
 st.image("logo.jpg", width=600)
 st.title("TABLEAU DE BORD DU CONSORTIUM TUMA PLUS")
 
 
 # Connexion aux données avec actualisation automatique
-DATA_URL = "https://kc.humanitarianresponse.info/api/v1/data/1560805.xlsx"
-
-@st.cache_data
-def load_data():
-    df = pd.read_excel(DATA_URL)
-    return df
-data = load_data()
-
-# Bouton d'actualisation des données
+# Un seul fil d'actualisation par processus : il interroge la source Kobo toutes les
+# TUMA_REFRESH_MINUTES minutes et reconstruit le moteur de calcul (index de filtrage,
+# cube mensuel) en arrière-plan, puis remplace d'un coup la version servie
+@st.cache_resource
+def load_refresher():
+    return BackgroundRefresher().start()
+
+with diag.stage("chargement des données"):
+    refresher = load_refresher()
+    # Moteur lu une seule fois par exécution : données et structures dérivées d'une même version
+    engine = refresher.current()
+data = engine.data
+diag.version = engine.version
+
+# Bouton d'actualisation des données : la version courante reste affichée pendant l'actualisation
 if st.button("Actualiser les données 🔄"):
-    st.cache_data.clear()  # Efface le cache pour forcer le rechargement des données
-    st.rerun()  # Recharge l'application avec les nouvelles données
+    refresher.refresh_now()
+    st.toast("Actualisation lancée : les nouvelles données s'afficheront dès qu'elles seront prêtes.")
 
 st.write(f"Nombre d'enregistrements sur le serveur : **{len(data)}**")    
+# Soumissions renvoyées (même `_uuid` ou même clé naturelle) : seule la dernière version est comptée
+duplicates = data.attrs.get("doublons") or {}
+if any(duplicates.values()):
+    st.caption("Doublons écartés (dernière version conservée) : "
+               + ", ".join(f"{count} par {key}" for key, count in duplicates.items() if count))
 # Filtrage des colonnes
 st.sidebar.header("Filtrage des données")
 
+# Options des filtres géographiques servies par l'index construit une fois par version
+# des données (province → zones → aires) : seuls les enfants des valeurs choisies sont parcourus
+geography = engine.geography
+
 # 1. Filtre sur les organisations
 organisation = st.sidebar.multiselect(
     "Nom de l'organisation",
-    options=data["organisation"].unique(), 
+    options=geography.organisations,
     key="organisation_filter"
 )
 
 # 2. Filtre sur les provinces
+province_counts = geography.provinces()
 province = st.sidebar.multiselect(
     "Province", 
-    options=data["Province"].unique(), 
+    options=list(province_counts), 
     key="province_filter"
 )
 
 # 3. Filtre sur les zones de santé (Zone_sante) dépendant des provinces
-if province:
-    filtered_for_zone = data[data["Province"].isin(province)]
-    zone_sante = st.sidebar.multiselect(
-        "Zone de santé", 
-        options=filtered_for_zone["Zone_sante"].unique(), 
-        key="zone_sante_filter"
-    )
-else:
-    zone_sante = st.sidebar.multiselect(
-        "Zone de santé", 
-        options=data["Zone_sante"].unique(), 
-        key="zone_sante_filter"
-    )
+zone_counts = geography.zones(province)
+zone_sante = st.sidebar.multiselect(
+    "Zone de santé", 
+    options=list(zone_counts), 
+    key="zone_sante_filter"
+)
 
-# 4. Filtre sur les aires de santé (Aire_sante) dépendant des zones de santé
-if zone_sante:
-    filtered_for_aire = filtered_for_zone[filtered_for_zone["Zone_sante"].isin(zone_sante)]
-    aire_sante = st.sidebar.multiselect(
-        "Aire de santé", 
-        options=filtered_for_aire["Aire_sante"].unique(), 
-        key="aire_sante_filter"
-    )
-else:
-    aire_sante = st.sidebar.multiselect(
-        "Aire de santé", 
-        options=data["Aire_sante"].unique(), 
-        key="aire_sante_filter"
-    )
+# 4. Filtre sur les aires de santé (Aire_sante) dépendant des zones de santé (et des provinces)
+aire_counts = geography.aires(province, zone_sante)
+aire_sante = st.sidebar.multiselect(
+    "Aire de santé", 
+    options=list(aire_counts), 
+    key="aire_sante_filter"
+)
 
 # 5. Filtre sur la période de rapportage
-data["time"] = pd.to_datetime(data["time"], errors="coerce")
-data["Période"] = data["time"].dt.to_period("M")
-periode = st.sidebar.multiselect("Période de rapportage", options=data["Période"].dropna().unique())
+periode = st.sidebar.multiselect("Période de rapportage", options=engine.periods)
 
 import streamlit as st
 
@@ -102,104 +126,52 @@ st.sidebar.markdown("---")  # Ligne de séparation
 st.sidebar.image("care.png", width=150)  # Remplacez "logo.png" par votre fichier image
 
 # Application des filtres
-filtered_data = data.copy()
-
-if organisation:
-    filtered_data = filtered_data[filtered_data["organisation"].isin(organisation)]
-if province:
-    filtered_data = filtered_data[filtered_data["Province"].isin(province)]
-if zone_sante:
-    filtered_data = filtered_data[filtered_data["Zone_sante"].isin(zone_sante)]
-if aire_sante:
-    filtered_data = filtered_data[filtered_data["Aire_sante"].isin(aire_sante)]
-if periode:
-    filtered_data = filtered_data[filtered_data["Période"].isin(periode)]
-
-
-# Fonction pour afficher les métriques avec un style personnalisé
-def styled_metric(label, value):
-    """Affiche une métrique avec un style personnalisé."""
-    st.markdown(f"""
-        <div style="
-            display: flex;
-            flex-direction: column;
-            align-items: center;
-            justify-content: center;
-            border: 2px solid green;
-            border-radius: 5px;
-            background-color: orange;
-            color: black;
-            font-size: 22px;
-            font-weight: bold;
-            padding: 5px;
-            margin: 3px;
-            text-align: center;
-        ">
-            <div style="font-size: 12px; font-weight: normal;">{label}</div>
-            <div>{value}</div>
-        </div>
-    """, unsafe_allow_html=True)
+selection = dict(organisation=organisation, province=province, zone_sante=zone_sante,
+                 aire_sante=aire_sante, periode=periode)
+# Le filtre ne parcourt que les lignes retenues et ne renvoie que leurs positions :
+# aucune session ne copie le jeu de données partagé
+with diag.stage("filtrage", rows=len(data)):
+    filtered_data = engine.filter_rows(**selection)
+
+# Tous les indicateurs du registre (totaux et séries mensuelles) en une seule agrégation,
+# mis en cache pour toutes les sessions par sélection de filtres et version des données
+with diag.stage("indicateurs", rows=len(filtered_data)):
+    results = engine.compute(**selection)
+
+
+# Feuille de style des tuiles, envoyée une seule fois pour toutes les sections
+st.markdown(KPI_STYLESHEET, unsafe_allow_html=True)
+
+# Affichage d'un graphique (mesuré séparément en mode diagnostic), nombre de points borné
+def show_chart(fig, **kwargs):
+    with diag.stage("figure"):
+        st.plotly_chart(cap_traces(fig), **kwargs)
+
+# Pas de temps du graphique d'une section (contrôle propre à la section)
+def bucket_control(section):
+    return BUCKETS[st.radio("Pas de temps", options=list(BUCKETS), horizontal=True, key=f"bucket_{section}")]
+
+# Affichage des tuiles d'une section à partir du registre des indicateurs :
+# un seul élément pour toute la section (titres des lignes compris)
+def render_tiles(section, results):
+    st.markdown(kpi_grid(section, results), unsafe_allow_html=True)
+
+sections = visible_sections(organisation)
 
 # 1. PARTICIPATION CURSUS
-if "PARDE" in organisation or "SARCAF" in organisation:
-    filtered_participation = filtered_data
-
-    st.header("1. PARTICIPATION CURSUS")
-
-    col1, col2, col3, col4, col5a, col5b, col5c, col5d = st.columns(8)
-
-    # a) Nombre de groupes
-    nombre_groupes = filtered_participation["Nom_group"].count()
-    with col1:
-        styled_metric("Nombre de groupes", int(nombre_groupes))
-
-    # b) Effectif début cursus
-    effectif_debut = filtered_participation["Information_groupe/Effectif_debut"].sum()
-    with col2:
-        styled_metric("Effectif début cursus", int(effectif_debut))
-
-    # c) Effectif fin cursus
-    effectif_fin = filtered_participation["Information_groupe/Effectif_fin"].sum()
-    with col3:
-        styled_metric("Effectif fin cursus", int(effectif_fin))
-
-    # d) Taux d'achèvement de cursus en pourcentage
-    taux_achevement = (effectif_fin / effectif_debut) * 100 if effectif_debut > 0 else 0
-    with col4:
-        styled_metric("Taux d'achèvement", f"{taux_achevement:.0f}%")
-    
-    # c) Couple SASA
-    sasacouple_count = (filtered_participation["Statut_group"] == 1.0).sum()
-    with col5a:
-        styled_metric("Couple SASA", int(sasacouple_count))
-    # c) Eyap fille
-    eyapfille_count = (filtered_participation["Statut_group"] == 2.0).sum()
-    with col5b:
-        styled_metric("Eyap Filles", int(eyapfille_count))
-    # c) Couple SASA
-    eyap_garcon_count = (filtered_participation["Statut_group"] == 3.0).sum()
-    with col5c:
-        styled_metric("Eyap Garcons", int(eyap_garcon_count))
-    # c) Couple SASA
-    club_jeune_count = (filtered_participation["Statut_group"] == 4.0).sum()
-    with col5d:
-        styled_metric("Club des jeunes", int(club_jeune_count))
-
-    ###############################
-    
-
-  # Création du graphique
+def render_section_1(results):
+    st.header(SECTIONS[1].title)
+    render_tiles(1, results)
+    bucket = bucket_control(1)
+
+    # Création du graphique
     st.subheader("Évolution des effectifs au cours du temps")
-    
-    # Agrégation des données par période (exemple : par mois)
-    filtered_participation["time"] = pd.to_datetime(filtered_participation["time"], errors="coerce")
-    timeline_data = filtered_participation.groupby(filtered_participation["time"].dt.to_period("M")).agg({
-        "Information_groupe/Effectif_debut": "sum",
-        "Information_groupe/Effectif_fin": "sum"
-    }).reset_index()
 
-    # Conversion de la colonne 'time' pour Plotly
-    timeline_data["time"] = timeline_data["time"].astype(str)
+    # Agrégation des données au pas de temps choisi (par mois par défaut)
+    timeline_data = chart_timeline(results, [
+        "Information_groupe/Effectif_debut",
+        "Information_groupe/Effectif_fin",
+    ], bucket)
 
     # Création du graphique avec Plotly
     fig = go.Figure()
@@ -240,36 +212,22 @@ if "PARDE" in organisation or "SARCAF" in organisation:
     )
 
     # Affichage du graphique
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig, use_container_width=True)
 
 # 2. Information sur l'utilisation des services curatifs
-if "ADJ" in organisation or "CARE" in organisation:
-    st.header("2. Information sur l'utilisation des services curatifs")
-
-    col5, col6, col7, col8 = st.columns(4)
-
-    # Calculs pour les catégories d'âge
-    moins_de_15 = filtered_data["totalcaseE/Feminin_caseE"].sum() + filtered_data["totalcaseE/Masculin_caseE"].sum()
-    plus_15_18 = filtered_data["totalcaseI/Feminin_caseI"].sum() + filtered_data["totalcaseI/Masculin_caseI"].sum()
-    plus_18_24 = filtered_data["totalcaseM/Feminin_caseM"].sum() + filtered_data["totalcaseM/Masculin_caseM"].sum() + filtered_data["totalcaseQ/Feminin_caseQ"].sum()+ filtered_data["totalcaseQ/Masculin_caseQ"].sum()
-    plus_50 = filtered_data["totalcase/Feminin_case"].sum() + filtered_data["totalcase/Masculin_case"].sum()+ filtered_data["totalcaseA/Feminin_caseA"].sum()+ filtered_data["totalcaseA/Masculin_caseA"].sum()
-
-    # Affichage des métriques
-    with col5:
-        styled_metric("Cas - Moins de 15 ans", int(moins_de_15))
-    with col6:
-        styled_metric("Cas - 15 à 18 ans", int(plus_15_18))
-    with col7:
-        styled_metric("Cas - 18 à 24 ans", int(plus_18_24))
-    with col8:
-        styled_metric("Cas - Plus de 50 ans", int(plus_50))
+def render_section_2(results):
+    st.header(SECTIONS[2].title)
+    render_tiles(2, results)
+    bucket = bucket_control(2)
 #3333333333333333333333333333333333333333333333333333333
-# Préparation des données pour le graphique
-    timeline_data = filtered_data[["time"]].copy()
-    timeline_data["Moins de 15 ans"] = moins_de_15
-    timeline_data["15 à 18 ans"] = plus_15_18
-    timeline_data["18 à 24 ans"] = plus_18_24
-    timeline_data["Plus de 50 ans"] = plus_50
+# Préparation des données pour le graphique : un point par pas de temps et par tranche d'âge
+    timeline_data = chart_timeline(results, ["moins_de_15", "plus_15_18", "plus_18_24", "plus_50"], bucket)
+    timeline_data = timeline_data.rename(columns={
+        "moins_de_15": "Moins de 15 ans",
+        "plus_15_18": "15 à 18 ans",
+        "plus_18_24": "18 à 24 ans",
+        "plus_50": "Plus de 50 ans",
+    })
 
     # Création du graphique avec Plotly (barres empilées)
     fig = go.Figure()
@@ -306,47 +264,23 @@ if "ADJ" in organisation or "CARE" in organisation:
     )
 
     # Affichage du graphique
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig, use_container_width=True)
 # 3. CAS de VBG
-if "ADJ" in organisation or "CARE" in organisation:
-    st.header("3. Violences sexuelles et basées sur le genre")
-
-    col9, col10, col11, col12 = st.columns(4)
-
-    # Calculs pour les catégories d'âge
-    tot_svs = filtered_data["VBG/casSVS"].sum()
-    svs_fem = filtered_data["VBG/SVSFeminin"].sum()
-    new_svs = filtered_data["VBG/NewSVS"].sum()
-    anciensCas = filtered_data["VBG/Ancien_SVS_contre"].sum()
-
-    # Affichage des métriques
-    with col9:
-        styled_metric("Nouveaux cas/SVS", int(tot_svs))
-    with col10:
-        styled_metric("Cas SVS Feminin", int(svs_fem))
-    with col11:
-        styled_metric("Nouveaux SVS", int(new_svs))
-    with col12:
-        styled_metric("Anciens Cas contre refere", int(anciensCas))
+def render_section_3(results):
+    st.header(SECTIONS[3].title)
+    render_tiles(3, results)
+    bucket = bucket_control(3)
 
     # Graphique de progression
     st.subheader("Évolution des cas de VBG au fil du temps")
 
-    # Vérification des colonnes nécessaires
-    filtered_data["time"] = pd.to_datetime(filtered_data["time"], errors="coerce")  # Conversion au format datetime
-    progression_data = (
-        filtered_data.groupby(filtered_data["time"].dt.to_period("M"))
-        .agg({
-            "VBG/casSVS": "sum",
-            "VBG/SVSFeminin": "sum",
-            "VBG/NewSVS": "sum",
-            "VBG/Ancien_SVS_contre": "sum"
-        })
-        .reset_index()
-    )
-
-    # Conversion de la colonne 'time' pour l'affichage
-    progression_data["time"] = progression_data["time"].astype(str)
+    # Séries mensuelles calculées par le moteur d'indicateurs
+    progression_data = chart_timeline(results, [
+        "VBG/casSVS",
+        "VBG/SVSFeminin",
+        "VBG/NewSVS",
+        "VBG/Ancien_SVS_contre",
+    ], bucket)
 
     # Création du graphique
     fig = go.Figure()
@@ -401,52 +335,25 @@ if "ADJ" in organisation or "CARE" in organisation:
     )
 
     # Affichage du graphique
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig, use_container_width=True)
 
 # 4. Santé de la mère
-if "ADJ" in organisation or "CARE" in organisation:
-    st.header("4. Santé de la mère, Accouchements et naissances")
-
-    col13, col14, col15, col16, col17 = st.columns(5)
-
-    # Calculs pour les catégories d'indicateurs
-    cpn1 = filtered_data["CPN/CPN1"].sum()
-    cpn4 = filtered_data["CPN/CPN4"].sum()
-    Accouch = filtered_data["accouchement_naissance/accouchement1"].sum()
-    Accouch20ans = filtered_data["accouchement_naissance/accouchement3"].sum()
-    naiss = filtered_data["accouchement_naissance/accouchement6"].sum()
-
-    # Affichage des métriques
-    with col13:
-        styled_metric("Total CPN1", int(cpn1))
-    with col14:
-        styled_metric("Total CPN4", int(cpn4))
-    with col15:
-        styled_metric("Accouchements", int(Accouch))
-    with col16:
-        styled_metric("Accouchements - 20ans", int(Accouch20ans))
-    with col17:
-        styled_metric("Naissances vivantes", int(naiss))
+def render_section_4(results):
+    st.header(SECTIONS[4].title)
+    render_tiles(4, results)
+    bucket = bucket_control(4)
 
     # Graphique amélioré
     st.subheader("Progression des indicateurs de santé maternelle au fil du temps")
 
-    # Vérification des colonnes nécessaires
-    filtered_data["time"] = pd.to_datetime(filtered_data["time"], errors="coerce")  # Conversion au format datetime
-    progression_data = (
-        filtered_data.groupby(filtered_data["time"].dt.to_period("M"))
-        .agg({
-            "CPN/CPN1": "sum",
-            "CPN/CPN4": "sum",
-            "accouchement_naissance/accouchement1": "sum",
-            "accouchement_naissance/accouchement3": "sum",
-            "accouchement_naissance/accouchement6": "sum"
-        })
-        .reset_index()
-    )
-
-    # Conversion de la colonne 'time' pour l'affichage
-    progression_data["time"] = progression_data["time"].astype(str)
+    # Séries mensuelles calculées par le moteur d'indicateurs
+    progression_data = chart_timeline(results, [
+        "CPN/CPN1",
+        "CPN/CPN4",
+        "accouchement_naissance/accouchement1",
+        "accouchement_naissance/accouchement3",
+        "accouchement_naissance/accouchement6",
+    ], bucket)
 
     # Création du graphique amélioré
     fig = go.Figure()
@@ -498,48 +405,24 @@ if "ADJ" in organisation or "CARE" in organisation:
     )
 
     # Affichage du graphique
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig, use_container_width=True)
 
 #33######fin4#################################
 # 5. Santé de la mère
-if "ADJ" in organisation or "CARE" in organisation:
-    st.header("5. Décès liés à l'accouchement")
-
-    col18, col19, col20, col21 = st.columns(4)
-
-    # Calculs pour les catégories
-    dec1 = filtered_data["deces_accouchements/deces_nouv1"].sum()
-    dec2 = filtered_data["deces_accouchements/deces_nouv2"].sum()
-    dec3 = filtered_data["deces_accouchements/deces_nouv3"].sum()
-    dec4 = filtered_data["deces_accouchements/deces_nouv4"].sum()
-
-    # Affichage des métriques
-    with col18:
-        styled_metric("Décès nouveaux-nés de -7 jours", int(dec1))
-    with col19:
-        styled_metric("Décès nouveaux-nés de -28 jours", int(dec2))
-    with col20:
-        styled_metric("Décès maternels", int(dec3))
-    with col21:
-        styled_metric("Décès maternels revus", int(dec4))
+def render_section_5(results):
+    st.header(SECTIONS[5].title)
+    render_tiles(5, results)
+    bucket = bucket_control(5)
 
     # Préparation des données pour le graphique
     st.subheader("Évolution des décès liés à l'accouchement par période")
 
-    filtered_data["time"] = pd.to_datetime(filtered_data["time"], errors="coerce")  # Conversion au format datetime
-    progression_data = (
-        filtered_data.groupby(filtered_data["time"].dt.to_period("M"))
-        .agg({
-            "deces_accouchements/deces_nouv1": "sum",
-            "deces_accouchements/deces_nouv2": "sum",
-            "deces_accouchements/deces_nouv3": "sum",
-            "deces_accouchements/deces_nouv4": "sum",
-        })
-        .reset_index()
-    )
-
-    # Conversion de la colonne 'time' pour l'affichage
-    progression_data["time"] = progression_data["time"].astype(str)
+    progression_data = chart_timeline(results, [
+        "deces_accouchements/deces_nouv1",
+        "deces_accouchements/deces_nouv2",
+        "deces_accouchements/deces_nouv3",
+        "deces_accouchements/deces_nouv4",
+    ], bucket)
 
     # Création du graphique linéaire
     fig = go.Figure()
@@ -590,64 +473,15 @@ if "ADJ" in organisation or "CARE" in organisation:
     )
 
     # Affichage du graphique
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig, use_container_width=True)
 
 # 6. Acceptentes
-if "ADJ" in organisation or "CARE" in organisation:
-    st.header("6. Informations sur les acceptantes des methodes de la planification familiale")
-
-    col22, col23, col24, col25, col26, col27 = st.columns(6)
-
-    # Calculs pour les catégories d'âge
-    dec11 = filtered_data["acceptante/Nvlle_acceptante_meth/Nbre_Fosa"].sum()
-    dec12 = filtered_data["acceptante/Nvlle_acceptante_meth/Nbre_adbc"].sum()
-    dec13 = filtered_data["acceptante/Nvlles_aceptante_moins18/Nbre_Fosa2"].sum()
-    dec14 = filtered_data["acceptante/Nvlles_aceptante_moins18/Nbre_adbc2"].sum()
-    dec15 = filtered_data["acceptante/Nvlle_acceptante_18_24/Nbre_Fosa1"].sum()
-    dec16 = filtered_data["acceptante/Nvlle_acceptante_18_24/Nbre_adbc1"].sum()
-
-    # Affichage des métriques
-    with col22:
-        styled_metric("Nouvelles acceptentes des methodes de PF aux FOSA", int(dec11))
-    with col23:
-        styled_metric("Nouvelles acceptentes des methodes de PF à l'ADBC", int(dec12))
-    with col24:
-        styled_metric("Acceptentes des methodes de PF aux FOSA de -18 ans", int(dec13))
-    with col25:
-        styled_metric("Acceptentes des methodes de PF à l'ADBC de -18 ans", int(dec14))
-    with col26:
-        styled_metric("Acceptentes des methodes de PF aux FOSA de 18-24 ans", int(dec15))
-    with col27:
-        styled_metric("Acceptentes des methodes de PF a l'ADBC de 18-24 ans", int(dec16))
- 
- # Seconde ligne de visuels
-    st.write("")  # Espacement entre les lignes
-    col28, col29, col30, col31, col32, col33 = st.columns(6)
-
-    # Calculs pour les catégories supplémentaires (seconde ligne)
-    dec17 = filtered_data["acceptante/Renouvellement_Planification_familiale/Nbre_Fosa5"].sum()
-    dec18 = filtered_data["acceptante/Renouvellement_Planification_familiale/Nbre_adbc5"].sum()
-    dec19 = filtered_data["acceptante/Nvelles_acceptantes_post_avortemt/Nbre_Fosa6"].sum()
-    dec20 = filtered_data["acceptante/Nvelles_acceptantes_post_avortemt/Nbre_adbc6"].sum()
-    dec21 = filtered_data["acceptante/Nbre_beneficiaires_SCACF/Nbre_Fosa7"].sum()
-    dec22 = filtered_data["acceptante/Nbre_beneficiaires_SCACF/Nbre_adbc7"].sum()
-
-    # Affichage des métriques pour la seconde ligne
-    with col28:
-        styled_metric("Renouvellement planification familiale FOSA", int(dec17))
-    with col29:
-        styled_metric("Renouvellement planification familiale ADBC", int(dec18))
-    with col30:
-        styled_metric("Nvelles acceptantes des soins après avortement FOSA", int(dec19))
-    with col31:
-        styled_metric("Nvelles acceptantes des soins après avortement ADBC", int(dec20))
-    with col32:
-        styled_metric("Beneficiares SCACF/soins complets d'avort centrés sur la femme FOSA", int(dec21))
-    with col33:
-        styled_metric("Beneficiares SCACF/soins complets d'avort centrés sur la femme ADBC", int(dec22))
-
-# Préparation des données temporelles avec des noms significatifs pour les acceptantes
-if "ADJ" in organisation or "CARE" in organisation:
+def render_section_6(results):
+    st.header(SECTIONS[6].title)
+    render_tiles(6, results)
+    bucket = bucket_control(6)
+
+    # Préparation des données temporelles avec des noms significatifs pour les acceptantes
     # Dictionnaire des descriptions pour les colonnes
     column_descriptions = {
         "Nvlle_acceptante_meth/Nbre_Fosa": "Nouvelles acceptantes - Méthodes PF aux FOSA",
@@ -664,22 +498,18 @@ if "ADJ" in organisation or "CARE" in organisation:
         "Nbre_beneficiaires_SCACF/Nbre_adbc7": "Bénéficiaires SCACF - ADBC",
     }
 
-    # Ajout des colonnes nécessaires pour l'analyse temporelle
+    # Séries agrégées au pas de temps choisi (un point par période et par catégorie)
     categories = list(column_descriptions.keys())
-    time_series_data = filtered_data[["time"] + [f"acceptante/{cat}" for cat in categories]].copy()
+    time_series_data = chart_timeline(results, [f"acceptante/{cat}" for cat in categories], bucket)
 
     # Mise en forme longue des données
-    time_series_data = time_series_data.melt(
+    time_series_summary = time_series_data.melt(
         id_vars=["time"],
         var_name="Categorie",
         value_name="Valeur",
     )
-    time_series_data["Categorie"] = time_series_data["Categorie"].str.replace("acceptante/", "", regex=False)
-    time_series_data["Categorie"] = time_series_data["Categorie"].map(column_descriptions)
-    time_series_data["time"] = pd.to_datetime(time_series_data["time"])
-
-    # Agrégation des données par date et catégorie
-    time_series_summary = time_series_data.groupby(["time", "Categorie"])["Valeur"].sum().reset_index()
+    time_series_summary["Categorie"] = time_series_summary["Categorie"].str.replace("acceptante/", "", regex=False)
+    time_series_summary["Categorie"] = time_series_summary["Categorie"].map(column_descriptions)
 
     # Création du graphique interactif
     fig = px.line(
@@ -697,65 +527,25 @@ if "ADJ" in organisation or "CARE" in organisation:
         xaxis_title="Date",
         yaxis_title="Nombre Total",
     )
-    st.plotly_chart(fig)
+    show_chart(fig)
 
 ###########################################################
 # 7. Communication
-if "ADJ" in organisation or "CARE" in organisation:
-    st.header("7. Communication sur le changement de comportement (CCC)")
-
-    col34, col35, col36, col37, col38, col39, col40, col41, col42 = st.columns(9)
-
-    # Calculs pour les catégories
-    ccc1 = filtered_data["communication_changement_comportement/seances_prevues"].sum()
-    ccc2 = filtered_data["communication_changement_comportement/seances_realises"].sum()
-    ccc3 = filtered_data["communication_changement_comportement/participants_hommes"].sum()
-    ccc4 = filtered_data["communication_changement_comportement/participants_femmes"].sum()
-    ccc5 = filtered_data["communication_changement_comportement/participants_jeunes_filles"].sum()
-    ccc6 = filtered_data["communication_changement_comportement/participants_jeunes_garcons"].sum()
-    ccc7 = filtered_data["communication_changement_comportement/participants_adolescentes_filles"].sum()
-    ccc8 = filtered_data["communication_changement_comportement/participants_adolescentes_garcons"].sum()
-    ccc9 = filtered_data["communication_changement_comportement/participants_referes_fosa"].sum()
-
-    # Affichage des métriques
-    with col34:
-        styled_metric("Séances prévues", int(ccc1))
-    with col35:
-        styled_metric("Séances réalisées", int(ccc2))
-    with col36:
-        styled_metric("Participants hommes", int(ccc3))
-    with col37:
-        styled_metric("Participants femmes", int(ccc4))
-    with col38:
-        styled_metric("Participants filles", int(ccc5))
-    with col39:
-        styled_metric("Participants garçons", int(ccc6))
-    with col40:
-        styled_metric("Partic adolescentes", int(ccc7))
-    with col41:
-        styled_metric("Partic adolescents", int(ccc8))
-    with col42:
-        styled_metric("Partic référés FOSA", int(ccc9))
+def render_section_7(results):
+    st.header(SECTIONS[7].title)
+    render_tiles(7, results)
+    bucket = bucket_control(7)
 
     # Préparer les données pour le graphique
-    filtered_data['time'] = pd.to_datetime(filtered_data['time'])  # Conversion à datetime
-
-    # Convertir les colonnes en numériques pour éviter les erreurs
     numeric_columns = [
         "communication_changement_comportement/seances_prevues",
         "communication_changement_comportement/seances_realises",
         "communication_changement_comportement/participants_hommes",
         "communication_changement_comportement/participants_femmes",
     ]
-    filtered_data[numeric_columns] = filtered_data[numeric_columns].apply(pd.to_numeric, errors='coerce')
 
-    # Grouper les données par mois et additionner les valeurs
-    grouped_data = (
-        filtered_data.groupby(filtered_data['time'].dt.to_period('M'))[numeric_columns]
-        .sum()
-        .reset_index()
-    )
-    grouped_data['time'] = grouped_data['time'].astype(str)  # Conversion pour l'affichage
+    # Séries mensuelles calculées par le moteur d'indicateurs
+    grouped_data = chart_timeline(results, numeric_columns, bucket)
 
     # Colonnes pour le graphique
     columns_to_plot = numeric_columns
@@ -801,143 +591,144 @@ if "ADJ" in organisation or "CARE" in organisation:
     fig.update_yaxes(showgrid=True, gridcolor="lightgrey")
 
     # Affichage du graphique
-    st.plotly_chart(fig, use_container_width=True)
+    show_chart(fig, use_container_width=True)
 
 #########################################################TRANSMISSINLE###############################
 # 8. IST
-if "ADJ" in organisation or "CARE" in organisation:
-    st.header("8. Informations sur les maladies transmissibles")
-    st.subheader("1. IST Nouveaux cas")
-
-
-    col43, col44, col45, col46, col47, col48, col49 = st.columns(7)
-
-    # Calculs pour les catégories d'âge
-    ist1 = filtered_data["IST/Nouv_feminY7/infer15Y7"].sum()
-    ist2 = filtered_data["IST/Nouv_feminY7/quinze_24Y7"].sum()
-    ist3 = filtered_data["IST/Nouv_feminY7/Vingt5Y7"].sum()
-    ist4 = filtered_data["IST/Nouv_feminZ/infer15YZ"].sum()
-    ist5 = filtered_data["IST/Nouv_feminZ/quinze_24YZ"].sum()
-    ist6 = filtered_data["IST/Nouv_feminZ/Vingt5YZ"].sum()
-    ist7 = filtered_data["IST/Nouv_feminZ/TotNouvCaseM"].sum() + filtered_data["IST/Nouv_feminY7/TotNouvCaseF"].sum()
-
-
-    # Affichage des métriques
-    with col43:
-        styled_metric("Feminin : <15 ans", int(ist1))
-    with col44:
-        styled_metric("Feminin : 15-24 ans", int(ist2))
-    with col45:
-        styled_metric("Feminin : >25 ans", int(ist3))
-    with col46:
-        styled_metric("Masculin : <15 ans", int(ist4))
-    with col47:
-        styled_metric("Masculin : 15-24 ans", int(ist5))
-    with col48:
-        styled_metric("Masculin : >25 ans", int(ist6))
-    with col49:
-        styled_metric("Total", int(ist7))
-    
-    
-
-    st.subheader("2. Cas contact parmi les nouveaux cas")
-
-
-    col50, col51, col52, col53, col54, col55, col56 = st.columns(7)
-
-    # Calculs pour les catégories d'âge
-    ist1 = filtered_data["IST/Nouv_femin/infer15"].sum()
-    ist2 = filtered_data["IST/Nouv_femin/quinze_24"].sum()
-    ist3 = filtered_data["IST/Nouv_femin/Vingt5"].sum()
-    ist4 = filtered_data["IST/Nouv_garc/infer151"].sum()
-    ist5 = filtered_data["IST/Nouv_garc/quinze_241"].sum()
-    ist6 = filtered_data["IST/Nouv_garc/Vingt51"].sum()
-    ist7 = filtered_data["IST/Nouv_femin/TotalCasContactIST_F"].sum() + filtered_data["IST/Nouv_garc/TotalCasContactIST_M"].sum()
-
-
-    # Affichage des métriques
-    with col50:
-        styled_metric("Feminin : <15 ans", int(ist1))
-    with col51:
-        styled_metric("Feminin : 15-24 ans", int(ist2))
-    with col52:
-        styled_metric("Feminin : >25 ans", int(ist3))
-    with col53:
-        styled_metric("Masculin : <15 ans", int(ist4))
-    with col54:
-        styled_metric("Masculin : 15-24 ans", int(ist5))
-    with col55:
-        styled_metric("Masculin : >25 ans", int(ist6))
-    with col56:
-        styled_metric("Total", int(ist7))
-    
-    st.subheader("3. Traites selon l'approche syndromique")
-
-
-    col57, col58, col59, col60, col61, col62, col63 = st.columns(7)
-
-    # Calculs pour les catégories d'âge
-    iist1 = filtered_data["IST/contacts_new_case1/infer154"].sum()
-    iist2 = filtered_data["IST/contacts_new_case1/quinze_244"].sum()
-    iist3 = filtered_data["IST/contacts_new_case1/Vingt54"].sum()
-    iist4 = filtered_data["IST/contacts_new_case/infer153"].sum()
-    iist5 = filtered_data["IST/contacts_new_case/quinze_243"].sum()
-    iist6 = filtered_data["IST/contacts_new_case/Vingt53"].sum()
-    iist7 = filtered_data["IST/contacts_new_case1/totalCasTraiteSyndromeF"].sum() + filtered_data["IST/contacts_new_case/totalCasTraiteSyndromeM"].sum()
-
-
-    # Affichage des métriques
-    with col57:
-        styled_metric("Feminin : <15 ans", int(iist1))
-    with col58:
-        styled_metric("Feminin : 15-24 ans", int(iist2))
-    with col59:
-        styled_metric("Feminin : >25 ans", int(iist3))
-    with col60:
-        styled_metric("Masculin : <15 ans", int(iist4))
-    with col61:
-        styled_metric("Masculin : 15-24 ans", int(iist5))
-    with col62:
-        styled_metric("Masculin : >25 ans", int(iist6))
-    with col63:
-        styled_metric("Total", int(iist7))
-    
-    st.subheader("4. Traites selon l'approche etiologique")
-
-
-    col64, col65, col66, col67, col68, col69, col70 = st.columns(7)
-
-    # Calculs pour les catégories d'âge
-    ist1 = filtered_data["IST/contacts_new_caseY/infer153L"].sum()
-    ist2 = filtered_data["IST/contacts_new_caseY/quinze_243L"].sum()
-    ist3 = filtered_data["IST/contacts_new_caseY/Vingt53L"].sum()
-    ist4 = filtered_data["IST/contacts_new_caseR/infer153R"].sum()
-    ist5 = filtered_data["IST/contacts_new_caseR/quinze_243R"].sum()
-    ist6 = filtered_data["IST/contacts_new_caseR/Vingt53R"].sum()
-    ist7 = filtered_data["IST/contacts_new_caseY/overall3L"].sum() + filtered_data["IST/contacts_new_caseR/overall3R"].sum()
-
-
-    # Affichage des métriques
-    with col64:
-        styled_metric("Feminin : <15 ans", int(ist1))
-    with col65:
-        styled_metric("Feminin : 15-24 ans", int(ist2))
-    with col66:
-        styled_metric("Feminin : >25 ans", int(ist3))
-    with col67:
-        styled_metric("Masculin : <15 ans", int(ist4))
-    with col68:
-        styled_metric("Masculin : 15-24 ans", int(ist5))
-    with col69:
-        styled_metric("Masculin : >25 ans", int(ist6))
-    with col70:
-        styled_metric("Total", int(ist7))
-    
-###
-# Affichage des métriques pour les catégories d'âge
+def render_section_8(results):
+    st.header(SECTIONS[8].title)
+    render_tiles(8, results)
+
+# Affichage des sections correspondant aux organisations sélectionnées
+SECTION_RENDERERS = {
+    1: render_section_1,
+    2: render_section_2,
+    3: render_section_3,
+    4: render_section_4,
+    5: render_section_5,
+    6: render_section_6,
+    7: render_section_7,
+    8: render_section_8,
+}
+
+# Chaque section est un fragment : elle ne construit ses tuiles et son graphique que si elle
+# est ouverte, et l'ouvrir, la fermer ou changer son pas de temps ne ré-exécute qu'elle
+@st.fragment
+def section_fragment(number, results, opened_by_default):
+    if not st.toggle(f"Afficher : {SECTIONS[number].title}", value=opened_by_default, key=f"section_{number}"):
+        return
+    with diag.stage(f"section {number}", rows=len(filtered_data)):
+        SECTION_RENDERERS[number](results)
+
+for number in sections:
+    section_fragment(number, results, opened_by_default=number == sections[0])
+
+# Tendances : cumul, moyenne mobile sur 3 mois et variation mensuelle des indicateurs choisis.
+# Les séries dérivées sont conservées par le moteur et prolongées à chaque actualisation
+TREND_LABELS = {i.key: f"{i.label} ({SECTIONS[i.section].title.split('.')[0]})" for i in INDICATORS}
+
+@st.fragment
+def trends_fragment():
+    if not st.toggle("Afficher : Tendances des indicateurs", value=False, key="section_trends"):
+        return
+    st.header("Tendances des indicateurs")
+    keys = st.multiselect("Indicateurs", options=list(TREND_LABELS), format_func=TREND_LABELS.get,
+                          default=["CPN/CPN1", "CPN/CPN4", "VBG/NewSVS"], key="trend_keys")
+    kind = st.radio("Série", options=KINDS, horizontal=True, key="trend_kind")
+    if not keys:
+        return
+    with diag.stage("tendances"):
+        timeline_data = engine.trends(**selection).frame(kind, keys, periode)
+    fig = go.Figure()
+    for key in keys:
+        fig.add_trace(go.Scatter(x=timeline_data["time"], y=timeline_data[key], mode="lines+markers",
+                                 name=TREND_LABELS[key]))
+    fig.update_layout(
+        title=f"{kind} par mois",
+        xaxis_title="Temps (par mois)",
+        template="plotly_white",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+    )
+    show_chart(fig, use_container_width=True)
+
+trends_fragment()
+
+# Qualité des données : règles évaluées une fois à l'ingestion, ici seulement restreintes à la sélection
+@st.fragment
+def quality_fragment():
+    if not st.toggle("Afficher : Qualité des données", value=False, key="section_quality"):
+        return
+    st.header("Qualité des données")
+    with diag.stage("qualité", rows=len(filtered_data)):
+        summary = engine.quality.summary(filtered_data.rows)
+    st.dataframe(summary, hide_index=True)
+    rules = {r.key: r for r in RULES}
+    rule = rules[st.selectbox("Lignes en cause", options=list(rules), format_func=lambda k: rules[k].label,
+                              key="quality_rule")]
+    rows = engine.quality.violations(rule, filtered_data.rows)
+    if len(rows):
+        columns = [c for c in ("_id", "organisation", "Province", "Zone_sante", "Aire_sante", *rule.columns)
+                   if c in data.columns]
+        st.caption(f"{len(rows)} ligne(s) ; 500 premières affichées")
+        st.dataframe(data[list(dict.fromkeys(columns))].take(rows[:500]), hide_index=True)
+
+quality_fragment()
+
+# Téléchargement des données filtrées : les fichiers ne sont préparés qu'à la demande,
+# écrits par morceaux sur disque (jamais de copie complète du jeu filtré en mémoire)
+@st.fragment
+def export_panel():
+    with st.expander("Télécharger les données filtrées"):
+        fmt = st.radio("Format", options=FORMATS, horizontal=True, key="export_format")
+        # Le fichier téléchargé est gardé en mémoire : les gros exports passent par la ligne de commande
+        limit = dashboard_row_limit(fmt)
+        too_large = len(filtered_data) > limit
+        if too_large:
+            st.info(f"Plus de {limit} soumissions au format {fmt} : seul le tableau des indicateurs "
+                    "est préparé ici. Pour les soumissions, lancez sur le serveur :")
+            st.code(cli_command(fmt, **selection), language="bash")
+        if not st.button("Préparer les fichiers", key="export_prepare"):
+            return
+        with diag.stage("export", rows=0 if too_large else len(filtered_data)):
+            rows = None if too_large else export_bytes(write_rows, filtered_data, fmt)
+            indicators = export_bytes(write_indicators, results, sections, fmt)
+        if rows is not None:
+            st.download_button(f"Soumissions ({len(filtered_data)} lignes)", rows,
+                               file_name=f"soumissions.{fmt}", mime=MEDIA_TYPES[fmt])
+        st.download_button("Tableau des indicateurs", indicators,
+                           file_name=f"indicateurs.{fmt}", mime=MEDIA_TYPES[fmt])
+
+export_panel()
 
 
 
 st.header("FILTREZ POUR VOIR LES DONNEES INTERACTIVES")
-st.subheader("Indicator of progress !!!! En cours de traitement, ces indicateurs viseront a voir l'atteinte des resultats ")
 
+# Indicateurs de progrès : atteinte des cibles, précalculée par version des données
+@st.fragment
+def progress_fragment():
+    if not st.toggle("Afficher : Indicateurs de progrès", value=False, key="section_progress"):
+        return
+    with diag.stage("progrès"):
+        progress = engine.progress_for(**selection)
+    if progress.empty:
+        st.info(f"Aucune cible pour cette sélection (fichier des cibles : {config.TARGETS_PATH}).")
+        return
+    st.caption("Réalisé cumulé sur toute la période de rapportage")
+    st.dataframe(
+        progress.drop(columns="indicateur").rename(columns={
+            "libelle": "Indicateur", "organisation": "Organisation", "niveau": "Niveau", "lieu": "Lieu",
+            "cible": "Cible", "realise": "Réalisé", "atteinte": "Atteinte", "ecart": "Écart",
+        }),
+        hide_index=True,
+        column_config={"Atteinte": st.column_config.ProgressColumn(format="%.0f%%", min_value=0, max_value=100)},
+    )
+
+progress_fragment()
+
+# Panneau de diagnostic dans la barre latérale
+if diag.enabled:
+    with st.sidebar.expander("Diagnostic", expanded=True):
+        st.dataframe(pd.DataFrame(diag.summary()), hide_index=True)
+        st.caption("Cache des résultats")
+        st.json(result_cache.stats())
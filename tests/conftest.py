@@ -0,0 +1,100 @@
+"""Doublure locale de l'API Kobo et dossier de données temporaire pour les tests."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from tuma import config, enable_copy_on_write
+from tuma.sources import FormSource
+
+ORGANISATIONS = ["ADJ", "CARE", "PARDE", "SARCAF"]
+
+
+class _KoboHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[0] for name, values in parse_qs(url.query).items()}
+        form = url.path.rsplit("/", 1)[-1]
+        self.server.requests.append((form, params))
+        if not url.path.startswith("/api/v1/data/") or form not in self.server.forms:
+            self.send_error(404)
+            return
+        records = sorted(self.server.forms[form], key=lambda record: record["_id"])
+        if "query" in params:
+            since = json.loads(params["query"])["_id"]["$gt"]
+            records = [record for record in records if record["_id"] > since]
+        start = int(params.get("start", 0))
+        limit = int(params.get("limit", len(records)))
+        body = json.dumps(records[start:start + limit]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class KoboStandIn(ThreadingHTTPServer):
+    """Serveur Kobo local : `forms` (formulaire -> soumissions JSON), `requests` reçues."""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), _KoboHandler)
+        self.forms = {}
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+def make_records(rows, start_id=1, prefix="uuid"):
+    """Soumissions au format JSON de l'API Kobo (nombres en texte, groupes imbriqués)."""
+    return [{
+        "_id": i,
+        "_uuid": f"{prefix}-{i}",
+        "_submission_time": f"2024-{1 + i % 12:02d}-20T08:00:00",
+        "time": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}",
+        "organisation": ORGANISATIONS[i % len(ORGANISATIONS)],
+        "Province": "Sud-Kivu",
+        "Zone_sante": "Uvira",
+        "Aire_sante": "Kalundu",
+        "CPN": {"CPN1": str(i % 5), "CPN4": str(i % 3)},
+    } for i in range(start_id, start_id + rows)]
+
+
+@pytest.fixture
+def kobo():
+    server = KoboStandIn()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Magasin local et instantané dans un dossier temporaire, synchronisation incrémentale."""
+    monkeypatch.setattr(config, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(config, "SYNC_MODE", "incremental")
+    return tmp_path
+
+
+@pytest.fixture
+def form_source(kobo, data_dir):
+    """Fabrique de `FormSource` interrogeant la doublure, avec leur magasin dans `data_dir`."""
+    def make(form, **kwargs):
+        return FormSource(form, server=kobo.url, directory=data_dir, **kwargs)
+    return make
+
+
+@pytest.fixture(autouse=True, scope="session")
+def copy_on_write():
+    # Comme aux points d'entrée (tableau de bord, rapports, exports, précalcul)
+    enable_copy_on_write()
@@ -0,0 +1,55 @@
+"""Cache LRU des résultats par version des données et sélection de filtres."""
+import numpy as np
+
+from tuma.cache import ResultCache
+
+
+def block(nbytes):
+    return np.zeros(nbytes, dtype=np.uint8)
+
+
+def test_hits_misses_and_canonical_selection():
+    cache = ResultCache(max_bytes=1000)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return block(100)
+
+    first = cache.get_or_compute("v1", {"organisation": ["CARE", "ADJ"]}, compute)
+    # Même sélection, valeurs dans un autre ordre : même entrée
+    assert cache.get_or_compute("v1", {"organisation": ["ADJ", "CARE"], "province": []}, compute) is first
+    assert len(calls) == 1
+    assert cache.get("v1", {"organisation": ["CARE"]}) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["bytes"]) == (1, 2, 1, 100)
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResultCache(max_bytes=300)
+    for name in ("a", "b", "c"):
+        cache.put("v1", {"organisation": [name]}, block(100))
+    cache.get("v1", {"organisation": ["a"]})  # "b" devient la moins récemment utilisée
+    cache.put("v1", {"organisation": ["d"]}, block(100))
+
+    assert cache.get("v1", {"organisation": ["b"]}) is None
+    assert all(cache.get("v1", {"organisation": [name]}) is not None for name in ("a", "c", "d"))
+    assert cache.stats()["evictions"] == 1
+    # Plus grand que le budget entier : renvoyé mais non conservé
+    cache.put("v1", {"organisation": ["e"]}, block(400))
+    assert cache.get("v1", {"organisation": ["e"]}) is None
+    assert cache.stats()["bytes"] == 300
+
+
+def test_versions_coexist_until_retain():
+    cache = ResultCache(max_bytes=1000)
+    cache.put("v1", {}, block(100))
+    cache.put("v2", {}, block(200))
+    # Une session encore servie par l'ancienne version n'efface pas la nouvelle
+    assert cache.get("v1", {}) is not None and cache.get("v2", {}) is not None
+
+    cache.retain("v2")
+    assert cache.get("v1", {}) is None
+    assert cache.get("v2", {}) is not None
+    stats = cache.stats()
+    assert (stats["entries"], stats["bytes"], stats["invalidations"]) == (1, 200, 1)
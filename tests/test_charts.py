@@ -0,0 +1,46 @@
+"""Séries des graphiques : regroupement par pas de temps et plafonnement LTTB."""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from tuma.charts import cap_traces, chart_timeline, lttb_indices
+from tuma.indicators import IndicatorResult
+
+DEBUT, FIN = "Information_groupe/Effectif_debut", "Information_groupe/Effectif_fin"
+
+
+def test_lttb_keeps_bounds_and_spikes():
+    y = np.sin(np.arange(2000) / 50)
+    y[1234] = 40  # Pic isolé : doit survivre au sous-échantillonnage
+    keep = lttb_indices(y, 100)
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == 1999
+    assert (np.diff(keep) > 0).all()
+    assert 1234 in keep
+    np.testing.assert_array_equal(lttb_indices(y[:50], 100), np.arange(50))
+
+
+def test_cap_traces_limits_points_and_keeps_x_aligned():
+    x = pd.date_range("2020-01-01", periods=3000, freq="D")
+    y = np.random.default_rng(13).normal(size=3000).cumsum()
+    fig = go.Figure([go.Scatter(x=x, y=y), go.Scatter(x=x[:10], y=y[:10])])
+    cap_traces(fig, max_points=200)
+    long, short = fig.data
+    assert len(long.y) == len(long.x) == 200
+    positions = x.get_indexer(pd.to_datetime(long.x))
+    np.testing.assert_allclose(long.y, y[positions])
+    assert len(short.y) == 10
+
+
+def test_quarter_buckets_sum_counts_and_recompute_rates():
+    months = pd.period_range("2024-01", periods=6, freq="M")
+    monthly = pd.DataFrame({DEBUT: [10, 10, 20, 40, 0, 60], FIN: [5, 10, 15, 20, 0, 30]}, index=months, dtype=float)
+    monthly["taux_achevement"] = (monthly[FIN] / monthly[DEBUT] * 100).fillna(0)
+    results = IndicatorResult(monthly.sum(), monthly)
+
+    quarters = chart_timeline(results, [DEBUT, "taux_achevement"], bucket="Q")
+    assert quarters["time"].tolist() == ["2024Q1", "2024Q2"]
+    assert quarters[DEBUT].tolist() == [40, 100]
+    # Taux du trimestre : somme des fins / somme des débuts, et non moyenne des taux mensuels
+    assert quarters["taux_achevement"].tolist() == [75, 50]
+    assert chart_timeline(results, [DEBUT], bucket="M")[DEBUT].tolist() == monthly[DEBUT].tolist()
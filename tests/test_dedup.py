@@ -0,0 +1,57 @@
+"""Index de déduplication des soumissions renvoyées."""
+import numpy as np
+import pandas as pd
+
+from tuma.dedup import DedupIndex, collapse
+
+
+def submissions(ids, uuids, groups=None, received=None, values=None):
+    return pd.DataFrame({
+        "_form": "100",
+        "_id": ids,
+        "_uuid": uuids,
+        "_submission_time": received or [f"2024-05-{10 + i:02d}T08:00:00" for i in range(len(ids))],
+        "time": "2024-05-01",
+        "organisation": "PARDE",
+        "Aire_sante": "Kalundu",
+        "Nom_group": groups or [None] * len(ids),
+        "valeur": values or list(range(len(ids))),
+    })
+
+
+def test_collapse_keeps_latest_resubmission():
+    df = submissions([1, 2, 3, 4], ["a", "b", "a", "c"],
+                     received=["2024-05-12T00:00:00", "2024-05-11T00:00:00",
+                               "2024-05-13T00:00:00", "2024-05-10T00:00:00"])
+    kept, counts = collapse(df)
+    assert kept["_id"].tolist() == [2, 3, 4]
+    assert counts["_uuid"] == 1
+
+
+def test_natural_key_ignores_incomplete_keys():
+    # Même groupe, même aire et même mois : un seul rapport ; sans groupe, rien n'est regroupé
+    df = submissions([1, 2, 3, 4], ["a", "b", "c", "d"], groups=["G1", "G1", None, None])
+    kept, counts = collapse(df)
+    assert kept["_id"].tolist() == [2, 3, 4]
+    assert counts["clé naturelle"] == 1
+
+
+def test_index_add_matches_full_collapse():
+    first = submissions([1, 2, 3], ["a", "b", "c"], groups=["G1", "G2", "G3"])
+    later = submissions([4, 5, 6], ["b", "d", "e"], groups=["G9", "G3", "G4"],
+                        received=["2024-06-01T00:00:00", "2024-06-02T00:00:00", "2024-06-03T00:00:00"])
+    index = DedupIndex()
+    current, _ = index.reset(first)
+    new, positions, counts = index.add(later)
+
+    # `_uuid` "b" remplace la 2e ligne, le groupe G3 la 3e
+    assert positions.tolist() == [1, 2]
+    assert counts["_uuid"] == 1 and counts["clé naturelle"] == 1
+    incremental = pd.concat([current.drop(index=positions), new], ignore_index=True)
+    full, _ = collapse(pd.concat([first, later], ignore_index=True))
+    assert sorted(incremental["_id"]) == sorted(full["_id"]) == [1, 4, 5, 6]
+    np.testing.assert_array_equal(index.labels, [0, 3, 4, 5])
+
+    # Nouveau renvoi d'une soumission déjà remplacée : seule la version courante est retirée
+    _, positions, _ = index.add(submissions([7], ["b"], received=["2024-07-01T00:00:00"]))
+    assert positions.tolist() == [1]
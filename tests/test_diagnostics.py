@@ -0,0 +1,39 @@
+"""Lignes de journal du mode diagnostic."""
+import json
+import logging
+
+import pytest
+
+from tuma.diagnostics import Diagnostics, logger
+
+
+class _Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(record.getMessage())
+
+
+@pytest.fixture
+def root_handler():
+    # Journalisation racine déjà configurée (niveau WARNING par défaut), comme par un hôte
+    root, handler = logging.getLogger(), _Records()
+    level, handlers = logger.level, list(logger.handlers)
+    root.addHandler(handler)
+    logger.setLevel(logging.NOTSET)
+    yield handler
+    root.removeHandler(handler)
+    logger.setLevel(level)
+    logger.handlers[:] = handlers
+
+
+def test_stage_lines_reach_configured_root_handler(root_handler):
+    diag = Diagnostics(True, session="s1")
+    with diag.stage("filtrage", rows=10):
+        pass
+    lines = [json.loads(line) for line in root_handler.lines]
+    assert [(line["stage"], line["rows"], line["session"]) for line in lines] == [("filtrage", 10, "s1")]
+    # Pas de second gestionnaire : chaque ligne n'est écrite qu'une fois
+    assert not logger.handlers
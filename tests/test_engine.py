@@ -0,0 +1,59 @@
+"""Prolongement du moteur par les seules soumissions ajoutées ou retirées."""
+import pandas as pd
+import pytest
+
+from tuma import engine as engine_module
+from tuma.engine import DashboardEngine
+from tuma.indicators import INDICATORS
+from tuma.schema import apply_schema
+from tuma.synthetic import generate_frame
+from tuma.timeseries import KINDS
+
+KEYS = [indicator.key for indicator in INDICATORS]
+SELECTIONS = [{}, {"organisation": ["CARE"]}, {"organisation": ["PARDE"], "province": ["Sud-Kivu"]}]
+
+
+def assert_same_results(extended, rebuilt):
+    for selection in SELECTIONS:
+        expected, actual = rebuilt.compute(**selection), extended.compute(**selection)
+        pd.testing.assert_series_equal(actual.totals[KEYS], expected.totals[KEYS], check_dtype=False)
+        pd.testing.assert_frame_equal(actual.timeline(KEYS), expected.timeline(KEYS), check_dtype=False)
+        for kind in KINDS:
+            pd.testing.assert_frame_equal(extended.trends(**selection).frame(kind, KEYS),
+                                          rebuilt.trends(**selection).frame(kind, KEYS), check_dtype=False)
+
+
+@pytest.mark.usefixtures("data_dir")
+def test_extend_matches_full_rebuild(monkeypatch):
+    base = apply_schema(generate_frame(3000, seed=3, months=12))
+    # Nouvelles soumissions, dont des mois postérieurs à l'historique
+    appended = apply_schema(generate_frame(400, seed=4, start_id=3001, start_month="2023-06", months=12))
+    data = pd.concat([base, appended], ignore_index=True)
+
+    engine = DashboardEngine(base, cache=None)
+    for selection in SELECTIONS:
+        engine.trends(**selection)
+    built = []
+    build_cube = engine_module.build_cube
+    monkeypatch.setattr(engine_module, "build_cube", lambda df: built.append(len(df)) or build_cube(df))
+    extended = engine.extend(data, appended)
+    # Seules les soumissions ajoutées sont agrégées
+    assert built == [len(appended)]
+    monkeypatch.undo()
+
+    assert_same_results(extended, DashboardEngine(data, cache=None))
+
+
+@pytest.mark.usefixtures("data_dir")
+def test_extend_with_removed_submissions_matches_full_rebuild():
+    base = apply_schema(generate_frame(3000, seed=3, months=12))
+    appended = apply_schema(generate_frame(400, seed=4, start_id=3001, start_month="2023-06", months=12))
+    # Versions remplacées par un renvoi : retirées du cube
+    removed = base.iloc[100:160]
+    data = pd.concat([base.drop(index=removed.index), appended], ignore_index=True)
+
+    engine = DashboardEngine(base, cache=None)
+    for selection in SELECTIONS:
+        engine.trends(**selection)
+    extended = engine.extend(data, appended, removed)
+    assert_same_results(extended, DashboardEngine(data, cache=None))
@@ -0,0 +1,77 @@
+"""Export par morceaux des soumissions filtrées et du tableau des indicateurs."""
+import io
+
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+
+from tuma.engine import DashboardEngine
+from tuma.export import FORMATS, export_bytes, indicator_table, write_frames, write_indicators, write_rows
+from tuma.schema import apply_schema
+from tuma.synthetic import generate_frame
+
+SELECTION = dict(organisation=["CARE", "PARDE"], province=["Sud-Kivu"])
+READERS = {"csv": pd.read_csv, "parquet": pd.read_parquet, "xlsx": pd.read_excel}
+
+
+@pytest.fixture
+def engine(data_dir):
+    return DashboardEngine(apply_schema(generate_frame(1500, seed=18)), cache=None)
+
+
+@pytest.mark.parametrize("fmt", FORMATS)
+def test_exported_rows_match_filtered_rows(engine, tmp_path, fmt):
+    rows = engine.filter_rows(**SELECTION)
+    expected = rows.frame()
+    path = tmp_path / f"soumissions.{fmt}"
+    write_rows(rows, fmt, path, chunk_rows=100)  # Plusieurs morceaux
+
+    exported = READERS[fmt](path)
+    assert 0 < len(exported) == len(expected) < len(engine.data)
+    assert list(exported.columns) == [str(c) for c in expected.columns]
+    assert exported["_id"].tolist() == expected["_id"].tolist()
+    column = "Information_groupe/Effectif_debut"
+    assert exported[column].fillna(0).sum() == expected[column].fillna(0).sum()
+    if fmt == "parquet":
+        pd.testing.assert_frame_equal(exported, expected.reset_index(drop=True), check_dtype=False,
+                                      check_categorical=False)
+
+
+def test_empty_selection_exports_header_only(engine, tmp_path):
+    path = tmp_path / "vide.csv"
+    write_rows(engine.filter_rows(organisation=["Inconnue"]), "csv", path)
+    assert pd.read_csv(path).empty
+    assert "_id" in pd.read_csv(path).columns
+
+
+def test_parquet_writer_closed_when_a_chunk_fails(engine, tmp_path, monkeypatch):
+    writers = []
+
+    class Writer(pq.ParquetWriter):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            writers.append(self)
+
+    monkeypatch.setattr(pq, "ParquetWriter", Writer)
+
+    def chunks():
+        yield engine.filter_rows(organisation=["CARE"]).frame()
+        raise RuntimeError("morceau illisible")
+
+    with pytest.raises(RuntimeError):
+        write_frames(chunks(), "parquet", tmp_path / "interrompu.parquet")
+    assert [writer.is_open for writer in writers] == [False]
+
+
+def test_indicator_table_and_bytes(engine):
+    results = engine.compute(**SELECTION)
+    table = indicator_table(results, [1])
+    months = len(results.monthly)
+    assert len(table) == table["Indicateur"].nunique() * (months + 1)
+    totals = table[table["Mois"] == "Total"].set_index("Indicateur")["Valeur"]
+    assert (totals > 0).any()
+
+    content = export_bytes(write_indicators, results, [1], "csv")
+    assert content.startswith("﻿".encode("utf-8"))
+    pd.testing.assert_frame_equal(pd.read_csv(io.BytesIO(content), encoding="utf-8-sig"),
+                                  table.astype({"Mois": str}), check_dtype=False)
@@ -0,0 +1,53 @@
+"""Moteur de filtrage indexé, comparé aux filtres `isin` successifs d'origine."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from tuma.filters import FilterIndex
+
+GEOGRAPHY = [("Sud-Kivu", "Uvira", "Kalundu"), ("Sud-Kivu", "Uvira", "Kavimvira"),
+             ("Sud-Kivu", "Fizi", "Baraka"), ("Nord-Kivu", "Goma", "Mapendo"), (None, None, None)]
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = np.random.default_rng(4)
+    rows = 5000
+    places = [GEOGRAPHY[i] for i in rng.integers(0, len(GEOGRAPHY), rows)]
+    df = pd.DataFrame(places, columns=["Province", "Zone_sante", "Aire_sante"])
+    df.insert(0, "organisation", rng.choice(["ADJ", "CARE", "PARDE", "SARCAF"], rows))
+    df["time"] = pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 180, rows), unit="D")
+    return df
+
+
+def pandas_mask(df, organisation, province, zone_sante, aire_sante, periode):
+    # Filtres de la version d'origine du tableau de bord : un `isin` par filtre actif
+    filtered = df.assign(**{"Période": df["time"].dt.to_period("M")})
+    for column, values in (("organisation", organisation), ("Province", province),
+                           ("Zone_sante", zone_sante), ("Aire_sante", aire_sante), ("Période", periode)):
+        if values:
+            filtered = filtered[filtered[column].isin(values)]
+    return filtered.index.to_numpy()
+
+
+SELECTIONS = [
+    dict(organisation=["CARE"]),
+    dict(organisation=["CARE", "ADJ"], province=["Sud-Kivu"]),
+    dict(province=["Sud-Kivu"], zone_sante=["Uvira"], aire_sante=["Kavimvira"]),
+    dict(zone_sante=["Goma", "Fizi"], periode=[pd.Period("2024-03", "M")]),
+    dict(organisation=["PARDE"], periode=[pd.Period("2024-02", "M"), pd.Period("2024-05", "M")]),
+    dict(aire_sante=["Inconnue"]),
+    dict(organisation=["SARCAF"], province=["Inconnue"]),
+]
+
+
+@pytest.mark.parametrize("selection", SELECTIONS)
+def test_select_matches_pandas_mask(data, selection):
+    arguments = dict(organisation=None, province=None, zone_sante=None, aire_sante=None, periode=None)
+    arguments.update(selection)
+    rows = FilterIndex(data).select(**arguments)
+    np.testing.assert_array_equal(rows, pandas_mask(data, **arguments))
+
+
+def test_no_filter_selects_everything(data):
+    assert FilterIndex(data).select() is None
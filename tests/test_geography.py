@@ -0,0 +1,54 @@
+"""Hiérarchie géographique des filtres en cascade."""
+from pathlib import Path
+
+import pandas as pd
+from streamlit.testing.v1 import AppTest
+
+from tuma import config
+from tuma.geography import GeographyIndex
+from tuma.synthetic import frame_to_records, generate_frame
+
+ROOT = Path(__file__).resolve().parent.parent
+
+DATA = pd.DataFrame({
+    "organisation": ["CARE", "ADJ", "CARE", "PARDE", "CARE", None],
+    "Province": ["Sud-Kivu", "Sud-Kivu", "Sud-Kivu", "Nord-Kivu", "Nord-Kivu", None],
+    # Même nom de zone dans deux provinces
+    "Zone_sante": ["Uvira", "Uvira", "Fizi", "Goma", "Uvira", "Fizi"],
+    "Aire_sante": ["Kalundu", "Kavimvira", "Baraka", "Mapendo", "Kiwanja", None],
+})
+
+
+def test_cascade_counts():
+    geography = GeographyIndex(DATA)
+    assert geography.organisations == ["CARE", "ADJ", "PARDE"]
+    assert geography.provinces() == {"Sud-Kivu": 3, "Nord-Kivu": 2}
+    assert geography.zones(["Sud-Kivu"]) == {"Uvira": 2, "Fizi": 1}
+    assert geography.aires(["Sud-Kivu"], ["Uvira"]) == {"Kalundu": 1, "Kavimvira": 1}
+    assert geography.aires(["Inconnue"]) == {}
+
+
+def test_zone_without_province():
+    geography = GeographyIndex(DATA)
+    # Zone choisie sans province : ses aires dans toutes les provinces
+    assert geography.aires(None, ["Uvira"]) == {"Kalundu": 1, "Kavimvira": 1, "Kiwanja": 1}
+    assert geography.aires([], ["Fizi"]) == {"Baraka": 1}
+    assert geography.zones() == {"Uvira": 3, "Fizi": 2, "Goma": 1}
+
+
+def test_dashboard_accepts_zone_without_province(kobo, data_dir, monkeypatch):
+    # Régression : choisir une zone sans province faisait échouer le script (`filtered_for_zone`)
+    data = generate_frame(400, seed=17)
+    kobo.forms["100"] = frame_to_records(data)
+    monkeypatch.setattr(config, "KOBO_SOURCES", [{"form": "100", "server": kobo.url}])
+    monkeypatch.setattr(config, "REFRESH_MINUTES", 0)
+    monkeypatch.chdir(ROOT)
+
+    app = AppTest.from_file(str(ROOT / "Tumaplus.py"), default_timeout=120)
+    app.run()
+    zone = data["Zone_sante"].iloc[0]
+    app.multiselect(key="zone_sante_filter").set_value([zone]).run()
+
+    assert not app.exception
+    expected = set(data.loc[data["Zone_sante"] == zone, "Aire_sante"])
+    assert {str(option).split(" (")[0] for option in app.multiselect(key="aire_sante_filter").options} == expected
@@ -0,0 +1,43 @@
+"""Précalcul des sélections courantes par des processus `python -m tuma.precompute`."""
+import pandas as pd
+import pytest
+
+from tuma.cache import ResultCache
+from tuma.dataset import snapshot_path
+from tuma.engine import DashboardEngine
+from tuma.partitions import sort_partitions
+from tuma.precompute import precompute, rollup_selections, shard_selections
+from tuma.snapshot import write_snapshot
+from tuma.synthetic import generate_frame
+
+
+def test_shards_keep_each_organisation_together():
+    selections = [{}, {"organisation": ["CARE"]}, {"organisation": ["ADJ"]},
+                  {"organisation": ["CARE"], "province": ["Sud-Kivu"]}]
+    assert shard_selections(selections, 4) == [[{}], selections[1:4:2], [{"organisation": ["ADJ"]}]]
+    assert shard_selections(selections, 1) == [[{}, *selections[1:4:2], {"organisation": ["ADJ"]}]]
+
+
+@pytest.mark.usefixtures("data_dir")
+def test_precompute_publishes_worker_results():
+    df, _ = sort_partitions(generate_frame(2000, seed=7, months=6))
+    data = write_snapshot(df, snapshot_path())
+    cache = ResultCache(64 * 1024 * 1024)
+    engine = DashboardEngine(data, cache=cache)
+
+    selections = rollup_selections(engine.cube)
+    assert precompute(engine, processes=2) == len(selections)
+    assert cache.stats()["entries"] == len(selections)
+
+    reference = DashboardEngine(data, cache=None)
+    for selection in selections:
+        cached = cache.get(engine.version, selection)
+        expected = reference.compute(**selection)
+        pd.testing.assert_series_equal(cached.totals, expected.totals)
+        pd.testing.assert_frame_equal(cached.monthly, expected.monthly)
+
+
+@pytest.mark.usefixtures("data_dir")
+def test_precompute_skips_a_snapshot_of_another_version():
+    engine = DashboardEngine(generate_frame(200, seed=1), cache=ResultCache(1024 * 1024))
+    assert precompute(engine, processes=2) == 0
@@ -0,0 +1,94 @@
+"""Atteinte des cibles des indicateurs de progrès."""
+import pandas as pd
+import pytest
+
+from tuma import config
+from tuma.cube import build_cube
+from tuma.engine import DashboardEngine
+from tuma.indicators import IndicatorEngine
+from tuma.progress import compute_progress, load_targets
+from tuma.schema import apply_schema
+from tuma.synthetic import generate_frame
+
+DEBUT, FIN = "Information_groupe/Effectif_debut", "Information_groupe/Effectif_fin"
+
+
+@pytest.fixture(scope="module")
+def data():
+    return apply_schema(generate_frame(3000, seed=19))
+
+
+def test_load_targets(tmp_path):
+    path = tmp_path / "cibles.csv"
+    path.write_text(
+        "Indicateur;Organisation;Niveau;Lieu;Cible\n"
+        "CPN/CPN1;CARE;Province;Sud-Kivu;1200\n"
+        "CPN/CPN1;CARE;province; Sud-Kivu ;1500\n"  # Même cible redéfinie : la dernière l'emporte
+        "taux_achevement;PARDE;zone;Uvira;80,5\n"
+        "inconnu;CARE;province;Sud-Kivu;10\n"
+        "CPN/CPN1;CARE;pays;RDC;10\n",
+        encoding="utf-8",
+    )
+    targets = load_targets(path)
+    assert targets[["indicateur", "niveau", "lieu", "cible"]].values.tolist() == [
+        ["CPN/CPN1", "province", "Sud-Kivu", 1500.0],
+        ["taux_achevement", "zone", "Uvira", 80.5],
+    ]
+    assert load_targets(tmp_path / "absent.csv").empty
+
+
+def test_targets_with_missing_columns_are_ignored(data, data_dir, monkeypatch, caplog):
+    monkeypatch.setattr(config, "TARGETS_PATH", data_dir / "cibles.csv")
+    config.TARGETS_PATH.write_text("indicateur;organisation;cible\nCPN/CPN1;CARE;1200\n", encoding="utf-8")
+    engine = DashboardEngine(data, cache=None)
+    assert engine.progress.empty
+    assert "colonnes manquantes ['niveau', 'lieu']" in caplog.text
+
+
+def test_attainment_matches_filtered_sums(data):
+    province = data.loc[data["organisation"] == "CARE", "Province"].iloc[0]
+    zone = data.loc[data["organisation"] == "PARDE", "Zone_sante"].iloc[0]
+    targets = pd.DataFrame({
+        "indicateur": ["CPN/CPN1", "taux_achevement", "CPN/CPN1"],
+        "organisation": ["CARE", "PARDE", "CARE"],
+        "niveau": ["province", "zone", "aire"],
+        "lieu": [province, zone, "Aire sans soumission"],
+        "cible": [1000.0, 90.0, 50.0],
+    })
+    progress = compute_progress(build_cube(data), targets, IndicatorEngine()).set_index("niveau")
+
+    care = data[(data["organisation"] == "CARE") & (data["Province"] == province)]
+    achieved = float(care["CPN/CPN1"].sum())
+    assert progress.loc["province", "realise"] == pytest.approx(achieved)
+    assert progress.loc["province", "atteinte"] == pytest.approx(achieved / 1000 * 100)
+    assert progress.loc["province", "ecart"] == pytest.approx(max(1000 - achieved, 0))
+
+    parde = data[(data["organisation"] == "PARDE") & (data["Zone_sante"] == zone)]
+    rate = parde[FIN].sum() / parde[DEBUT].sum() * 100
+    assert progress.loc["zone", "realise"] == pytest.approx(rate)
+    assert progress.loc["zone", "atteinte"] == pytest.approx(rate / 90 * 100)
+
+    # Lieu sans soumission : rien de réalisé, toute la cible reste à atteindre
+    assert progress.loc["aire", ["realise", "atteinte", "ecart"]].tolist() == [0, 0, 50]
+
+
+def test_zone_without_province_narrows_targets(data, data_dir, monkeypatch):
+    zone = data["Zone_sante"].iloc[0]
+    inside = data.loc[data["Zone_sante"] == zone, ["Province", "Aire_sante"]].iloc[0]
+    outside = data.loc[data["Province"] != inside["Province"], ["Province", "Aire_sante"]].iloc[0]
+    path = data_dir / "cibles.csv"
+    path.write_text(
+        "indicateur,organisation,niveau,lieu,cible\n"
+        f"CPN/CPN1,CARE,province,{inside['Province']},10\n"
+        f"CPN/CPN1,CARE,province,{outside['Province']},10\n"
+        f"CPN/CPN1,CARE,aire,{inside['Aire_sante']},10\n"
+        f"CPN/CPN1,CARE,aire,{outside['Aire_sante']},10\n",
+        encoding="utf-8",
+    )
+    monkeypatch.setattr(config, "TARGETS_PATH", path)
+    engine = DashboardEngine(data, cache=None)
+
+    # Comme la barre latérale : une zone choisie sans province restreint provinces et aires
+    progress = engine.progress_for(zone_sante=[zone])
+    assert sorted(progress["lieu"]) == sorted([inside["Province"], inside["Aire_sante"]])
+    assert len(engine.progress_for()) == 4
@@ -0,0 +1,48 @@
+"""Règles de qualité des données, évaluées une fois par ingestion."""
+import numpy as np
+import pandas as pd
+
+from tuma.quality import RULES, read_quality, validate, write_quality
+from tuma.schema import apply_schema
+from tuma.synthetic import generate_frame
+
+DEBUT, FIN = "Information_groupe/Effectif_debut", "Information_groupe/Effectif_fin"
+
+
+def test_rule_counts(tmp_path):
+    raw = generate_frame(600, seed=22)
+    assert validate(apply_schema(raw)).summary()["Lignes en cause"].sum() == 0  # Jeu cohérent
+
+    total_rule = next(rule for rule in RULES if rule.key.startswith("somme_"))
+    total = total_rule.columns[-1]
+    cursus = raw.index[raw[DEBUT].notna() & raw[FIN].notna()]
+    health = raw.index[raw[total].notna()]
+    raw.loc[cursus[:3], FIN] = raw.loc[cursus[:3], DEBUT] + 1
+    raw.loc[health[:2], total] += 1
+    raw.loc[health[2], total_rule.columns[0]] = -1
+    raw["time"] = raw["time"].astype(object)
+    raw.loc[health[3], "time"] = pd.Timestamp.now() + pd.Timedelta(days=30)
+    raw.loc[health[4:6], "time"] = "pas une date"
+
+    report = validate(apply_schema(raw))
+    counts = dict(zip([rule.key for rule in RULES], report.summary()["Lignes en cause"]))
+    assert counts["effectif_fin_superieur"] == 3
+    # Tranche négative : le total ne correspond plus non plus
+    assert counts[total_rule.key] == 3
+    assert counts["compteur_negatif"] == 1
+    assert counts["time_futur"] == 1
+    assert counts["time_illisible"] == 2
+    assert sum(counts.values()) == 10
+
+    # Restriction à une sélection (positions triées)
+    selected = np.sort(np.r_[cursus[:1], health[:1]])
+    assert report.summary(selected)["Lignes en cause"].sum() == 2
+
+    # Rapport enregistré à côté de l'instantané, relu pour la même version seulement
+    report.version = "v1"
+    path = tmp_path / "snapshot.qualite.parquet"
+    write_quality(report, path)
+    restored = read_quality(path, "v1")
+    assert {key: rows.tolist() for key, rows in restored.rows.items() if len(rows)} == \
+        {key: rows.tolist() for key, rows in report.rows.items() if len(rows)}
+    assert read_quality(path, "v2") is None
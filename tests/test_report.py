@@ -0,0 +1,16 @@
+"""Rapports HTML/XLSX sans navigateur."""
+import pandas as pd
+
+from tuma.report import _sheet_name, write_xlsx
+
+
+def test_sheet_names_are_valid_for_excel(tmp_path):
+    section = "8. Maladies [IST] : cas/contacts? *total* \\ traités"
+    assert _sheet_name(section) == "8. Maladies -IST- - cas-contact"
+    assert len(_sheet_name("x" * 40)) == 31
+
+    totals = pd.DataFrame({"Indicateur": ["Total"], "Valeur": [3]})
+    monthly = pd.DataFrame({"Mois": ["2024-05"], "Total": [3]})
+    path = tmp_path / "rapport.xlsx"
+    write_xlsx(path, "CARE", [(section, totals, monthly)])
+    assert pd.ExcelFile(path).sheet_names == ["Rapport", _sheet_name(section)]
@@ -0,0 +1,48 @@
+"""Typage compact à l'ingestion : types plus petits, mêmes valeurs."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from tuma.partitions import sort_partitions
+from tuma.schema import LABEL_COLUMNS, apply_schema, compact_counter, counter_columns
+from tuma.snapshot import read_snapshot, write_snapshot
+from tuma.synthetic import generate_frame
+
+
+@pytest.mark.parametrize("values, dtype", [
+    ([0, 12, 255, np.nan], "UInt8"),
+    ([0, 300, np.nan], "UInt16"),
+    ([-5, 100], "Int8"),
+    ([70000, 1], "UInt32"),
+])
+def test_compact_counter_picks_smallest_integer(values, dtype):
+    compact = compact_counter(pd.Series(values, dtype="float64"))
+    assert str(compact.dtype) == dtype
+    assert compact.astype("float64").equals(pd.Series(values, dtype="float64"))
+
+
+def test_compact_counter_keeps_fractions():
+    values = pd.Series([1.5, 2.0])
+    assert compact_counter(values) is values
+
+
+def test_apply_schema_preserves_values(tmp_path):
+    # Rangé par partition, comme avant toute écriture de l'instantané
+    raw, _ = sort_partitions(generate_frame(3000, seed=16))
+    typed = apply_schema(raw)
+
+    assert typed.memory_usage(deep=True).sum() < raw.memory_usage(deep=True).sum() / 2
+    for column in counter_columns(raw.columns):
+        assert pd.api.types.is_integer_dtype(typed[column].dtype), column
+        pd.testing.assert_series_equal(typed[column].astype("float64"), raw[column], check_names=False)
+    for column in LABEL_COLUMNS:
+        assert isinstance(typed[column].dtype, pd.CategoricalDtype)
+        assert typed[column].astype(object).tolist() == raw[column].tolist()
+    assert typed["Statut_group"].astype("float64").fillna(-1).tolist() == raw["Statut_group"].fillna(-1).tolist()
+
+    # L'instantané Parquet restitue les mêmes types et les mêmes valeurs
+    path = tmp_path / "snapshot.parquet"
+    write_snapshot(raw, path)
+    restored = read_snapshot(path)
+    assert restored.dtypes.astype(str).to_dict() == typed.dtypes.astype(str).to_dict()
+    pd.testing.assert_frame_equal(restored, typed, check_like=True, check_dtype=False, check_categorical=False)
@@ -0,0 +1,30 @@
+"""Instantané Parquet rangé par partition organisation × mois."""
+import pyarrow.parquet as pq
+
+from tuma.partitions import sort_partitions
+from tuma.snapshot import read_snapshot, snapshot_metadata, write_snapshot
+from tuma.synthetic import generate_frame
+
+
+def test_read_snapshot_reads_only_selected_partitions(tmp_path):
+    path = tmp_path / "snapshot.parquet"
+    df, _ = sort_partitions(generate_frame(2000, seed=5, months=6))
+    full = write_snapshot(df, path)
+
+    partitions = snapshot_metadata(path)["partitions"]
+    assert pq.ParquetFile(path).num_row_groups == len(partitions)
+    assert sum(size for _, _, size in partitions) == len(full)
+
+    care = read_snapshot(path, organisation=["CARE"])
+    assert len(care) == (full["organisation"] == "CARE").sum()
+    assert set(care["organisation"]) == {"CARE"}
+
+    selected = read_snapshot(path, organisation=["CARE", "ADJ"], periode=["2023-02"])
+    expected = full[full["organisation"].isin(["CARE", "ADJ"]) & (full["time"].dt.strftime("%Y-%m") == "2023-02")]
+    assert 0 < len(selected) == len(expected) < len(full)
+    assert sorted(selected["_id"]) == sorted(expected["_id"])
+    # Jeu partiel : version distincte de celle du jeu complet (structures dérivées à part)
+    assert selected.attrs["version"] != full.attrs["version"] == read_snapshot(path).attrs["version"]
+
+    assert read_snapshot(path, periode=["1999-01"]).empty
+    assert read_snapshot(tmp_path / "absent.parquet") is None
@@ -0,0 +1,40 @@
+"""Magasin local des soumissions et synchronisation incrémentale (doublure locale de l'API)."""
+import json
+
+from tuma.kobo import KoboClient
+from tuma.store import SubmissionStore, sync_submissions
+from conftest import make_records
+
+
+def test_sync_fetches_only_submissions_after_last_id(kobo, data_dir):
+    kobo.forms["100"] = make_records(25)
+    store, client = SubmissionStore(data_dir, form_id="100"), KoboClient(kobo.url, page_size=10)
+
+    sync_submissions(store, client)
+    assert store.state()["count"] == 25
+    assert [int(params["start"]) for _, params in kobo.requests] == [0, 10, 20]
+    assert store.state()["last_id"] == 25
+
+    kobo.forms["100"] += make_records(5, start_id=26)
+    kobo.requests.clear()
+    sync_submissions(store, client)
+    assert {json.loads(params["query"])["_id"]["$gt"] for _, params in kobo.requests} == {25}
+    sync_submissions(store, client)
+    assert store.state()["count"] == 30
+
+    df = store.load_frame()
+    assert df["_id"].tolist() == list(range(1, 31))
+    # Groupes aplatis comme dans l'export XLSX, nombres reconvertis
+    assert df["CPN/CPN1"].tolist() == [i % 5 for i in range(1, 31)]
+
+
+def test_load_frame_keeps_last_version_of_an_id(data_dir):
+    store = SubmissionStore(data_dir, form_id="100")
+    first, second = make_records(2)
+    store.append([first, second])
+    store.append([dict(first, organisation="SARCAF")])
+
+    df = store.load_frame()
+    assert df["_id"].tolist() == [1, 2]
+    assert df["organisation"].tolist() == ["SARCAF", "PARDE"]
+    assert store.state()["last_id"] == 2 and store.state()["count"] == 3
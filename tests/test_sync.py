@@ -0,0 +1,90 @@
+"""Ingestion de plusieurs formulaires Kobo (doublure locale de l'API)."""
+import json
+
+import pandas as pd
+
+from tuma.dataset import refresh_dataset, sync_dataset
+from tuma.dedup import DedupIndex
+from tuma.sources import SOURCE_COLUMN, merge_frames
+from conftest import make_records
+
+
+def test_refresh_fetches_only_new_submissions(kobo, form_source):
+    kobo.forms["100"] = make_records(300)
+    source = form_source("100")
+
+    df, changed = refresh_dataset(None, [source])
+    assert changed and len(df) == 300
+
+    kobo.forms["100"] += make_records(40, start_id=301)
+    kobo.requests.clear()
+    df, changed = refresh_dataset(df, [source])
+    assert changed and sorted(df["_id"]) == list(range(1, 341))
+    # Seules les soumissions postérieures au dernier `_id` connu sont demandées
+    assert {json.loads(params["query"])["_id"]["$gt"] for _, params in kobo.requests} == {300}
+
+    unchanged, changed = refresh_dataset(df, [source])
+    assert not changed and unchanged is df
+
+
+def test_refresh_merges_forms_and_survives_unreachable_form(kobo, form_source):
+    kobo.forms["100"] = make_records(120)
+    # Formulaire propre à un partenaire : mêmes `_id`, organisation et colonne renommée
+    partner = make_records(80, prefix="partenaire")
+    for record in partner:
+        record["province"] = record.pop("Province")
+        del record["organisation"]
+    kobo.forms["200"] = partner
+    sources = [form_source("100"), form_source("200", organisation="CARE", columns={"province": "Province"}),
+               form_source("404")]
+
+    df, _ = refresh_dataset(None, sources)
+    assert len(df) == 200
+    assert df.groupby(SOURCE_COLUMN, observed=True).size().to_dict() == {"100": 120, "200": 80}
+    partner_rows = df[df[SOURCE_COLUMN] == "200"]
+    assert partner_rows["Province"].notna().all()
+    assert set(partner_rows["organisation"]) == {"CARE"}
+    assert sources[2].last_error is not None
+
+
+def test_merge_frames_keeps_one_row_per_form_and_id():
+    first = pd.DataFrame({SOURCE_COLUMN: ["100", "100", "200"], "_id": [2, 1, 1], "valeur": [1, 2, 3]})
+    resent = pd.DataFrame({SOURCE_COLUMN: ["100"], "_id": [2], "valeur": [9]})
+    merged = merge_frames([first, pd.DataFrame(), resent])
+    assert merged[[SOURCE_COLUMN, "_id", "valeur"]].values.tolist() == [["100", 1, 2], ["100", 2, 9], ["200", 1, 3]]
+
+
+def test_sync_dataset_returns_appended_submissions(kobo, form_source):
+    kobo.forms["100"] = make_records(50)
+    source, index = form_source("100"), DedupIndex()
+    df, appended, removed = sync_dataset(None, [source], index)
+    assert appended is None and removed is None  # Premier chargement : jeu entièrement construit
+
+    kobo.forms["100"] += make_records(7, start_id=51)
+    df, appended, removed = sync_dataset(df, [source], index)
+    assert len(df) == 57
+    assert sorted(appended["_id"]) == list(range(51, 58))
+    assert removed.empty
+
+    unchanged, appended, removed = sync_dataset(df, [source], index)
+    assert unchanged is df and appended.empty and removed.empty
+
+
+def test_resubmission_replaces_previous_version(kobo, form_source):
+    kobo.forms["100"] = make_records(50)
+    source, index = form_source("100"), DedupIndex()
+    df, _, _ = sync_dataset(None, [source], index)
+
+    # Même soumission renvoyée depuis le terrain : nouvel `_id`, même `_uuid`, compteur corrigé
+    resent = dict(kobo.forms["100"][9], _id=51, _submission_time="2025-01-01T00:00:00")
+    resent["CPN"] = {"CPN1": "4", "CPN4": "2"}
+    kobo.forms["100"].append(resent)
+    df, appended, removed = sync_dataset(df, [source], index)
+
+    assert len(df) == 50
+    assert removed["_id"].tolist() == [10]
+    assert appended["_id"].tolist() == [51]
+    row = df[df["_uuid"] == resent["_uuid"]]
+    assert row["_id"].tolist() == [51]
+    assert row["CPN/CPN1"].tolist() == [4]
+    assert df.attrs["doublons"]["_uuid"] == 1
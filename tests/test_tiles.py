@@ -0,0 +1,32 @@
+"""Grille HTML des tuiles d'indicateurs."""
+import html
+import re
+
+import pandas as pd
+
+from tuma.indicators import INDICATORS, section_rows
+from tuma.tiles import KPI_STYLESHEET, kpi_grid
+
+
+def test_kpi_grid_renders_one_block_per_section():
+    results = pd.Series({indicator.key: 12.4 for indicator in INDICATORS})
+    rows = section_rows(8)
+    grid = kpi_grid(8, results)
+
+    assert grid.startswith('<div class="tuma-kpi-grid">') and grid.endswith("</div>")
+    # Un seul bloc HTML pour le rendu Markdown : ni ligne vide ni indentation
+    assert "\n" not in grid
+    assert re.findall(r"--tuma-kpi-columns: (\d+)", grid) == [str(len(indicators)) for _, indicators in rows]
+    assert re.findall(r"<h3>(.*?)</h3>", grid) == [html.escape(title) for title, _ in rows]
+    assert grid.count('class="tuma-kpi"') == sum(len(indicators) for _, indicators in rows)
+    # Libellés échappés (« <15 ans »), valeurs formatées comme avant
+    assert "Feminin : &lt;15 ans" in grid and "<15" not in grid
+    assert "<div>12</div>" in grid
+
+
+def test_kpi_grid_formats_ratios_and_skips_untitled_rows():
+    results = pd.Series({indicator.key: 87.6 for indicator in INDICATORS})
+    grid = kpi_grid(1, results)
+    assert "<h3>" not in grid
+    assert "<div>88%</div>" in grid  # Taux d'achèvement
+    assert ".tuma-kpi-row" in KPI_STYLESHEET and "--tuma-kpi-columns" in KPI_STYLESHEET
@@ -0,0 +1,12 @@
+"""Couche de données du tableau de bord TUMA PLUS (sans dépendance Streamlit)."""
+import pandas as pd
+
+
+def enable_copy_on_write():
+    """Active le "copy-on-write" de pandas, à appeler au démarrage de chaque point d'entrée.
+
+    Le jeu de données est partagé en lecture seule (sessions du tableau de bord, moteur,
+    rapports) : une vue ou une sélection qui serait modifiée est copiée d'abord, jamais
+    le jeu partagé.
+    """
+    pd.set_option("mode.copy_on_write", True)
@@ -0,0 +1,120 @@
+"""Banc de performance : ingestion, filtrage, agrégations des sections 1 à 8 et figures.
+
+Chaque étape est mesurée séparément (temps réel et pic de mémoire Python via
+tracemalloc) sur des jeux synthétiques de taille croissante :
+
+    python -m tuma.bench --lignes 10000 100000 1000000 --json bench.json
+"""
+import argparse
+import gc
+import json
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import plotly.graph_objects as go
+
+from tuma import enable_copy_on_write
+from tuma.engine import DashboardEngine
+from tuma.indicators import SECTIONS, section_rows
+from tuma.partitions import sort_partitions
+from tuma.schema import apply_schema
+from tuma.snapshot import read_snapshot, write_snapshot
+from tuma.synthetic import generate_frame
+
+# Sélections représentatives de la barre latérale
+SELECTIONS = {
+    "aucun filtre": {},
+    "organisation": {"organisation": ["ADJ", "CARE"]},
+    "province": {"organisation": ["ADJ", "CARE"], "province": ["Sud-Kivu"]},
+    "aire + mois": {"organisation": ["CARE"], "province": ["Sud-Kivu"], "zone_sante": ["Uvira"],
+                    "aire_sante": ["Uvira 01", "Uvira 02"], "periode": [pd.Period("2023-06", freq="M")]},
+}
+
+
+class Benchmark:
+    def __init__(self):
+        self.results = []
+
+    @contextmanager
+    def stage(self, name, rows, **extra):
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.results.append({"etape": name, "lignes": rows, "secondes": elapsed,
+                                 "pic_memoire_mo": peak / 1024 / 1024, **extra})
+
+    def table(self):
+        return pd.DataFrame(self.results)
+
+
+def section_figure(results, section):
+    """Figure d'une section : une courbe mensuelle par indicateur."""
+    indicators = [i for _, row in section_rows(section) for i in row]
+    timeline = results.timeline([i.key for i in indicators])
+    fig = go.Figure()
+    for indicator in indicators:
+        fig.add_trace(go.Scatter(x=timeline["time"], y=timeline[indicator.key], name=indicator.label))
+    return fig.to_plotly_json()
+
+
+def run(rows, bench, workdir):
+    raw = generate_frame(rows)
+
+    with bench.stage("ingestion : typage", rows):
+        typed, _ = sort_partitions(apply_schema(raw))
+    del raw
+    path = Path(workdir) / f"instantane_{rows}.parquet"
+    with bench.stage("ingestion : écriture instantané", rows):
+        write_snapshot(typed, path)
+    del typed
+    with bench.stage("ingestion : lecture instantané", rows):
+        data = read_snapshot(path)
+    with bench.stage("ingestion : cube et index", rows):
+        engine = DashboardEngine(data, cache=None)
+
+    for name, selection in SELECTIONS.items():
+        with bench.stage(f"filtrage : {name}", rows):
+            selected = engine.filter_rows(**selection)
+        bench.results[-1]["lignes_retenues"] = len(selected)
+
+    with bench.stage("agrégation : tous les indicateurs", rows):
+        results = engine.compute(organisation=["ADJ", "CARE", "PARDE", "SARCAF"])
+    for section in SECTIONS:
+        with bench.stage(f"agrégation : section {section}", rows):
+            keys = [i.key for _, row in section_rows(section) for i in row]
+            results.totals[keys]
+            results.timeline(keys)
+        with bench.stage(f"figure : section {section}", rows):
+            section_figure(results, section)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lignes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--json", help="Fichier où enregistrer les mesures (suivi des régressions)")
+    args = parser.parse_args(argv)
+    enable_copy_on_write()
+
+    bench = Benchmark()
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.lignes:
+            run(rows, bench, workdir)
+    table = bench.table()
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(table.to_string(index=False, float_format="{:.4f}".format))
+    if args.json:
+        Path(args.json).write_text(json.dumps(bench.results, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Cache LRU des résultats, partagé par toutes les sessions du processus."""
+import hashlib
+import json
+import sys
+import threading
+from collections import OrderedDict
+
+from tuma import config
+from tuma.diagnostics import note_cache
+
+FILTER_NAMES = ("organisation", "province", "zone_sante", "aire_sante", "periode")
+
+
+def selection_key(version, selection):
+    """Empreinte canonique d'une sélection : l'ordre des valeurs choisies n'importe pas."""
+    canonical = {name: sorted(str(v) for v in (selection.get(name) or [])) for name in FILTER_NAMES}
+    payload = json.dumps([str(version), canonical], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _sizeof(value):
+    nbytes = getattr(value, "nbytes", None)
+    if nbytes is not None:
+        return int(nbytes)
+    memory_usage = getattr(value, "memory_usage", None)
+    if memory_usage is not None:
+        usage = memory_usage(deep=True)
+        return int(usage.sum() if hasattr(usage, "sum") else usage)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Résultats calculés (indicateurs, séries des graphiques) par version des données et sélection.
+
+    Les entrées les moins récemment utilisées sont évincées dès que la taille
+    totale dépasse `max_bytes`. Plusieurs versions peuvent coexister : pendant
+    l'échange de version, une session encore servie par l'ancien moteur n'efface
+    pas les résultats (précalculés) de la nouvelle. `retain` retire les entrées
+    des autres versions une fois la nouvelle publiée.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # clé -> (valeur, taille, version)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, version, selection):
+        key = selection_key(version, selection)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, version, selection, value):
+        key = selection_key(version, selection)
+        size = _sizeof(value)
+        with self._lock:
+            if size > self.max_bytes:
+                return value  # Trop volumineux pour le budget : non conservé
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size, str(version))
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def retain(self, version):
+        """Retire les entrées des versions autres que `version` (la version publiée)."""
+        version = str(version)
+        with self._lock:
+            stale = [key for key, (_, _, entry_version) in self._entries.items() if entry_version != version]
+            for key in stale:
+                self._bytes -= self._entries.pop(key)[1]
+            if stale:
+                self.invalidations += 1
+        return len(stale)
+
+    def get_or_compute(self, version, selection, compute):
+        """Valeur en cache pour (version, sélection), sinon `compute()` mis en cache."""
+        value = self.get(version, selection)
+        note_cache(value is not None)
+        if value is None:
+            value = self.put(version, selection, compute())
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+# Instance partagée par toutes les sessions Streamlit du processus
+result_cache = ResultCache(config.RESULT_CACHE_MB * 1024 * 1024)
@@ -0,0 +1,85 @@
+"""Données des graphiques : séries agrégées au pas de temps choisi, nombre de points borné.
+
+Les graphiques ne reçoivent jamais une ligne par soumission : les séries viennent
+des agrégations mensuelles du moteur d'indicateurs, regroupées au besoin par
+trimestre ou par année, et chaque trace est plafonnée à `config.CHART_MAX_POINTS`
+points (sous-échantillonnage LTTB). La taille envoyée au navigateur est ainsi
+bornée quel que soit le volume de données.
+"""
+import numpy as np
+
+from tuma import config
+from tuma.indicators import INDICATORS
+
+# Pas de temps proposés dans la barre latérale -> fréquence pandas
+BUCKETS = {"Mois": "M", "Trimestre": "Q", "Année": "Y"}
+
+_BY_KEY = {indicator.key: indicator for indicator in INDICATORS}
+
+
+def chart_timeline(results, keys, bucket="M"):
+    """Séries des indicateurs `keys` au pas `bucket` ("M", "Q" ou "Y") ; colonne "time" en texte.
+
+    Les taux sont recalculés à partir des sommes du pas de temps, pas moyennés.
+    """
+    keys = list(keys)
+    if bucket == "M":
+        return results.timeline(keys)
+    monthly = results.monthly
+    grouped = monthly.groupby(monthly.index.asfreq(bucket), sort=True).sum()
+    for key in keys:
+        indicator = _BY_KEY.get(key)
+        if indicator is not None and indicator.is_ratio:
+            numerator, denominator = grouped[indicator.ratio[0]], grouped[indicator.ratio[1]]
+            grouped[key] = (numerator / denominator.where(denominator > 0) * 100).fillna(0)
+    timeline = grouped[keys].reset_index(names="time")
+    timeline["time"] = timeline["time"].astype(str)
+    return timeline
+
+
+def lttb_indices(y, threshold):
+    """Positions des `threshold` points retenus par "Largest-Triangle-Three-Buckets".
+
+    Les points sont supposés régulièrement espacés (un par pas de temps) ; le premier
+    et le dernier sont toujours conservés.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    x = np.arange(n, dtype=float)
+    # threshold - 2 paquets pour les points intérieurs
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[edges[i + 1]:edges[i + 2]].mean()
+            next_y = y[edges[i + 1]:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        # Point du paquet formant le plus grand triangle avec le point retenu précédent
+        # et la moyenne du paquet suivant
+        area = np.abs((x[a] - next_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (next_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def cap_traces(fig, max_points=None):
+    """Réduit en place chaque trace de `fig` à `max_points` points au plus."""
+    max_points = max_points or config.CHART_MAX_POINTS
+    for trace in fig.data:
+        y = getattr(trace, "y", None)
+        if y is None or len(y) <= max_points:
+            continue
+        keep = lttb_indices(y, max_points)
+        updates = {"y": np.asarray(y)[keep]}
+        for name in ("x", "text", "hovertext", "customdata"):
+            value = getattr(trace, name, None)
+            if value is not None and not isinstance(value, str) and len(value) == len(y):
+                updates[name] = np.asarray(value)[keep]
+        trace.update(updates)
+    return fig
@@ -0,0 +1,63 @@
+"""Paramètres du tableau de bord, surchargeables par variables d'environnement."""
+import json
+import os
+from pathlib import Path
+
+# Serveur et formulaire Kobo du consortium
+KOBO_SERVER = os.environ.get("TUMA_KOBO_SERVER", "https://kc.humanitarianresponse.info")
+KOBO_FORM_ID = os.environ.get("TUMA_KOBO_FORM", "1560805")
+KOBO_TOKEN = os.environ.get("TUMA_KOBO_TOKEN")  # Facultatif : "Authorization: Token ..."
+
+# Formulaires sources, interrogés en parallèle et fusionnés en un seul jeu de données.
+# Liste JSON d'objets {"form": ..., "organisation": ..., "server": ..., "token": ...,
+# "timeout": ..., "columns": {ancien nom: nom attendu}} ; seul "form" est obligatoire.
+# Par défaut : le formulaire unique du consortium.
+KOBO_SOURCES = json.loads(os.environ.get("TUMA_KOBO_SOURCES") or "null") or [{"form": KOBO_FORM_ID}]
+
+# "incremental" : magasin local + récupération des seules nouvelles soumissions
+# "xlsx" : re-téléchargement complet de l'export à chaque chargement
+SYNC_MODE = os.environ.get("TUMA_SYNC_MODE", "incremental")
+
+# Dossier du magasin local des soumissions
+DATA_DIR = Path(os.environ.get("TUMA_DATA_DIR", Path(__file__).resolve().parent.parent / "donnees"))
+
+# Requêtes HTTP vers l'API Kobo
+PAGE_SIZE = int(os.environ.get("TUMA_PAGE_SIZE", "1000"))
+HTTP_TIMEOUT = float(os.environ.get("TUMA_HTTP_TIMEOUT", "60"))
+# Connexions conservées par serveur, partagées par les récupérations parallèles
+HTTP_POOL_SIZE = int(os.environ.get("TUMA_HTTP_POOL_SIZE", "8"))
+
+# Budget mémoire du cache des résultats partagé entre les sessions (Mo)
+RESULT_CACHE_MB = float(os.environ.get("TUMA_RESULT_CACHE_MB", "64"))
+
+# Mode diagnostic (temps, mémoire et cache par étape) : "1" pour toutes les sessions ;
+# "url" pour les seules sessions ouvertes avec "?diagnostic=1" (désactivé par défaut)
+DIAGNOSTICS = os.environ.get("TUMA_DIAGNOSTICS", "0") == "1"
+DIAGNOSTICS_URL = os.environ.get("TUMA_DIAGNOSTICS", "0") in ("1", "url")
+
+# Intervalle d'actualisation des données en arrière-plan (minutes ; 0 : sur demande uniquement)
+REFRESH_MINUTES = float(os.environ.get("TUMA_REFRESH_MINUTES", "15"))
+
+# Nombre maximal de points par trace envoyés au navigateur (au-delà : sous-échantillonnage LTTB)
+CHART_MAX_POINTS = int(os.environ.get("TUMA_CHART_MAX_POINTS", "500"))
+
+# Exports (téléchargements et `python -m tuma.export`) : lignes par morceau écrit,
+# dossier des fichiers temporaires (par défaut celui du système)
+EXPORT_CHUNK_ROWS = int(os.environ.get("TUMA_EXPORT_CHUNK_ROWS", "50000"))
+EXPORT_DIR = os.environ.get("TUMA_EXPORT_DIR")
+# Exports préparés dans le tableau de bord (gardés en mémoire pour le téléchargement) :
+# au-delà, l'export passe par la ligne de commande `python -m tuma.export`
+EXPORT_MAX_ROWS = int(os.environ.get("TUMA_EXPORT_MAX_ROWS", "200000"))
+EXPORT_XLSX_MAX_ROWS = int(os.environ.get("TUMA_EXPORT_XLSX_MAX_ROWS", "50000"))
+
+# Fichier des cibles (CSV ou XLSX) des indicateurs de progrès, relu à chaque actualisation
+TARGETS_PATH = Path(os.environ.get("TUMA_TARGETS", DATA_DIR / "cibles.csv"))
+
+# Processus du précalcul des résultats par organisation × province/zone après chaque actualisation
+# (par défaut : un par cœur ; 0 : pas de précalcul)
+PRECOMPUTE_PROCESSES = int(os.environ.get("TUMA_PRECOMPUTE_PROCESSES", os.cpu_count() or 1))
+
+# Clé naturelle d'une soumission pour la déduplication (liste JSON de colonnes ; "Période" : mois
+# de rapportage). Deux soumissions de même clé complète : seule la plus récente est conservée.
+# `[]` : déduplication sur `_uuid` uniquement
+DEDUP_KEY = json.loads(os.environ.get("TUMA_DEDUP_KEY") or '["organisation", "Aire_sante", "Période", "Nom_group"]')
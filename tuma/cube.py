@@ -0,0 +1,75 @@
+"""Cube mensuel pré-agrégé des indicateurs, construit une fois par actualisation des données."""
+import pandas as pd
+
+from tuma.schema import LABEL_COLUMNS, PERIOD_COLUMN, counter_columns, reporting_period
+
+CUBE_KEYS = LABEL_COLUMNS + [PERIOD_COLUMN]
+
+# Mesures dérivées qui ne sont pas de simples sommes de compteurs
+GROUP_COUNT = "Nom_group (nombre)"
+STATUT_CODES = {1: "Statut_group (1)", 2: "Statut_group (2)", 3: "Statut_group (3)", 4: "Statut_group (4)"}
+
+
+def build_cube(df):
+    """Somme de tous les compteurs par organisation × Province × Zone × Aire × mois.
+
+    Les lignes sans géographie ou sans date sont conservées (clé manquante) afin
+    que les totaux du cube restent égaux aux sommes sur les soumissions brutes.
+    `df` est le jeu typé à l'ingestion (`apply_schema`) : aucune conversion ici.
+    """
+    measures = pd.DataFrame(index=df.index)
+    for column in counter_columns(df.columns):
+        measures[column] = df[column]
+    if "Nom_group" in df.columns:
+        measures[GROUP_COUNT] = df["Nom_group"].notna().astype("int64")
+    if "Statut_group" in df.columns:
+        for code, name in STATUT_CODES.items():
+            measures[name] = (df["Statut_group"] == code).astype("int64")
+
+    keys = [df[c] for c in LABEL_COLUMNS if c in df.columns]
+    keys.append(reporting_period(df))
+    # Compteurs en entiers compacts : la somme est faite en 64 bits, puis le cube (petit)
+    # passe en float64 pour le produit matriciel des indicateurs
+    cube = measures.groupby(keys, observed=True, dropna=False, sort=False).sum(min_count=0)
+    return cube.astype("float64").reset_index()
+
+
+def merge_cubes(cube, delta):
+    """Cube de la réunion de deux jeux de soumissions : cellules de même clé additionnées.
+
+    `delta` est le cube (petit) des soumissions ajoutées : l'historique n'est pas reparcouru.
+    """
+    keys = [c for c in CUBE_KEYS if c in cube.columns or c in delta.columns]
+    merged = pd.concat([cube, delta], ignore_index=True)
+    measures = [c for c in merged.columns if c not in keys]
+    merged[measures] = merged[measures].fillna(0)
+    merged = merged.groupby(keys, observed=True, dropna=False, sort=False)[measures].sum().reset_index()
+    for column in LABEL_COLUMNS:
+        if column in merged.columns:
+            merged[column] = merged[column].astype("category")
+    return merged
+
+
+def subtract_cube(cube):
+    """Cube de signe opposé : une fois fusionné (`merge_cubes`), retire les soumissions de `cube`."""
+    keys = [c for c in CUBE_KEYS if c in cube.columns]
+    negated = cube.copy()
+    measures = [c for c in cube.columns if c not in keys]
+    negated[measures] = -negated[measures]
+    return negated
+
+
+def slice_cube(cube, organisation=None, province=None, zone_sante=None, aire_sante=None, periode=None):
+    """Cellules du cube correspondant à la sélection (liste vide ou None : pas de filtre)."""
+    mask = pd.Series(True, index=cube.index)
+    for column, values in (
+        ("organisation", organisation),
+        ("Province", province),
+        ("Zone_sante", zone_sante),
+        ("Aire_sante", aire_sante),
+        (PERIOD_COLUMN, periode),
+    ):
+        if values:
+            mask &= cube[column].isin(values)
+    return cube[mask]
+
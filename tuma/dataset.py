@@ -0,0 +1,82 @@
+"""Synchronisation du jeu de données avec les sources et écriture de l'instantané local.
+
+Le tableau de bord ne l'appelle que par `tuma.refresh.BackgroundRefresher`, seul
+responsable de l'actualisation des données.
+"""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tuma import config
+from tuma.dedup import DedupIndex, add_counts
+from tuma.partitions import sort_partitions
+from tuma.snapshot import write_snapshot
+from tuma.sources import configured_sources, merge_frames, read_xlsx_sources, sync_sources
+
+
+def snapshot_path(directory=None):
+    return Path(directory or config.DATA_DIR) / "snapshot.parquet"
+
+
+def sync_dataset(current=None, sources=None, index=None):
+    """Interroge les formulaires sources ; renvoie (jeu typé, soumissions ajoutées, soumissions retirées).
+
+    Les formulaires sont interrogés en parallèle. En mode incrémental, seules les
+    nouvelles soumissions sont cherchées dans l'index de déduplication `index`
+    (`DedupIndex`, tenu à jour d'une actualisation à l'autre) puis ajoutées à
+    `current`, dont sont retirées les versions qu'elles remplacent ; l'instantané
+    est réécrit si quelque chose a changé. Les soumissions ajoutées (typées) sont
+    vides si rien n'a changé ; ajoutées et retirées sont None si le jeu a été
+    entièrement reconstruit (premier chargement ou mode "xlsx").
+    """
+    sources = sources or configured_sources()
+    index = DedupIndex() if index is None else index
+    appended = removed = None
+    if config.SYNC_MODE == "incremental":
+        stored = {source: source.store.state()["last_id"] is not None for source in sources}
+        synced = sync_sources(sources)
+        fetched = [frame for frame in synced.values() if not frame.empty]
+        if current is not None and not fetched:
+            return current, pd.DataFrame(), pd.DataFrame()
+        if current is None:
+            # Magasin vide avant la synchronisation : les soumissions récupérées (déjà typées)
+            # sont tout le formulaire, inutile de relire le magasin
+            frames = [source.load_frame() if stored[source] or source not in synced else synced[source]
+                      for source in sources]
+        else:
+            frames = None
+    else:
+        frames = list(read_xlsx_sources(sources).values())
+    if frames is None:
+        duplicates = current.attrs.get("doublons")
+        if index.version is None or index.version != current.attrs.get("version"):
+            # Index d'une autre version (démarrage depuis l'instantané) : reconstruit une fois
+            current, collapsed = index.reset(current)
+            duplicates = add_counts(duplicates, collapsed)
+            incremental = not any(collapsed.values())
+        else:
+            incremental = True
+        first_label = index.next_label
+        new, positions, counts = index.add(merge_frames(fetched))
+        kept = current.drop(index=current.index[positions]) if len(positions) else current
+        df = pd.concat([kept, new], ignore_index=True)
+        duplicates = add_counts(duplicates, counts)
+    else:
+        df, duplicates = index.reset(merge_frames(frames))
+    # Rangement par partition (organisation × mois) ; `current` l'est déjà : tri quasi linéaire
+    df, order = sort_partitions(df)
+    index.reorder(order)
+    state = {source.form_id: source.store.state() for source in sources}
+    df = write_snapshot(df, snapshot_path(), source_state=state, duplicates=duplicates)
+    index.version = df.attrs["version"]
+    if frames is None and incremental:
+        appended, removed = df.take(np.flatnonzero(index.labels >= first_label)), current.take(positions)
+    return df, appended, removed
+
+
+def refresh_dataset(current=None, sources=None, index=None):
+    """Comme `sync_dataset`, mais renvoie (jeu de données typé, a changé ?)."""
+    df, appended, _ = sync_dataset(current, sources, index)
+    return df, appended is None or not appended.empty
+
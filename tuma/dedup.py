@@ -0,0 +1,168 @@
+"""Déduplication des soumissions renvoyées : index de hachage des clés de soumission.
+
+Une même soumission peut revenir plusieurs fois (renvoi depuis le terrain, correction,
+nouvelle saisie du même rapport). Elle est reconnue par l'une de ses clés : (`_form`,
+`_id`), `_uuid` ou la clé naturelle `config.DEDUP_KEY` (organisation, aire de santé,
+mois de rapportage, groupe). Seule la version reçue en dernier est conservée.
+
+`DedupIndex` garde, pour chaque clé, un dictionnaire empreinte -> ligne : à chaque
+actualisation, les nouvelles soumissions y sont cherchées une à une (O(1) chacune)
+au lieu de redédupliquer tout l'historique. Une clé incomplète (valeur manquante,
+par exemple pas de groupe) ne regroupe jamais deux soumissions.
+"""
+import numpy as np
+import pandas as pd
+
+from tuma import config
+from tuma.schema import PERIOD_COLUMN, TIME_COLUMN
+from tuma.sources import KEY_COLUMNS
+
+
+def dedup_keys(natural=None):
+    """Clés de déduplication : nom -> colonnes (la clé naturelle est omise si elle est vide)."""
+    natural = config.DEDUP_KEY if natural is None else natural
+    keys = {"_id": list(KEY_COLUMNS), "_uuid": ["_uuid"], "clé naturelle": list(natural)}
+    return {name: columns for name, columns in keys.items() if columns}
+
+
+def _column(df, column):
+    # Valeurs dans une forme indépendante du typage (jeu typé ou soumissions brutes)
+    if column == PERIOD_COLUMN and column not in df.columns:
+        times = df[TIME_COLUMN]
+        if not pd.api.types.is_datetime64_any_dtype(times):
+            times = pd.to_datetime(times, errors="coerce")
+        return times.dt.year * 12 + times.dt.month - 1
+    values = df[column]
+    if pd.api.types.is_numeric_dtype(values.dtype) and not isinstance(values.dtype, pd.CategoricalDtype):
+        # Même empreinte pour 12 (entier) et 12.0 (flottant, colonne avec manquants)
+        return values.astype("float64")
+    return values  # Texte : même empreinte en object, chaîne Arrow ou catégorie
+
+
+def fingerprints(df, columns):
+    """(empreintes 64 bits, masque des clés complètes) de `df`, ou None si une colonne manque."""
+    available = set(df.columns) | ({PERIOD_COLUMN} if TIME_COLUMN in df.columns else set())
+    if not set(columns) <= available:
+        return None
+    hashes = np.zeros(len(df), dtype=np.uint64)
+    complete = np.ones(len(df), dtype=bool)
+    with np.errstate(over="ignore"):
+        for column in columns:
+            values = _column(df, column)
+            complete &= values.notna().to_numpy()
+            part = pd.util.hash_pandas_object(values, index=False, categorize=False).to_numpy()
+            hashes = hashes * np.uint64(1_000_003) ^ part
+    return hashes, complete
+
+
+def _arrival_order(df):
+    # Ordre de réception : `_submission_time`, puis l'ordre des lignes (concaténation) à égalité
+    if "_submission_time" not in df.columns:
+        return np.arange(len(df))
+    received = pd.to_datetime(df["_submission_time"], errors="coerce", utc=True).reset_index(drop=True)
+    return received.sort_values(kind="stable", na_position="first").index.to_numpy()
+
+
+def _collapse(df, keys):
+    # Dédoublonnage vectorisé ; renvoie aussi les empreintes des lignes conservées
+    counts = dict.fromkeys(keys, 0)
+    found = {name: fingerprints(df, columns) for name, columns in keys.items()}
+    found = {name: value for name, value in found.items() if value is not None}
+    if df.empty:
+        return df, counts, found
+    order = _arrival_order(df)
+    keep = np.ones(len(df), dtype=bool)
+    for name, (hashes, complete) in found.items():
+        candidates = order[keep[order] & complete[order]]
+        superseded = candidates[pd.Series(hashes[candidates]).duplicated(keep="last").to_numpy()]
+        keep[superseded] = False
+        counts[name] = len(superseded)
+    if keep.all():
+        return df, counts, found
+    found = {name: (hashes[keep], complete[keep]) for name, (hashes, complete) in found.items()}
+    return df[keep].reset_index(drop=True), counts, found
+
+
+def collapse(df, keys=None):
+    """Soumissions de `df` sans doublon (version reçue en dernier) et nombre de doublons par clé.
+
+    L'ordre des lignes conservées est celui de `df` ; traitement vectorisé (jeu complet).
+    """
+    df, counts, _ = _collapse(df, dedup_keys() if keys is None else keys)
+    return df, counts
+
+
+class DedupIndex:
+    """Index de hachage des soumissions d'une version des données.
+
+    `labels` donne l'étiquette (entier, jamais réutilisé) de chaque ligne du jeu, dans
+    l'ordre des lignes : les lignes remplacées sont retrouvées par recherche dichotomique.
+    """
+
+    def __init__(self, keys=None):
+        self.keys = dedup_keys() if keys is None else keys
+        self.version = None
+        self.labels = np.empty(0, dtype=np.int64)
+        self._seen = {name: {} for name in self.keys}  # clé -> {empreinte: étiquette}
+        self._removed = set()  # Étiquettes remplacées (entrées périmées des autres clés)
+        self._next = 0
+
+    @property
+    def next_label(self):
+        """Étiquette de la prochaine soumission ajoutée (les suivantes sont plus grandes)."""
+        return self._next
+
+    def _register(self, found, labels):
+        """Enregistre des lignes (empreintes `found`) ; renvoie les étiquettes qu'elles remplacent."""
+        superseded = {}
+        for name, (hashes, complete) in found.items():
+            seen = self._seen[name]
+            for fingerprint, label in zip(hashes[complete].tolist(), labels[complete].tolist()):
+                previous = seen.get(fingerprint)
+                if previous is not None and previous not in self._removed and previous not in superseded:
+                    superseded[previous] = name
+                seen[fingerprint] = label
+            self._removed.update(superseded)
+        return superseded
+
+    def reset(self, df):
+        """Déduplique le jeu complet `df` et reconstruit l'index ; renvoie (jeu, doublons par clé)."""
+        df, counts, found = _collapse(df, self.keys)
+        self.__init__(self.keys)
+        self.labels = np.arange(len(df), dtype=np.int64)
+        self._next = len(df)
+        self._register(found, self.labels)
+        return df, counts
+
+    def add(self, new):
+        """Ajoute les soumissions `new` (reçues après le jeu indexé).
+
+        Renvoie (soumissions ajoutées dédupliquées, positions triées des lignes du jeu
+        indexé qu'elles remplacent, doublons par clé).
+        """
+        new, counts, found = _collapse(new, self.keys)
+        labels = np.arange(self._next, self._next + len(new), dtype=np.int64)
+        self._next += len(new)
+        superseded = self._register(found, labels)
+        for name in superseded.values():
+            counts[name] += 1
+        positions = np.empty(0, dtype=np.int64)
+        if superseded:
+            sorter = np.argsort(self.labels, kind="stable")
+            found = np.searchsorted(self.labels, np.fromiter(superseded, np.int64, len(superseded)), sorter=sorter)
+            positions = np.sort(sorter[found])
+        self.labels = np.concatenate([np.delete(self.labels, positions), labels])
+        return new, positions, counts
+
+    def reorder(self, order):
+        """Suit un réordonnancement des lignes du jeu (`order` : positions d'origine)."""
+        self.labels = self.labels[order]
+
+
+def add_counts(*counts):
+    """Somme de comptes de doublons par clé."""
+    total = {}
+    for count in counts:
+        for name, value in (count or {}).items():
+            total[name] = total.get(name, 0) + value
+    return total
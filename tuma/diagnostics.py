@@ -0,0 +1,120 @@
+"""Mesures par étape (temps, lignes, mémoire, cache) pour le mode diagnostic.
+
+Chaque étape mesurée produit une ligne de journal JSON sur le logger
+"tuma.diagnostics", afin d'agréger les p50/p95 entre sessions, et alimente
+des statistiques en mémoire pour le panneau de la barre latérale.
+"""
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+logger = logging.getLogger("tuma.diagnostics")
+
+# Durées récentes par étape, toutes sessions confondues
+_history = defaultdict(lambda: deque(maxlen=500))
+_history_lock = threading.Lock()
+# Étape en cours dans le fil d'exécution (une session Streamlit = un fil)
+_local = threading.local()
+# Étapes mesurées en cours, toutes sessions confondues : le suivi des allocations
+# (tracemalloc) n'est actif que pendant qu'il y en a au moins une
+_tracing_count = 0
+_tracing_owner = False  # tracemalloc démarré par ces mesures (et donc à arrêter par elles)
+_tracing_lock = threading.Lock()
+_logger_lock = threading.Lock()
+
+
+@contextmanager
+def _tracing():
+    """Active tracemalloc pendant le bloc, sauf s'il l'était déjà ; rétablit ensuite l'état précédent."""
+    global _tracing_count, _tracing_owner
+    with _tracing_lock:
+        if _tracing_count == 0:
+            _tracing_owner = not tracemalloc.is_tracing()
+            if _tracing_owner:
+                tracemalloc.start()
+        _tracing_count += 1
+    try:
+        yield
+    finally:
+        with _tracing_lock:
+            _tracing_count -= 1
+            if _tracing_count == 0 and _tracing_owner:
+                tracemalloc.stop()
+                _tracing_owner = False
+
+
+def _configure_logger():
+    """Rend les lignes INFO de `logger` visibles, que la journalisation racine soit configurée ou non."""
+    with _logger_lock:
+        # Niveau choisi par l'exploitant conservé ; sinon le niveau hérité (WARNING) les écarterait
+        if logger.level == logging.NOTSET:
+            logger.setLevel(logging.INFO)
+        if not logger.hasHandlers():
+            # Aucun gestionnaire configuré : lignes JSON brutes sur la sortie d'erreur, une par étape
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+
+
+def note_cache(hit):
+    """Signale un accès au cache des résultats à l'étape en cours, s'il y en a une."""
+    stack = getattr(_local, "stack", None)
+    if stack:
+        stack[-1]["cache"] = "hit" if hit else "miss"
+
+
+class Diagnostics:
+    """Enregistreur d'étapes d'une exécution ; inactif (et sans coût) si `enabled` est faux."""
+
+    def __init__(self, enabled, session=None, version=None):
+        self.enabled = enabled
+        self.session = session
+        self.version = version
+        self.records = []
+        if enabled:
+            _configure_logger()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        if not self.enabled:
+            yield
+            return
+        stack = _local.__dict__.setdefault("stack", [])
+        if stack:
+            name = f"{stack[-1]['stage']} / {name}"
+        record = {"stage": name, "rows": rows, "cache": None}
+        stack.append(record)
+        self.records.append(record)
+        try:
+            with _tracing():
+                memory_start = tracemalloc.get_traced_memory()[0]
+                start = time.perf_counter()
+                try:
+                    yield record
+                finally:
+                    record["ms"] = round((time.perf_counter() - start) * 1000, 3)
+                    # Mémoire nette allouée pendant l'étape ; approximative si plusieurs sessions tournent en même temps
+                    record["mem_kb"] = round((tracemalloc.get_traced_memory()[0] - memory_start) / 1024, 1)
+        finally:
+            stack.pop()
+            with _history_lock:
+                _history[name].append(record["ms"])
+            logger.info(json.dumps({"event": "stage", "session": self.session,
+                                    "version": self.version, **record}, ensure_ascii=False, default=str))
+
+    def summary(self):
+        """Étapes de l'exécution courante, avec p50/p95 de chaque étape sur les exécutions récentes."""
+        with _history_lock:
+            percentiles = {name: (np.percentile(values, 50), np.percentile(values, 95), len(values))
+                           for name, values in _history.items()}
+        rows = []
+        for record in self.records:
+            p50, p95, count = percentiles.get(record["stage"], (None, None, 0))
+            rows.append({**record, "p50_ms": p50, "p95_ms": p95, "mesures": count})
+        return rows
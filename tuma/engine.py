@@ -0,0 +1,115 @@
+"""Moteur de calcul du tableau de bord, utilisable sans Streamlit (rapports, tests, scripts)."""
+import threading
+from collections import OrderedDict
+
+from tuma.cache import result_cache, selection_key
+from tuma.cube import build_cube, merge_cubes, slice_cube, subtract_cube
+from tuma.dataset import snapshot_path
+from tuma.filters import FilterIndex, RowSelection
+from tuma.geography import GeographyIndex
+from tuma.indicators import IndicatorEngine
+from tuma.progress import compute_progress, load_targets, select_progress
+from tuma.quality import quality_path, read_quality, validate
+from tuma.schema import reporting_period
+from tuma.timeseries import TimeSeries
+
+# Séries dérivées conservées (et prolongées à chaque actualisation) : les sélections les plus récentes
+MAX_SERIES = 256
+
+
+class DashboardEngine:
+    """Structures dérivées d'une version des données : cube, index, indicateurs et atteinte des cibles.
+
+    Les paramètres de sélection sont ceux des filtres de la barre latérale :
+    `organisation`, `province`, `zone_sante`, `aire_sante` et `periode`
+    (listes de valeurs ; liste vide ou None : pas de filtre).
+    """
+
+    def __init__(self, data, cache=result_cache, cube=None):
+        # Jeu typé à l'ingestion, partagé en lecture seule par toutes les sessions
+        self.data = data
+        self.version = data.attrs.get("version")
+        self.cube = build_cube(data) if cube is None else cube
+        self.filter_index = FilterIndex(data)
+        self.geography = GeographyIndex(data)
+        self.indicators = IndicatorEngine()
+        self.cache = cache
+        # Atteinte des cibles pour tous les lieux, calculée une fois par version
+        self.progress = compute_progress(self.cube, load_targets(), self.indicators)
+        # Contrôle de qualité : rapport enregistré avec l'instantané de cette version, sinon évalué ici
+        self.quality = read_quality(quality_path(snapshot_path()), self.version) or validate(data)
+        # Mois de rapportage présents, dans l'ordre chronologique (options du filtre "Période")
+        self.periods = reporting_period(data).dropna().drop_duplicates().sort_values().array
+        self._series = OrderedDict()  # clé de sélection -> (sélection, TimeSeries)
+        self._series_lock = threading.Lock()
+
+    def extend(self, data, appended, removed=None):
+        """Moteur de la version `data` : données courantes plus `appended`, moins `removed`.
+
+        `removed` : soumissions remplacées par une version plus récente (doublons). Le cube
+        et les séries dérivées déjà calculées sont mis à jour à partir de ces seules
+        soumissions. Si `data` ne correspond pas à ces changements, reconstruction complète.
+        """
+        removed = removed if removed is not None else appended.iloc[:0]
+        if len(data) != len(self.data) + len(appended) - len(removed):
+            return type(self)(data, cache=self.cache)
+        delta = build_cube(appended)
+        if len(removed):
+            delta = merge_cubes(delta, subtract_cube(build_cube(removed)))
+        engine = type(self)(data, cache=self.cache, cube=merge_cubes(self.cube, delta))
+        with self._series_lock:
+            series = list(self._series.items())
+        for key, (selection, timeseries) in series:
+            added = self.indicators.monthly_sums(slice_cube(delta, **selection))
+            engine._series[key] = (selection, timeseries.extend(added))
+        return engine
+
+    def filter_rows(self, **selection):
+        """Soumissions retenues par la sélection (`RowSelection` : positions, sans copie)."""
+        return RowSelection(self.data, self.filter_index.select(**selection))
+
+    def _canonical(self, selection):
+        # Filtre de province impliqué par celui des zones : retiré, pour que la sélection
+        # "province puis zone" partage l'entrée de cache (précalculée) de la zone seule
+        province, zones = selection.get("province"), selection.get("zone_sante")
+        if province and zones and self.geography.zone_provinces(zones) <= set(province):
+            selection = {**selection, "province": None}
+        return selection
+
+    def compute(self, **selection):
+        """Indicateurs (totaux et séries mensuelles) pour la sélection, via le cache partagé."""
+        selection = self._canonical(selection)
+
+        def compute():
+            return self.indicators.compute(slice_cube(self.cube, **selection))
+
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(self.version, selection, compute)
+
+    def progress_for(self, organisation=None, province=None, zone_sante=None, aire_sante=None, periode=None):
+        """Cibles des organisations et des lieux de la sélection (réalisé cumulé : `periode` est ignorée)."""
+        # Zones choisies sans province : cibles des provinces et des aires de ces zones seulement
+        places = {
+            "province": province or (list(self.geography.zone_provinces(zone_sante)) if zone_sante else None),
+            "zone": zone_sante or (list(self.geography.zones(province)) if province else None),
+            "aire": aire_sante or (list(self.geography.aires(province, zone_sante))
+                                   if province or zone_sante else None),
+        }
+        return select_progress(self.progress, organisation, places)
+
+    def trends(self, organisation=None, province=None, zone_sante=None, aire_sante=None, periode=None):
+        """Séries dérivées (`TimeSeries`) de la sélection sur tout l'historique ; `periode` est ignorée."""
+        selection = dict(organisation=organisation, province=province, zone_sante=zone_sante,
+                         aire_sante=aire_sante)
+        key = selection_key(None, selection)
+        with self._series_lock:
+            if key in self._series:
+                self._series.move_to_end(key)
+                return self._series[key][1]
+        series = TimeSeries(self.indicators, self.indicators.monthly_sums(slice_cube(self.cube, **selection)))
+        with self._series_lock:
+            self._series[key] = (selection, series)
+            while len(self._series) > MAX_SERIES:
+                self._series.popitem(last=False)
+        return series
@@ -0,0 +1,187 @@
+"""Export des soumissions filtrées et des tableaux d'indicateurs (CSV, Parquet, XLSX), par morceaux.
+
+Les lignes retenues sont écrites morceau par morceau à partir des positions de la
+sélection : le jeu filtré n'est jamais copié en entier en mémoire. Exemple :
+
+    python -m tuma.export --organisation CARE --province Sud-Kivu --format parquet --sortie exports/
+"""
+import argparse
+import math
+import shlex
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook
+
+from tuma import config, enable_copy_on_write
+from tuma.dataset import refresh_dataset, snapshot_path
+from tuma.engine import DashboardEngine
+from tuma.indicators import INDICATORS, SECTIONS, section_rows, visible_sections
+from tuma.schema import arrow_schema
+from tuma.snapshot import read_snapshot
+
+FORMATS = ("csv", "parquet", "xlsx")
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+# Une feuille Excel est limitée à 1 048 576 lignes, en-tête compris
+XLSX_MAX_ROWS = 1_048_575
+
+
+def iter_chunks(selection, chunk_rows=None):
+    """Morceaux successifs des lignes d'une `RowSelection` (au plus `chunk_rows` lignes chacun)."""
+    chunk_rows = chunk_rows or config.EXPORT_CHUNK_ROWS
+    data, rows = selection.data, selection.rows
+    if not len(selection):
+        yield data.iloc[:0]
+    for start in range(0, len(selection), chunk_rows):
+        if rows is None:
+            yield data.iloc[start:start + chunk_rows]
+        else:
+            yield data.take(rows[start:start + chunk_rows])
+
+
+def _cell(value):
+    # openpyxl n'accepte ni pd.NA ni NaN/NaT : cellule vide
+    if value is pd.NA or value is pd.NaT or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return value
+
+
+def write_frames(chunks, fmt, target, sheet="Données"):
+    """Écrit des morceaux de même schéma dans `target` (chemin ou fichier binaire ouvert)."""
+    if fmt == "csv":
+        handle = open(target, "wb") if isinstance(target, (str, Path)) else target
+        try:
+            for n, chunk in enumerate(chunks):
+                # BOM en tête de fichier : Excel reconnaît alors l'UTF-8 (accents)
+                text = chunk.to_csv(index=False, header=n == 0)
+                handle.write(text.encode("utf-8-sig" if n == 0 else "utf-8"))
+        finally:
+            if handle is not target:
+                handle.close()
+    elif fmt == "parquet":
+        writer = None
+        try:
+            for chunk in chunks:
+                if writer is None:
+                    schema = arrow_schema(chunk)
+                    writer = pq.ParquetWriter(target, schema)
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        finally:
+            # Fermé même si un morceau échoue : pas de descripteur ni de fichier à moitié ouvert
+            if writer is not None:
+                writer.close()
+    elif fmt == "xlsx":
+        # Mode "écriture seule" d'openpyxl : les lignes partent sur disque au fil de l'eau
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(sheet)
+        written = 0
+        for n, chunk in enumerate(chunks):
+            if n == 0:
+                worksheet.append([str(c) for c in chunk.columns])
+            written += len(chunk)
+            if written > XLSX_MAX_ROWS:
+                raise ValueError(f"Plus de {XLSX_MAX_ROWS} lignes : utilisez l'export CSV ou Parquet")
+            for row in chunk.itertuples(index=False, name=None):
+                worksheet.append([_cell(v) for v in row])
+        workbook.save(target)
+    else:
+        raise ValueError(f"Format d'export inconnu : {fmt}")
+
+
+def write_rows(selection, fmt, target, chunk_rows=None):
+    """Soumissions retenues par la sélection, écrites morceau par morceau."""
+    write_frames(iter_chunks(selection, chunk_rows), fmt, target, sheet="Soumissions")
+
+
+def indicator_table(results, sections):
+    """Tableau long des indicateurs : une ligne par indicateur et par mois, plus une ligne "Total"."""
+    by_key = {i.key: i for i in INDICATORS}
+    keys = [i.key for n in sections for _, row in section_rows(n) for i in row]
+    monthly = results.timeline(keys).melt(id_vars="time", var_name="cle", value_name="Valeur")
+    monthly = monthly.rename(columns={"time": "Mois"})
+    totals = pd.DataFrame({"Mois": "Total", "cle": keys, "Valeur": [results[k] for k in keys]})
+    table = pd.concat([totals, monthly], ignore_index=True)
+    table.insert(0, "Section", [SECTIONS[by_key[k].section].title for k in table["cle"]])
+    table.insert(1, "Indicateur", [by_key[k].label for k in table["cle"]])
+    return table.drop(columns="cle")
+
+
+def write_indicators(results, sections, fmt, target):
+    """Tableau des indicateurs des sections demandées (petit : écrit en une fois)."""
+    write_frames([indicator_table(results, sections)], fmt, target, sheet="Indicateurs")
+
+
+def dashboard_row_limit(fmt):
+    """Nombre maximal de soumissions d'un export préparé dans le tableau de bord au format `fmt`.
+
+    Le fichier téléchargé y est gardé en mémoire et l'écriture XLSX (ligne par ligne,
+    en Python) occupe le serveur : les exports plus grands passent par `cli_command`.
+    """
+    limit = config.EXPORT_MAX_ROWS
+    return min(limit, config.EXPORT_XLSX_MAX_ROWS) if fmt == "xlsx" else limit
+
+
+def cli_command(fmt, organisation=None, province=None, zone_sante=None, aire_sante=None, periode=None):
+    """Commande `python -m tuma.export` équivalente à une sélection du tableau de bord."""
+    parts = ["python", "-m", "tuma.export"]
+    for option, values in (("--organisation", organisation), ("--province", province),
+                           ("--zone", zone_sante), ("--aire", aire_sante), ("--periode", periode)):
+        if values:
+            parts += [option, *(shlex.quote(str(v)) for v in values)]
+    return " ".join(parts + ["--format", fmt, "--hors-ligne", "--sortie", "exports/"])
+
+
+def export_bytes(write, *args):
+    """Contenu du fichier produit par `write(*args, fichier)`, écrit d'abord sur disque par morceaux.
+
+    Réservé aux petits fichiers (voir `dashboard_row_limit`) : le contenu est rendu en mémoire.
+    """
+    with tempfile.TemporaryFile(dir=config.EXPORT_DIR) as handle:
+        write(*args, handle)
+        handle.seek(0)
+        return handle.read()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--organisation", nargs="+", default=[])
+    parser.add_argument("--province", nargs="+", default=[])
+    parser.add_argument("--zone", nargs="+", default=[])
+    parser.add_argument("--aire", nargs="+", default=[])
+    parser.add_argument("--periode", nargs="+", default=[], help="Mois de rapportage (AAAA-MM)")
+    parser.add_argument("--format", default="csv", choices=FORMATS)
+    parser.add_argument("--sortie", default="exports", help="Dossier des fichiers exportés")
+    parser.add_argument("--hors-ligne", action="store_true", help="Utiliser l'instantané local sans interroger Kobo")
+    args = parser.parse_args(argv)
+    enable_copy_on_write()
+
+    # Hors ligne : seules les partitions des organisations et des mois demandés sont lues
+    path = snapshot_path()
+    data = read_snapshot(path, organisation=args.organisation, periode=args.periode) if args.hors_ligne else None
+    if data is None:
+        data, _ = refresh_dataset(None if args.hors_ligne else read_snapshot(path))
+    engine = DashboardEngine(data, cache=None)
+    selection = dict(organisation=args.organisation, province=args.province, zone_sante=args.zone,
+                     aire_sante=args.aire, periode=[pd.Period(p, freq="M") for p in args.periode])
+    output_dir = Path(args.sortie)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    rows = engine.filter_rows(**selection)
+    path = output_dir / f"soumissions.{args.format}"
+    write_rows(rows, args.format, path)
+    print(f"{path} ({len(rows)} soumissions)")
+    sections = visible_sections(args.organisation) if args.organisation else list(SECTIONS)
+    path = output_dir / f"indicateurs.{args.format}"
+    write_indicators(engine.compute(**selection), sections, args.format, path)
+    print(path)
+
+
+if __name__ == "__main__":
+    main()
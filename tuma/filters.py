@@ -0,0 +1,125 @@
+"""Moteur de filtrage indexé : codes catégoriels et listes de lignes par valeur."""
+import numpy as np
+import pandas as pd
+
+from tuma.partitions import PARTITION_COLUMNS
+from tuma.schema import LABEL_COLUMNS, PERIOD_COLUMN, reporting_period
+
+FILTER_COLUMNS = LABEL_COLUMNS + [PERIOD_COLUMN]
+
+
+class FilterIndex:
+    """Index construit une fois par version des données.
+
+    Pour chaque colonne filtrable, les lignes sont triées par code catégoriel :
+    les positions des lignes portant une valeur donnée forment une tranche
+    contiguë de `_order`, délimitée par `_bounds`. Un filtre ne parcourt donc
+    que les lignes sélectionnées, jamais le tableau entier.
+
+    Si le jeu est rangé par partition organisation × mois (`sort_partitions`), les
+    filtres sur l'organisation et la période retiennent directement des plages de
+    lignes contiguës : seules les partitions concernées sont parcourues.
+    """
+
+    def __init__(self, df):
+        self.size = len(df)
+        self._codes = {}
+        self._lookup = {}
+        self._order = {}
+        self._bounds = {}
+        for column in FILTER_COLUMNS:
+            if column == PERIOD_COLUMN:
+                values = reporting_period(df)
+            else:
+                values = df[column]
+            categorical = pd.Categorical(values)
+            codes = categorical.codes.astype(np.int32)  # -1 : valeur manquante
+            order = np.argsort(codes, kind="stable").astype(np.int64)
+            self._codes[column] = codes
+            self._lookup[column] = {value: code for code, value in enumerate(categorical.categories)}
+            self._order[column] = order
+            self._bounds[column] = np.searchsorted(codes[order], np.arange(len(categorical.categories) + 1))
+        self._partitions = self._partition_ranges()
+
+    def _partition_ranges(self):
+        # Plages de lignes de même (organisation, mois) ; None si le jeu n'est pas rangé par partition
+        organisation, period = self._codes[PARTITION_COLUMNS[0]], self._codes[PARTITION_COLUMNS[1]]
+        if not self.size:
+            return None
+        starts = np.flatnonzero(np.r_[True, (organisation[1:] != organisation[:-1]) | (period[1:] != period[:-1])])
+        if len(starts) > len(set(zip(organisation[starts].tolist(), period[starts].tolist()))):
+            return None
+        return organisation[starts], period[starts], starts, np.r_[starts[1:], self.size]
+
+    def _partition_rows(self, codes):
+        # Plages (début, fin) des partitions retenues par les filtres organisation et période
+        organisation, period, starts, stops = self._partitions
+        keep = np.ones(len(starts), dtype=bool)
+        for column, values in zip(PARTITION_COLUMNS, (organisation, period)):
+            if column in codes:
+                keep &= np.isin(values, codes[column])
+        return starts[keep], stops[keep]
+
+    def _postings(self, column, code):
+        bounds = self._bounds[column]
+        return self._order[column][bounds[code]:bounds[code + 1]]
+
+    def select(self, organisation=None, province=None, zone_sante=None, aire_sante=None, periode=None):
+        """Positions (triées) des lignes retenues, ou None si aucun filtre n'est actif."""
+        active = []
+        for column, values in zip(FILTER_COLUMNS, (organisation, province, zone_sante, aire_sante, periode)):
+            if values:
+                lookup = self._lookup[column]
+                codes = np.array([lookup[v] for v in values if v in lookup], dtype=np.int32)
+                bounds = self._bounds[column]
+                size = int((bounds[codes + 1] - bounds[codes]).sum()) if len(codes) else 0
+                active.append((size, column, codes))
+        if not active:
+            return None
+        # On part du filtre le plus sélectif, puis on vérifie les autres sur ces seules lignes
+        active.sort(key=lambda item: item[0])
+        pruned = {column: codes for _, column, codes in active if column in PARTITION_COLUMNS}
+        others = [item for item in active if item[1] not in PARTITION_COLUMNS]
+        rows = None
+        if self._partitions is not None and pruned:
+            starts, stops = self._partition_rows(pruned)
+            if not others or others[0][0] >= int((stops - starts).sum()):
+                # Partitions retenues : plages contiguës, sans tri ni vérification de ces filtres
+                ranges = [np.arange(start, stop) for start, stop in zip(starts.tolist(), stops.tolist())]
+                rows = np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+                active = others
+        if rows is None:
+            _, column, codes = active[0]
+            if not len(codes):
+                return np.empty(0, dtype=np.int64)
+            rows = np.sort(np.concatenate([self._postings(column, code) for code in codes]))
+            active = active[1:]
+        for _, column, codes in active:
+            rows = rows[np.isin(self._codes[column][rows], codes)]
+        return rows
+
+
+def apply_selection(df, rows):
+    """Lignes de `df` retenues par `FilterIndex.select` (sans copie si aucun filtre)."""
+    if rows is None:
+        return df
+    return df.take(rows)
+
+
+class RowSelection:
+    """Lignes retenues par une sélection : positions dans le jeu partagé, sans copie.
+
+    Les lignes ne sont matérialisées (`frame`) que si une session en a réellement
+    besoin, et seulement pour les colonnes demandées.
+    """
+
+    def __init__(self, data, rows):
+        self.data = data
+        self.rows = rows  # None : toutes les lignes
+
+    def __len__(self):
+        return len(self.data) if self.rows is None else len(self.rows)
+
+    def frame(self, columns=None):
+        data = self.data if columns is None else self.data[list(columns)]
+        return apply_selection(data, self.rows)
@@ -0,0 +1,58 @@
+"""Hiérarchie Province → Zone de santé → Aire de santé, pour les filtres en cascade."""
+import pandas as pd
+
+GEOGRAPHY_COLUMNS = ["Province", "Zone_sante", "Aire_sante"]
+
+
+def _key(value):
+    return None if pd.isna(value) else value
+
+
+def _merge(counts):
+    """Fusionne des paires (valeur, nombre) : valeurs dans l'ordre d'apparition, sans manquantes."""
+    merged = {}
+    for value, count in counts:
+        if value is not None:
+            merged[value] = merged.get(value, 0) + count
+    return merged
+
+
+class GeographyIndex:
+    """Arbre province → zones → aires avec le nombre de soumissions, construit une fois par version.
+
+    Les options d'un niveau ne parcourent que les enfants des valeurs choisies au
+    niveau supérieur ; une liste vide ou None signifie « pas de filtre ». Les options
+    suivent l'ordre d'apparition dans les données et n'incluent pas les valeurs
+    manquantes (qui ne peuvent pas être sélectionnées).
+    """
+
+    def __init__(self, data):
+        counts = data.groupby(GEOGRAPHY_COLUMNS, observed=True, dropna=False, sort=False).size()
+        self.tree = {}
+        for (province, zone, aire), count in counts.items():
+            aires = self.tree.setdefault(_key(province), {}).setdefault(_key(zone), {})
+            aires[_key(aire)] = aires.get(_key(aire), 0) + int(count)
+        self.organisations = [v for v in data["organisation"].unique() if not pd.isna(v)]
+
+    def _zones(self, provinces):
+        for province in provinces or self.tree:
+            yield from self.tree.get(province, {}).items()
+
+    def provinces(self):
+        """{province: nombre de soumissions}."""
+        return _merge((province, sum(sum(a.values()) for a in zones.values()))
+                      for province, zones in self.tree.items())
+
+    def zones(self, provinces=None):
+        """{zone: nombre de soumissions} dans les provinces choisies."""
+        return _merge((zone, sum(aires.values())) for zone, aires in self._zones(provinces))
+
+    def aires(self, provinces=None, zones=None):
+        """{aire: nombre de soumissions} dans les zones (et provinces) choisies."""
+        selected = set(zones or ())
+        return _merge(item for zone, aires in self._zones(provinces) if not selected or zone in selected
+                      for item in aires.items())
+
+    def zone_provinces(self, zones):
+        """Provinces où figurent les zones `zones` (None : soumissions sans province)."""
+        return {province for province, children in self.tree.items() if any(z in children for z in zones)}
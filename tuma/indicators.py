@@ -0,0 +1,267 @@
+"""Registre déclaratif des indicateurs et moteur d'agrégation vectorisé.
+
+Chaque indicateur est soit une somme de colonnes (mesures du cube), soit un
+ratio entre deux autres indicateurs. Le moteur compile le registre en une
+matrice de poids mesures × indicateurs : une seule réduction par mois, suivie
+d'un produit matriciel, donne toutes les valeurs et toutes les séries
+mensuelles. Ajouter un indicateur n'ajoute donc aucun parcours des données.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from tuma.cube import GROUP_COUNT, STATUT_CODES
+from tuma.schema import PERIOD_COLUMN
+
+PARTENAIRES_CURSUS = ("PARDE", "SARCAF")
+PARTENAIRES_SANTE = ("ADJ", "CARE")
+
+
+@dataclass(frozen=True)
+class Section:
+    number: int
+    title: str
+    organisations: tuple  # La section s'affiche si l'une d'elles est sélectionnée
+    row_titles: tuple = ()  # Sous-titres des lignes de tuiles, dans l'ordre
+
+
+@dataclass(frozen=True)
+class Indicator:
+    key: str
+    label: str
+    section: int
+    columns: tuple = ()  # Somme de ces colonnes
+    ratio: tuple = None  # (numérateur, dénominateur) : clés d'indicateurs, en pourcentage
+    row: int = 1  # Ligne de tuiles dans la section
+
+    @property
+    def is_ratio(self):
+        return self.ratio is not None
+
+
+def _single(column, label, section, row=1):
+    # Indicateur égal à une seule colonne : la clé est le nom de la colonne
+    return Indicator(column, label, section, (column,), row=row)
+
+
+SECTIONS = {
+    1: Section(1, "1. PARTICIPATION CURSUS", PARTENAIRES_CURSUS),
+    2: Section(2, "2. Information sur l'utilisation des services curatifs", PARTENAIRES_SANTE),
+    3: Section(3, "3. Violences sexuelles et basées sur le genre", PARTENAIRES_SANTE),
+    4: Section(4, "4. Santé de la mère, Accouchements et naissances", PARTENAIRES_SANTE),
+    5: Section(5, "5. Décès liés à l'accouchement", PARTENAIRES_SANTE),
+    6: Section(6, "6. Informations sur les acceptantes des methodes de la planification familiale", PARTENAIRES_SANTE),
+    7: Section(7, "7. Communication sur le changement de comportement (CCC)", PARTENAIRES_SANTE),
+    8: Section(8, "8. Informations sur les maladies transmissibles", PARTENAIRES_SANTE, row_titles=(
+        "1. IST Nouveaux cas",
+        "2. Cas contact parmi les nouveaux cas",
+        "3. Traites selon l'approche syndromique",
+        "4. Traites selon l'approche etiologique",
+    )),
+}
+
+_ACC = "acceptante/"
+_CCC = "communication_changement_comportement/"
+_IST_LABELS = (
+    "Feminin : <15 ans",
+    "Feminin : 15-24 ans",
+    "Feminin : >25 ans",
+    "Masculin : <15 ans",
+    "Masculin : 15-24 ans",
+    "Masculin : >25 ans",
+)
+
+
+def _ist_row(row, key, columns, total_columns):
+    return [_single(c, label, 8, row) for c, label in zip(columns, _IST_LABELS)] + [
+        Indicator(key, "Total", 8, total_columns, row=row)
+    ]
+
+
+INDICATORS = [
+    # 1. Participation cursus
+    _single(GROUP_COUNT, "Nombre de groupes", 1),
+    _single("Information_groupe/Effectif_debut", "Effectif début cursus", 1),
+    _single("Information_groupe/Effectif_fin", "Effectif fin cursus", 1),
+    Indicator("taux_achevement", "Taux d'achèvement", 1,
+              ratio=("Information_groupe/Effectif_fin", "Information_groupe/Effectif_debut")),
+    _single(STATUT_CODES[1], "Couple SASA", 1),
+    _single(STATUT_CODES[2], "Eyap Filles", 1),
+    _single(STATUT_CODES[3], "Eyap Garcons", 1),
+    _single(STATUT_CODES[4], "Club des jeunes", 1),
+    # 2. Services curatifs
+    Indicator("moins_de_15", "Cas - Moins de 15 ans", 2,
+              ("totalcaseE/Feminin_caseE", "totalcaseE/Masculin_caseE")),
+    Indicator("plus_15_18", "Cas - 15 à 18 ans", 2,
+              ("totalcaseI/Feminin_caseI", "totalcaseI/Masculin_caseI")),
+    Indicator("plus_18_24", "Cas - 18 à 24 ans", 2,
+              ("totalcaseM/Feminin_caseM", "totalcaseM/Masculin_caseM",
+               "totalcaseQ/Feminin_caseQ", "totalcaseQ/Masculin_caseQ")),
+    Indicator("plus_50", "Cas - Plus de 50 ans", 2,
+              ("totalcase/Feminin_case", "totalcase/Masculin_case",
+               "totalcaseA/Feminin_caseA", "totalcaseA/Masculin_caseA")),
+    # 3. VBG
+    _single("VBG/casSVS", "Nouveaux cas/SVS", 3),
+    _single("VBG/SVSFeminin", "Cas SVS Feminin", 3),
+    _single("VBG/NewSVS", "Nouveaux SVS", 3),
+    _single("VBG/Ancien_SVS_contre", "Anciens Cas contre refere", 3),
+    # 4. Santé de la mère
+    _single("CPN/CPN1", "Total CPN1", 4),
+    _single("CPN/CPN4", "Total CPN4", 4),
+    _single("accouchement_naissance/accouchement1", "Accouchements", 4),
+    _single("accouchement_naissance/accouchement3", "Accouchements - 20ans", 4),
+    _single("accouchement_naissance/accouchement6", "Naissances vivantes", 4),
+    # 5. Décès liés à l'accouchement
+    _single("deces_accouchements/deces_nouv1", "Décès nouveaux-nés de -7 jours", 5),
+    _single("deces_accouchements/deces_nouv2", "Décès nouveaux-nés de -28 jours", 5),
+    _single("deces_accouchements/deces_nouv3", "Décès maternels", 5),
+    _single("deces_accouchements/deces_nouv4", "Décès maternels revus", 5),
+    # 6. Acceptantes PF (deux lignes de tuiles)
+    _single(f"{_ACC}Nvlle_acceptante_meth/Nbre_Fosa", "Nouvelles acceptentes des methodes de PF aux FOSA", 6),
+    _single(f"{_ACC}Nvlle_acceptante_meth/Nbre_adbc", "Nouvelles acceptentes des methodes de PF à l'ADBC", 6),
+    _single(f"{_ACC}Nvlles_aceptante_moins18/Nbre_Fosa2", "Acceptentes des methodes de PF aux FOSA de -18 ans", 6),
+    _single(f"{_ACC}Nvlles_aceptante_moins18/Nbre_adbc2", "Acceptentes des methodes de PF à l'ADBC de -18 ans", 6),
+    _single(f"{_ACC}Nvlle_acceptante_18_24/Nbre_Fosa1", "Acceptentes des methodes de PF aux FOSA de 18-24 ans", 6),
+    _single(f"{_ACC}Nvlle_acceptante_18_24/Nbre_adbc1", "Acceptentes des methodes de PF a l'ADBC de 18-24 ans", 6),
+    _single(f"{_ACC}Renouvellement_Planification_familiale/Nbre_Fosa5",
+            "Renouvellement planification familiale FOSA", 6, row=2),
+    _single(f"{_ACC}Renouvellement_Planification_familiale/Nbre_adbc5",
+            "Renouvellement planification familiale ADBC", 6, row=2),
+    _single(f"{_ACC}Nvelles_acceptantes_post_avortemt/Nbre_Fosa6",
+            "Nvelles acceptantes des soins après avortement FOSA", 6, row=2),
+    _single(f"{_ACC}Nvelles_acceptantes_post_avortemt/Nbre_adbc6",
+            "Nvelles acceptantes des soins après avortement ADBC", 6, row=2),
+    _single(f"{_ACC}Nbre_beneficiaires_SCACF/Nbre_Fosa7",
+            "Beneficiares SCACF/soins complets d'avort centrés sur la femme FOSA", 6, row=2),
+    _single(f"{_ACC}Nbre_beneficiaires_SCACF/Nbre_adbc7",
+            "Beneficiares SCACF/soins complets d'avort centrés sur la femme ADBC", 6, row=2),
+    # 7. Communication pour le changement de comportement
+    _single(f"{_CCC}seances_prevues", "Séances prévues", 7),
+    _single(f"{_CCC}seances_realises", "Séances réalisées", 7),
+    _single(f"{_CCC}participants_hommes", "Participants hommes", 7),
+    _single(f"{_CCC}participants_femmes", "Participants femmes", 7),
+    _single(f"{_CCC}participants_jeunes_filles", "Participants filles", 7),
+    _single(f"{_CCC}participants_jeunes_garcons", "Participants garçons", 7),
+    _single(f"{_CCC}participants_adolescentes_filles", "Partic adolescentes", 7),
+    _single(f"{_CCC}participants_adolescentes_garcons", "Partic adolescents", 7),
+    _single(f"{_CCC}participants_referes_fosa", "Partic référés FOSA", 7),
+    # 8. IST
+    *_ist_row(1, "ist_nouveaux_cas_total", (
+        "IST/Nouv_feminY7/infer15Y7", "IST/Nouv_feminY7/quinze_24Y7", "IST/Nouv_feminY7/Vingt5Y7",
+        "IST/Nouv_feminZ/infer15YZ", "IST/Nouv_feminZ/quinze_24YZ", "IST/Nouv_feminZ/Vingt5YZ",
+    ), ("IST/Nouv_feminZ/TotNouvCaseM", "IST/Nouv_feminY7/TotNouvCaseF")),
+    *_ist_row(2, "ist_cas_contact_total", (
+        "IST/Nouv_femin/infer15", "IST/Nouv_femin/quinze_24", "IST/Nouv_femin/Vingt5",
+        "IST/Nouv_garc/infer151", "IST/Nouv_garc/quinze_241", "IST/Nouv_garc/Vingt51",
+    ), ("IST/Nouv_femin/TotalCasContactIST_F", "IST/Nouv_garc/TotalCasContactIST_M")),
+    *_ist_row(3, "ist_syndromique_total", (
+        "IST/contacts_new_case1/infer154", "IST/contacts_new_case1/quinze_244", "IST/contacts_new_case1/Vingt54",
+        "IST/contacts_new_case/infer153", "IST/contacts_new_case/quinze_243", "IST/contacts_new_case/Vingt53",
+    ), ("IST/contacts_new_case1/totalCasTraiteSyndromeF", "IST/contacts_new_case/totalCasTraiteSyndromeM")),
+    *_ist_row(4, "ist_etiologique_total", (
+        "IST/contacts_new_caseY/infer153L", "IST/contacts_new_caseY/quinze_243L", "IST/contacts_new_caseY/Vingt53L",
+        "IST/contacts_new_caseR/infer153R", "IST/contacts_new_caseR/quinze_243R", "IST/contacts_new_caseR/Vingt53R",
+    ), ("IST/contacts_new_caseY/overall3L", "IST/contacts_new_caseR/overall3R")),
+]
+
+
+def visible_sections(organisation):
+    """Numéros des sections à afficher pour les organisations sélectionnées."""
+    return [n for n, section in SECTIONS.items() if any(o in organisation for o in section.organisations)]
+
+
+def section_rows(section, registry=None):
+    """Lignes de tuiles d'une section : liste de (sous-titre ou "", indicateurs)."""
+    rows = {}
+    for indicator in registry or INDICATORS:
+        if indicator.section == section:
+            rows.setdefault(indicator.row, []).append(indicator)
+    titles = SECTIONS[section].row_titles
+    return [(titles[row - 1] if row <= len(titles) else "", rows[row]) for row in sorted(rows)]
+
+
+def format_value(indicator, value):
+    if indicator.is_ratio:
+        return f"{value:.0f}%"
+    return int(value)
+
+
+class IndicatorResult:
+    """Valeurs de tous les indicateurs pour une sélection, totales et mensuelles."""
+
+    def __init__(self, totals, monthly):
+        self.totals = totals  # Series indexée par clé d'indicateur
+        self.monthly = monthly  # DataFrame : une ligne par mois, une colonne par indicateur
+
+    def __getitem__(self, key):
+        return self.totals[key]
+
+    @property
+    def nbytes(self):
+        return int(self.totals.memory_usage(deep=True) + self.monthly.memory_usage(deep=True).sum())
+
+    def timeline(self, keys):
+        """Séries mensuelles des indicateurs demandés ; la colonne "time" est le mois en texte."""
+        timeline = self.monthly[list(keys)].reset_index(names="time")
+        timeline["time"] = timeline["time"].astype(str)
+        return timeline
+
+
+class IndicatorEngine:
+    """Registre compilé en une matrice de poids mesures × indicateurs."""
+
+    def __init__(self, registry=None):
+        self.registry = list(registry or INDICATORS)
+        self.by_key = {i.key: i for i in self.registry}
+        sums = [i for i in self.registry if not i.is_ratio]
+        self.sum_keys = [i.key for i in sums]
+        self.measures = sorted({c for i in sums for c in i.columns})
+        position = {m: n for n, m in enumerate(self.measures)}
+        self.weights = np.zeros((len(self.measures), len(sums)))
+        for n, indicator in enumerate(sums):
+            for column in indicator.columns:
+                self.weights[position[column], n] += 1
+        self.ratios = [i for i in self.registry if i.is_ratio]
+
+    def _sums(self, grouped):
+        # Sommes des mesures par groupe -> indicateurs-sommes (produit matriciel)
+        return pd.DataFrame(grouped.to_numpy() @ self.weights, index=grouped.index, columns=self.sum_keys)
+
+    def add_ratios(self, values):
+        """Copie de `values` (colonnes des indicateurs-sommes) complétée des taux, ligne par ligne."""
+        values = values.copy()
+        for indicator in self.ratios:
+            numerator, denominator = values[indicator.ratio[0]], values[indicator.ratio[1]]
+            values[indicator.key] = (numerator / denominator.where(denominator > 0) * 100).fillna(0)
+        return values
+
+    def _values(self, grouped):
+        return self.add_ratios(self._sums(grouped))
+
+    def monthly_sums(self, cells):
+        """Sommes mensuelles des indicateurs-sommes (sans les taux) ; cellules sans date exclues."""
+        measures = cells.reindex(columns=self.measures, fill_value=0)
+        return self._sums(measures.groupby(cells[PERIOD_COLUMN], sort=True).sum())
+
+    def compute_by(self, cells, keys):
+        """Valeurs de tous les indicateurs par groupe de colonnes `keys` du cube (toutes périodes).
+
+        Les cellules dont une clé est manquante ne forment pas de groupe.
+        """
+        measures = cells.reindex(columns=self.measures, fill_value=0)
+        grouped = measures.groupby([cells[key] for key in keys], observed=True, sort=True).sum()
+        return self._values(grouped)[[i.key for i in self.registry]]
+
+    def compute(self, cells):
+        """Une réduction mensuelle des cellules du cube, puis un produit matriciel."""
+        measures = cells.reindex(columns=self.measures, fill_value=0)
+        grouped = measures.groupby(cells[PERIOD_COLUMN], dropna=False, sort=True).sum()
+        values = self._values(grouped)
+        totals = values[self.sum_keys].sum()
+        for indicator in self.ratios:
+            numerator, denominator = totals[indicator.ratio[0]], totals[indicator.ratio[1]]
+            totals[indicator.key] = numerator / denominator * 100 if denominator > 0 else 0
+        # Les cellules sans date comptent dans les totaux mais pas dans les séries mensuelles
+        monthly = values[values.index.notna()][[i.key for i in self.registry]]
+        return IndicatorResult(totals[[i.key for i in self.registry]], monthly)
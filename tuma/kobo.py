@@ -0,0 +1,119 @@
+"""Client minimal de l'API Kobo (v1) pour la récupération des soumissions."""
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import urllib3
+
+from tuma import config
+from tuma.schema import type_columns
+
+# Connexions HTTP persistantes, partagées par tous les clients et tous les fils ;
+# seules les erreurs de connexion sont retentées (le délai de lecture reste celui de la source)
+http_pool = urllib3.PoolManager(maxsize=config.HTTP_POOL_SIZE, retries=urllib3.Retry(total=2, read=False, backoff_factor=0.5))
+
+
+class KoboError(RuntimeError):
+    """Réponse en erreur de l'API Kobo."""
+
+
+class KoboClient:
+    """Accès en lecture aux soumissions d'un formulaire Kobo."""
+
+    def __init__(self, server=None, token=None, timeout=None, page_size=None, pool=None):
+        # Le serveur est paramétrable pour pouvoir viser une doublure locale de l'API
+        self.server = (server or config.KOBO_SERVER).rstrip("/")
+        self.token = token if token is not None else config.KOBO_TOKEN
+        self.timeout = timeout or config.HTTP_TIMEOUT
+        self.page_size = page_size or config.PAGE_SIZE
+        self.pool = pool or http_pool
+
+    def _get(self, path, params=None, accept="application/json"):
+        headers = {"Accept": accept}
+        if self.token:
+            headers["Authorization"] = f"Token {self.token}"
+        response = self.pool.request("GET", f"{self.server}{path}", fields=params, headers=headers,
+                                     timeout=urllib3.Timeout(total=self.timeout))
+        if response.status >= 400:
+            raise KoboError(f"{self.server}{path} : HTTP {response.status}")
+        return response.data
+
+    def _get_json(self, path, params):
+        return json.loads(self._get(path, params))
+
+    def export_xlsx(self, form_id):
+        """Export XLSX complet du formulaire (mode "xlsx"), sous forme d'octets."""
+        return self._get(f"/api/v1/data/{form_id}.xlsx", accept="*/*")
+
+    def _get_page(self, form_id, params, start):
+        payload = self._get_json(f"/api/v1/data/{form_id}", {**params, "start": start})
+        return payload.get("results", []) if isinstance(payload, dict) else payload
+
+    def iter_pages(self, form_id, since_id=None):
+        """Renvoie les soumissions par pages, triées par `_id`, à partir de `since_id` exclu.
+
+        La page suivante est téléchargée pendant que l'appelant traite la page courante.
+        """
+        params = {"sort": json.dumps({"_id": 1}), "limit": self.page_size}
+        if since_id is not None:
+            params["query"] = json.dumps({"_id": {"$gt": int(since_id)}})
+        start = 0
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="tuma-page") as prefetch:
+            pending = prefetch.submit(self._get_page, form_id, params, start)
+            while pending is not None:
+                page = pending.result()
+                # Page complète : il en reste peut-être une autre, demandée dès maintenant
+                pending = None
+                if len(page) >= self.page_size:
+                    pending = prefetch.submit(self._get_page, form_id, params, start + len(page))
+                if not page:
+                    break
+                yield page
+                start += len(page)
+
+
+def flatten_submission(record, prefix=""):
+    """Aplatit les groupes imbriqués en clés "groupe/champ", comme l'export XLSX."""
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_submission(value, prefix=f"{name}/"))
+        else:
+            flat[name] = value
+    return flat
+
+
+def submissions_to_frame(records):
+    """Convertit des soumissions JSON en DataFrame aux colonnes de l'export XLSX.
+
+    Date et compteurs sont typés dès cette étape ; les libellés restent en texte
+    jusqu'à l'assemblage du jeu complet (`chunks_to_frame` puis `apply_schema`).
+    """
+    df = pd.DataFrame.from_records([flatten_submission(r) for r in records])
+    if df.empty:
+        return df
+    # L'API renvoie les nombres sous forme de texte : on convertit les colonnes entièrement numériques
+    for column in df.columns[df.dtypes == object]:
+        try:
+            converted = pd.to_numeric(df[column], errors="coerce")
+        except (TypeError, ValueError):  # Groupes répétés (listes) : laissés tels quels
+            continue
+        if converted.notna().sum() == df[column].notna().sum():
+            df[column] = converted
+    type_columns(df)
+    return _latest_versions(df)
+
+
+def _latest_versions(df):
+    if "_id" in df.columns:
+        df = df.drop_duplicates("_id", keep="last").sort_values("_id", ignore_index=True)
+    return df
+
+
+def chunks_to_frame(chunks):
+    """Assemble des morceaux convertis page par page ; une ligne par `_id` (dernière version)."""
+    chunks = [chunk for chunk in chunks if not chunk.empty]
+    if not chunks:
+        return pd.DataFrame()
+    return _latest_versions(pd.concat(chunks, ignore_index=True))
@@ -0,0 +1,69 @@
+"""Partitions du jeu de données : une par organisation × mois de rapportage.
+
+Les soumissions sont rangées partition par partition (lignes contiguës) ; l'instantané
+Parquet écrit chaque partition dans son propre groupe de lignes et en garde la liste
+dans ses métadonnées. Une sélection par organisation ou par période ne lit donc (et ne
+parcourt) que les partitions concernées : `read_snapshot(..., organisation=, periode=)`
+sur disque, `FilterIndex` en mémoire.
+"""
+import numpy as np
+import pandas as pd
+
+from tuma.schema import PERIOD_COLUMN, TIME_COLUMN
+
+PARTITION_COLUMNS = ["organisation", PERIOD_COLUMN]
+
+
+def partition_keys(df):
+    """Organisation et mois de rapportage de chaque ligne (jeu typé ou soumissions brutes)."""
+    times = df[TIME_COLUMN] if TIME_COLUMN in df.columns else pd.Series(pd.NaT, index=df.index)
+    if not pd.api.types.is_datetime64_any_dtype(times):
+        times = pd.to_datetime(times, errors="coerce")
+    organisation = df["organisation"] if "organisation" in df.columns else pd.Series(None, index=df.index)
+    return pd.DataFrame({
+        "organisation": organisation.astype("string").astype("category"),
+        PERIOD_COLUMN: times.dt.year * 12 + times.dt.month - 1,  # Mois en entier : rapide à trier
+    }).reset_index(drop=True)
+
+
+def partition_order(df):
+    """Positions qui rangent `df` par partition (ordre d'origine conservé dans chaque partition)."""
+    keys = partition_keys(df)
+    groups = keys.groupby(PARTITION_COLUMNS, sort=True, dropna=False, observed=True).ngroup()
+    # Jeu déjà presque rangé (ajouts à un jeu rangé) : tri stable quasi linéaire
+    return np.argsort(groups.to_numpy(), kind="stable")
+
+
+def sort_partitions(df):
+    """(`df` rangé par partition, positions d'origine des lignes)."""
+    order = partition_order(df)
+    if (order == np.arange(len(order))).all():
+        return df, order
+    return df.take(order).reset_index(drop=True), order
+
+
+def partition_table(df):
+    """Partitions de `df` rangé : organisation, mois ("AAAA-MM") et nombre de lignes, dans l'ordre."""
+    keys = partition_keys(df)
+    if keys.empty:
+        return []
+    codes = np.column_stack([keys["organisation"].cat.codes.to_numpy(),
+                             keys[PERIOD_COLUMN].fillna(-1).to_numpy(dtype=np.int64)])
+    starts = np.flatnonzero(np.r_[True, (codes[1:] != codes[:-1]).any(axis=1)])
+    sizes = np.diff(np.r_[starts, len(keys)])
+    table = []
+    for start, size in zip(starts.tolist(), sizes.tolist()):
+        organisation, month = keys.iloc[start]
+        month = None if pd.isna(month) else f"{int(month) // 12:04d}-{int(month) % 12 + 1:02d}"
+        table.append([None if pd.isna(organisation) else str(organisation), month, size])
+    return table
+
+
+def matching_partitions(table, organisation=None, periode=None):
+    """Indices des partitions de `table` retenues par la sélection (liste vide ou None : pas de filtre)."""
+    organisations = {str(o) for o in organisation} if organisation else None
+    months = {str(p) for p in periode} if periode else None
+    return [
+        i for i, (org, month, _) in enumerate(table)
+        if (organisations is None or org in organisations) and (months is None or month in months)
+    ]
@@ -0,0 +1,132 @@
+"""Précalcul, sur plusieurs processus, des résultats des sélections les plus courantes.
+
+Après chaque nouvelle version des données, les indicateurs de chaque combinaison
+organisation × province et organisation × zone de santé, ainsi que les totaux
+(toutes organisations et chaque organisation seule), sont calculés en parallèle
+puis publiés dans le cache des résultats : la plupart des sélections de la barre
+latérale sont servies sans calcul, même juste après une actualisation.
+
+Les processus de travail sont des interpréteurs indépendants (`python -m tuma.precompute`) :
+"fork" n'est pas sûr dans un processus Streamlit à plusieurs fils, et un processus
+lancé par "spawn" ré-exécuterait le script du tableau de bord (module __main__).
+Chacun relit dans l'instantané Parquet les seules partitions de ses organisations,
+reçoit ses sélections sur l'entrée standard et renvoie ses résultats sur la sortie
+standard ; le processus du tableau de bord les publie dans le cache.
+
+    python -m tuma.precompute --instantane donnees/snapshot.parquet --version <version> < selections.json
+"""
+import argparse
+import json
+import logging
+import os
+import pickle
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from tuma import config, enable_copy_on_write
+from tuma.cube import build_cube, slice_cube
+from tuma.dataset import snapshot_path
+from tuma.indicators import IndicatorEngine
+from tuma.snapshot import read_snapshot, snapshot_metadata
+
+logger = logging.getLogger(__name__)
+
+# Racine du dépôt, ajoutée au chemin des modules des processus de travail
+_ROOT = Path(__file__).resolve().parent.parent
+
+
+def rollup_selections(cube):
+    """Totaux, organisations seules, puis organisation × province et organisation × zone présentes."""
+    selections = [{}]
+    organisations = cube["organisation"].dropna().unique()
+    selections.extend({"organisation": [o]} for o in organisations)
+    for column, name in (("Province", "province"), ("Zone_sante", "zone_sante")):
+        pairs = cube[["organisation", column]].dropna().drop_duplicates()
+        selections.extend({"organisation": [o], name: [v]} for o, v in pairs.itertuples(index=False))
+    return selections
+
+
+def shard_selections(selections, processes):
+    """Répartit les sélections entre au plus `processes` lots ; celles d'une organisation restent ensemble.
+
+    Les lots sont équilibrés en nombre de sélections ; le total sans filtre, qui lit
+    tout l'instantané, va au premier lot.
+    """
+    groups = {}
+    for selection in selections:
+        organisation = (selection.get("organisation") or [None])[0]
+        groups.setdefault(organisation, []).append(selection)
+    shards = [[] for _ in range(max(1, min(processes, len(groups))))]
+    for organisation, group in sorted(groups.items(), key=lambda item: (item[0] is not None, -len(item[1]))):
+        min(shards, key=len).extend(group)
+    return [shard for shard in shards if shard]
+
+
+def _run_shard(path, version, selections):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(_ROOT), env.get("PYTHONPATH")]))
+    completed = subprocess.run(
+        [sys.executable, "-m", "tuma.precompute", "--instantane", str(path), "--version", str(version)],
+        input=json.dumps(selections).encode("utf-8"), stdout=subprocess.PIPE, env=env, check=True,
+    )
+    return pickle.loads(completed.stdout)
+
+
+def precompute(engine, processes=None, path=None):
+    """Calcule les sélections de `rollup_selections` et les publie dans le cache du moteur.
+
+    Les processus de travail relisent l'instantané `path` (par défaut celui du dossier
+    de données), qui doit être celui de la version du moteur. Renvoie le nombre de
+    résultats publiés (0 si le moteur n'a pas de cache, si le précalcul est désactivé
+    ou si l'instantané est d'une autre version).
+    """
+    processes = config.PRECOMPUTE_PROCESSES if processes is None else processes
+    if engine.cache is None or processes <= 0:
+        return 0
+    path = snapshot_path() if path is None else path
+    meta = snapshot_metadata(path)
+    if meta is None or meta["written_at"] != engine.version:
+        logger.warning("Précalcul ignoré : l'instantané n'est pas celui de la version %s", engine.version)
+        return 0
+    started = time.perf_counter()
+    shards = shard_selections(rollup_selections(engine.cube), processes)
+    with ThreadPoolExecutor(max_workers=len(shards)) as threads:
+        outputs = list(threads.map(lambda shard: _run_shard(path, engine.version, shard), shards))
+    for shard, results in zip(shards, outputs):
+        for selection, result in zip(shard, results):
+            engine.cache.put(engine.version, selection, result)
+    count = sum(len(shard) for shard in shards)
+    logger.info("Précalcul : %d sélections en %.1f s sur %d processus", count,
+                time.perf_counter() - started, len(shards))
+    return count
+
+
+def compute_shard(path, version, selections):
+    """Résultats des `selections` (processus de travail), à partir des seules partitions utiles."""
+    meta = snapshot_metadata(path)
+    if meta is None or meta["written_at"] != version:
+        raise RuntimeError(f"Instantané {path} : version {meta and meta['written_at']} au lieu de {version}")
+    organisations = [selection.get("organisation") for selection in selections]
+    # Total sans filtre : tout l'instantané ; sinon les partitions des organisations du lot
+    wanted = None if not all(organisations) else sorted({o for names in organisations for o in names})
+    cube = build_cube(read_snapshot(path, organisation=wanted))
+    indicators = IndicatorEngine()
+    return [indicators.compute(slice_cube(cube, **selection)) for selection in selections]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instantane", required=True, help="Instantané Parquet des données")
+    parser.add_argument("--version", required=True, help="Version attendue de l'instantané")
+    args = parser.parse_args(argv)
+    enable_copy_on_write()
+    selections = json.load(sys.stdin)
+    results = compute_shard(Path(args.instantane), args.version, selections)
+    pickle.dump(results, sys.stdout.buffer, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+if __name__ == "__main__":
+    main()
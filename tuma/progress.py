@@ -0,0 +1,97 @@
+"""Indicateurs de progrès : atteinte des cibles par indicateur, organisation et niveau géographique.
+
+Les cibles viennent d'un fichier local (`config.TARGETS_PATH`, CSV ou XLSX) à une
+ligne par cible :
+
+    indicateur,organisation,niveau,lieu,cible
+    CPN/CPN1,CARE,province,Sud-Kivu,1200
+    taux_achevement,PARDE,zone,Uvira,80
+
+`indicateur` est la clé du registre (`tuma.indicators.INDICATORS`), `niveau` vaut
+"province", "zone" ou "aire". Le réalisé de tous les indicateurs est calculé par
+organisation et par lieu de chaque niveau en une agrégation du cube, puis joint
+aux cibles : aucun calcul tuile par tuile.
+"""
+import logging
+from pathlib import Path
+
+import pandas as pd
+
+from tuma import config
+from tuma.indicators import INDICATORS
+
+logger = logging.getLogger(__name__)
+
+# Niveau géographique du fichier des cibles -> colonne des données
+LEVELS = {"province": "Province", "zone": "Zone_sante", "aire": "Aire_sante"}
+TARGET_COLUMNS = ["indicateur", "organisation", "niveau", "lieu", "cible"]
+PROGRESS_COLUMNS = ["indicateur", "libelle", "organisation", "niveau", "lieu", "cible", "realise", "atteinte",
+                    "ecart"]
+_KEYS = ["indicateur", "organisation", "niveau", "lieu"]
+
+
+def load_targets(path=None):
+    """Cibles du fichier `path` (par défaut `config.TARGETS_PATH`).
+
+    Tableau vide si le fichier n'existe pas ou s'il lui manque des colonnes (avertissement
+    dans le journal) : un fichier de cibles mal formé n'empêche pas de charger le tableau de bord.
+    """
+    path = Path(path or config.TARGETS_PATH)
+    if not path.exists():
+        return pd.DataFrame(columns=TARGET_COLUMNS)
+    if path.suffix.lower() in (".xlsx", ".xls"):
+        targets = pd.read_excel(path, dtype=str)
+    else:
+        targets = pd.read_csv(path, dtype=str, sep=None, engine="python", encoding="utf-8-sig")
+    targets.columns = [str(c).strip().lower() for c in targets.columns]
+    missing = [c for c in TARGET_COLUMNS if c not in targets.columns]
+    if missing:
+        logger.warning("%s : colonnes manquantes %s, cibles ignorées", path, missing)
+        return pd.DataFrame(columns=TARGET_COLUMNS)
+
+    targets = targets[TARGET_COLUMNS].copy()
+    for column in _KEYS:
+        targets[column] = targets[column].str.strip()
+    targets["niveau"] = targets["niveau"].str.lower()
+    targets["cible"] = pd.to_numeric(targets["cible"].str.replace(",", "."), errors="coerce")
+    known = {i.key for i in INDICATORS}
+    valid = targets["indicateur"].isin(known) & targets["niveau"].isin(list(LEVELS)) & targets["cible"].notna()
+    if not valid.all():
+        logger.warning("%s : %d cible(s) ignorée(s) (indicateur ou niveau inconnu, cible non numérique)",
+                       path, int((~valid).sum()))
+    return targets[valid].drop_duplicates(_KEYS, keep="last").reset_index(drop=True)
+
+
+def compute_progress(cube, targets, indicators):
+    """Cible, réalisé (toutes périodes), atteinte en % et écart restant pour chaque ligne de `targets`."""
+    if targets.empty:
+        return pd.DataFrame(columns=PROGRESS_COLUMNS)
+    achieved = []
+    for level in targets["niveau"].unique():
+        values = indicators.compute_by(cube, ["organisation", LEVELS[level]])
+        values = values.rename_axis(index=["organisation", "lieu"], columns="indicateur").stack()
+        values = values.rename("realise").reset_index()
+        values["niveau"] = level
+        achieved.append(values)
+    achieved = pd.concat(achieved, ignore_index=True)
+    for column in ("organisation", "lieu"):
+        achieved[column] = achieved[column].astype(str)
+
+    progress = targets.merge(achieved, on=_KEYS, how="left")
+    progress["realise"] = progress["realise"].fillna(0)
+    progress["atteinte"] = progress["realise"] / progress["cible"].where(progress["cible"] > 0) * 100
+    progress["ecart"] = (progress["cible"] - progress["realise"]).clip(lower=0)
+    labels = {i.key: i.label for i in INDICATORS}
+    progress["libelle"] = progress["indicateur"].map(labels)
+    return progress[PROGRESS_COLUMNS]
+
+
+def select_progress(progress, organisation=None, places=None):
+    """Lignes des organisations choisies dont le lieu figure dans `places` ({niveau: lieux ou None})."""
+    mask = pd.Series(True, index=progress.index)
+    if organisation:
+        mask &= progress["organisation"].isin(organisation)
+    for level, values in (places or {}).items():
+        if values is not None:
+            mask &= (progress["niveau"] != level) | progress["lieu"].isin(list(values))
+    return progress[mask]
@@ -0,0 +1,149 @@
+"""Contrôle de qualité des soumissions : règles vectorisées, évaluées une fois par ingestion.
+
+Chaque règle est une expression sur des colonnes entières qui renvoie le masque des
+lignes en cause. Le rapport (positions des lignes par règle) est calculé à l'écriture
+de l'instantané et enregistré à côté de lui (`quality_path`) : l'affichage ne fait
+que relire ces positions, jamais réévaluer les règles.
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from tuma.indicators import section_rows
+from tuma.schema import TIME_COLUMN, UNREADABLE_TIME_COLUMN, counter_columns
+
+_META_KEY = b"tuma_quality"
+
+
+@dataclass(frozen=True)
+class Rule:
+    key: str
+    label: str
+    columns: tuple  # Colonnes utiles pour examiner les lignes en cause
+    check: Callable  # DataFrame -> masque (ndarray booléen) des lignes en cause
+
+
+def _floats(values):
+    # Entiers nullables -> float64 (manquant : NaN), pour des comparaisons NumPy directes
+    return values.to_numpy(dtype="float64", na_value=np.nan)
+
+
+def _exceeds(key, column, limit):
+    def check(df):
+        return _floats(df[column]) > _floats(df[limit])  # NaN : jamais en cause
+    return Rule(key, f"{column.split('/')[-1]} supérieur à {limit.split('/')[-1]}", (limit, column), check)
+
+
+def _total_matches(total, bands):
+    def check(df):
+        values = np.column_stack([_floats(df[c]) for c in bands])
+        expected = _floats(df[total])
+        filled = ~np.isnan(values).all(axis=1) & ~np.isnan(expected)
+        return filled & (np.nansum(values, axis=1) != expected)
+    return Rule(f"somme_{total.split('/')[-1]}", f"{total.split('/')[-1]} différent de la somme des tranches d'âge",
+                (*bands, total), check)
+
+
+def _ist_rules():
+    # Lignes de tuiles des IST : chaque total ("Total") est la somme des tranches de son groupe
+    rules = []
+    for _, row in section_rows(8):
+        bands = [c for i in row if i.label != "Total" for c in i.columns]
+        for total in next(i for i in row if i.label == "Total").columns:
+            group = total.rsplit("/", 1)[0] + "/"
+            rules.append(_total_matches(total, tuple(c for c in bands if c.startswith(group))))
+    return rules
+
+
+def _negative(df):
+    columns = [c for c in counter_columns(df.columns) if pd.api.types.is_signed_integer_dtype(df[c].dtype)
+               or pd.api.types.is_float_dtype(df[c].dtype)]
+    mask = np.zeros(len(df), dtype=bool)
+    for column in columns:
+        mask |= _floats(df[column]) < 0
+    return mask
+
+
+def _future_time(df):
+    times = df[TIME_COLUMN]
+    return (times > pd.Timestamp.now(tz=times.dt.tz)).to_numpy(dtype=bool)
+
+
+def _unreadable_time(df):
+    return df[UNREADABLE_TIME_COLUMN].notna().to_numpy(dtype=bool)
+
+
+RULES = [
+    _exceeds("effectif_fin_superieur", "Information_groupe/Effectif_fin", "Information_groupe/Effectif_debut"),
+    *_ist_rules(),
+    Rule("compteur_negatif", "Compteur négatif", (), _negative),
+    Rule("time_futur", "Date de rapportage dans le futur", (TIME_COLUMN,), _future_time),
+    Rule("time_illisible", "Date de rapportage illisible (ignorée)", (UNREADABLE_TIME_COLUMN,), _unreadable_time),
+]
+
+
+def _applicable(rule, df):
+    return set(rule.columns) <= set(df.columns)
+
+
+class QualityReport:
+    """Positions (triées) des lignes en cause pour chaque règle, pour une version des données."""
+
+    def __init__(self, rows, version=None):
+        self.rows = rows  # clé de règle -> ndarray d'entiers
+        self.version = version
+
+    def violations(self, rule, selected=None):
+        """Positions des lignes en cause pour `rule`, restreintes aux positions triées `selected`."""
+        rows = self.rows.get(rule.key, np.empty(0, dtype=np.int64))
+        if selected is None:
+            return rows
+        if not len(selected) or not len(rows):
+            return rows[:0]
+        found = np.searchsorted(selected, rows).clip(max=len(selected) - 1)
+        return rows[selected[found] == rows]
+
+    def summary(self, selected=None):
+        """Nombre de lignes en cause par règle (sur la sélection `selected` si elle est fournie)."""
+        return pd.DataFrame({
+            "Règle": [rule.label for rule in RULES],
+            "Lignes en cause": [len(self.violations(rule, selected)) for rule in RULES],
+        })
+
+
+def validate(df):
+    """Évalue toutes les règles applicables sur `df` (jeu typé) ; une expression vectorisée par règle."""
+    rows = {rule.key: np.flatnonzero(rule.check(df)) for rule in RULES if _applicable(rule, df)}
+    return QualityReport(rows, df.attrs.get("version"))
+
+
+def quality_path(snapshot):
+    return snapshot.with_name(snapshot.stem + ".qualite.parquet")
+
+
+def write_quality(report, path):
+    rules = [key for key, rows in report.rows.items() for _ in rows]
+    table = pa.table({
+        "regle": pa.array(rules, pa.string()).dictionary_encode(),
+        "ligne": pa.array(np.concatenate([np.empty(0, np.int64), *report.rows.values()]), pa.int64()),
+    })
+    table = table.replace_schema_metadata({_META_KEY: str(report.version).encode()})
+    tmp_path = path.with_suffix(".tmp")
+    pq.write_table(table, tmp_path)
+    tmp_path.replace(path)
+
+
+def read_quality(path, version):
+    """Rapport enregistré pour `version`, ou None s'il est absent ou d'une autre version."""
+    if version is None or not path.exists():
+        return None
+    table = pq.read_table(path)
+    if (table.schema.metadata or {}).get(_META_KEY) != str(version).encode():
+        return None
+    lines = table.to_pandas()
+    rows = {rule: group["ligne"].to_numpy() for rule, group in lines.groupby("regle", observed=True)}
+    return QualityReport(rows, version)
@@ -0,0 +1,118 @@
+"""Actualisation des données en arrière-plan ("stale-while-revalidate").
+
+Les lecteurs obtiennent toujours le moteur courant (données et structures
+dérivées d'une même version). Pendant qu'un fil d'arrière-plan interroge la
+source et reconstruit les structures dérivées, l'ancienne version reste
+servie ; la nouvelle la remplace d'un seul coup lorsqu'elle est prête.
+"""
+import logging
+import threading
+from datetime import datetime, timezone
+
+from tuma import config
+from tuma.dataset import refresh_dataset, snapshot_path, sync_dataset
+from tuma.dedup import DedupIndex
+from tuma.engine import DashboardEngine
+from tuma.precompute import precompute
+from tuma.snapshot import read_snapshot
+from tuma.sources import configured_sources
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundRefresher:
+    """Détient la version courante des données et la renouvelle périodiquement.
+
+    `interval` : secondes entre deux actualisations ; 0 ou moins pour n'actualiser
+    que sur demande (`refresh_now`). `warm(engine)` est appelé dans le fil
+    d'arrière-plan pour chaque version publiée (précalcul des résultats).
+    """
+
+    def __init__(self, interval=None, sources=None, build=DashboardEngine, warm=precompute):
+        self.interval = config.REFRESH_MINUTES * 60 if interval is None else interval
+        self.sources = sources or configured_sources()
+        self.build = build
+        self.warm = warm
+        self.last_refresh = None
+        self.last_error = None
+        # Index de déduplication, prolongé à chaque actualisation (construit à la première)
+        self.dedup = DedupIndex()
+        self._engine = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Charge l'instantané local (ou la source, au premier démarrage) puis lance le fil."""
+        data = read_snapshot(snapshot_path())
+        if data is None:
+            data, _ = refresh_dataset(None, self.sources, self.dedup)
+            self.last_refresh = datetime.now(timezone.utc)
+        self._engine = self.build(data)
+        self._thread = threading.Thread(target=self._run, name="tuma-refresh", daemon=True)
+        self._thread.start()
+        return self
+
+    def current(self):
+        """Moteur de la version courante ; à lire une seule fois par exécution du script."""
+        return self._engine
+
+    def refresh_now(self):
+        """Demande une actualisation immédiate, sans attendre qu'elle se termine."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def refresh_once(self):
+        """Interroge la source ; renvoie True si une nouvelle version a été publiée."""
+        current = self._engine
+        data, appended, removed = sync_dataset(current.data, self.sources, self.dedup)
+        self.last_refresh = datetime.now(timezone.utc)
+        if appended is not None and appended.empty:
+            return False
+        # Structures dérivées construites avant l'échange : les lecteurs ne voient jamais
+        # une version à moitié construite. Ajout de soumissions (et retrait des versions
+        # qu'elles remplacent) : le cube et les séries dérivées sont prolongés au lieu
+        # d'être recalculés sur tout l'historique
+        extend = getattr(current, "extend", None)
+        if appended is None or extend is None:
+            self._engine = self.build(data)
+        else:
+            self._engine = extend(data, appended, removed)
+        # Résultats de l'ancienne version retirés du cache partagé (ceux qu'une session encore
+        # servie par l'ancien moteur y remettrait sont évincés normalement)
+        cache = getattr(self._engine, "cache", None)
+        if cache is not None:
+            cache.retain(self._engine.version)
+        self._warm()
+        return True
+
+    def _warm(self):
+        if self.warm is None:
+            return
+        try:
+            self.warm(self._engine)
+        except Exception:
+            # Sans précalcul, les résultats sont simplement calculés à la demande
+            logger.exception("Précalcul des résultats impossible")
+
+    def _sleep(self):
+        self._wake.wait(self.interval if self.interval > 0 else None)
+        self._wake.clear()
+
+    def _run(self):
+        self._warm()
+        # Démarrage depuis l'instantané : revalidation immédiate ; sinon la source vient d'être lue
+        if self.last_refresh is not None:
+            self._sleep()
+        while not self._stop.is_set():
+            try:
+                self.refresh_once()
+                self.last_error = None
+            except Exception as error:
+                # Source injoignable : la version courante continue d'être servie
+                logger.exception("Actualisation des données impossible")
+                self.last_error = error
+            self._sleep()
@@ -0,0 +1,141 @@
+"""Rapports par organisation et par province (HTML/XLSX), générés en parallèle sans navigateur.
+
+Exemple, rapports du mois de mai 2024 pour tous les partenaires :
+
+    python -m tuma.report --periode 2024-05 --format html xlsx --sortie rapports/
+"""
+import argparse
+import html
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from tuma import config, enable_copy_on_write
+from tuma.dataset import refresh_dataset, snapshot_path
+from tuma.engine import DashboardEngine
+from tuma.indicators import SECTIONS, format_value, section_rows, visible_sections
+from tuma.snapshot import read_snapshot
+
+ORGANISATIONS = ("ADJ", "CARE", "PARDE", "SARCAF")
+FORMATS = ("html", "xlsx")
+
+# Moteur propre à chaque processus de travail, construit une seule fois par processus
+_engine = None
+
+
+def _init_worker(path, organisations=None, months=None):
+    global _engine
+    # Seules les partitions des organisations et du mois demandés sont lues
+    _engine = DashboardEngine(read_snapshot(path, organisation=organisations, periode=months), cache=None)
+
+
+def _slug(value):
+    return re.sub(r"[^A-Za-z0-9_-]+", "-", str(value)).strip("-") or "tout"
+
+
+def _sheet_name(value):
+    # Excel refuse \ / ? * [ ] : dans un nom de feuille, limité à 31 caractères
+    return re.sub(r"[\\/?*\[\]:]", "-", str(value))[:31]
+
+
+def report_tables(engine, organisation, province=None, periode=None):
+    """Tableaux d'un rapport : liste de (titre de section, indicateurs, séries mensuelles)."""
+    results = engine.compute(
+        organisation=[organisation],
+        province=[province] if province else None,
+        periode=[pd.Period(periode, freq="M")] if periode else None,
+    )
+    tables = []
+    for number in visible_sections([organisation]):
+        indicators = [i for _, row in section_rows(number) for i in row]
+        totals = pd.DataFrame({
+            "Indicateur": [i.label for i in indicators],
+            "Valeur": [format_value(i, results[i.key]) for i in indicators],
+        })
+        monthly = results.timeline([i.key for i in indicators])
+        monthly.columns = ["Mois"] + [i.label for i in indicators]
+        tables.append((SECTIONS[number].title, totals, monthly))
+    return tables
+
+
+def _title(organisation, province, periode):
+    return f"TUMA PLUS - {organisation} - {province or 'Toutes les provinces'} - {periode or 'Toute la période'}"
+
+
+def write_html(path, title, tables):
+    parts = [f"<html><head><meta charset='utf-8'><title>{html.escape(title)}</title></head><body>",
+             f"<h1>{html.escape(title)}</h1>"]
+    for section, totals, monthly in tables:
+        parts.append(f"<h2>{html.escape(section)}</h2>")
+        parts.append(totals.to_html(index=False))
+        parts.append(monthly.to_html(index=False))
+    parts.append("</body></html>")
+    path.write_text("\n".join(parts), encoding="utf-8")
+
+
+def write_xlsx(path, title, tables):
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        pd.DataFrame({"Rapport": [title]}).to_excel(writer, sheet_name="Rapport", index=False)
+        for section, totals, monthly in tables:
+            sheet = _sheet_name(section)
+            totals.to_excel(writer, sheet_name=sheet, index=False)
+            monthly.to_excel(writer, sheet_name=sheet, index=False, startcol=3)
+
+
+def render_report(organisation, province, periode, formats, output_dir):
+    """Écrit le rapport d'une organisation (et d'une province) ; renvoie les fichiers créés."""
+    title = _title(organisation, province, periode)
+    tables = report_tables(_engine, organisation, province, periode)
+    stem = "_".join([_slug(organisation), _slug(province or "toutes-provinces"), _slug(periode or "toute-periode")])
+    written = []
+    for fmt in formats:
+        path = Path(output_dir) / f"{stem}.{fmt}"
+        (write_html if fmt == "html" else write_xlsx)(path, title, tables)
+        written.append(path)
+    return written
+
+
+def report_jobs(data, organisations, periode):
+    """Un rapport par organisation, plus un par province où l'organisation a des données."""
+    jobs = []
+    for organisation in organisations:
+        jobs.append((organisation, None, periode))
+        provinces = data.loc[data["organisation"] == organisation, "Province"].dropna().unique()
+        jobs.extend((organisation, province, periode) for province in sorted(provinces))
+    return jobs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--organisation", nargs="+", default=list(ORGANISATIONS), choices=ORGANISATIONS)
+    parser.add_argument("--periode", help="Mois de rapportage (AAAA-MM) ; par défaut toute la période")
+    parser.add_argument("--format", nargs="+", default=list(FORMATS), choices=FORMATS)
+    parser.add_argument("--sortie", default="rapports", help="Dossier des rapports")
+    parser.add_argument("--processus", type=int, default=None, help="Nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument("--hors-ligne", action="store_true", help="Utiliser l'instantané local sans interroger Kobo")
+    args = parser.parse_args(argv)
+    enable_copy_on_write()
+
+    path = snapshot_path()
+    months = [args.periode] if args.periode else None
+    data = read_snapshot(path, organisation=args.organisation, periode=months) if args.hors_ligne else None
+    if data is None:
+        data, _ = refresh_dataset(None if args.hors_ligne else read_snapshot(path))
+
+    output_dir = Path(args.sortie)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    jobs = report_jobs(data, args.organisation, args.periode)
+    with ProcessPoolExecutor(max_workers=args.processus, initializer=_init_worker,
+                             initargs=(path, args.organisation, months)) as pool:
+        futures = [pool.submit(render_report, *job, args.format, output_dir) for job in jobs]
+        for future in futures:
+            for written in future.result():
+                print(written)
+    forms = ", ".join(str(spec["form"]) for spec in config.KOBO_SOURCES)
+    print(f"{len(jobs)} rapport(s) pour le(s) formulaire(s) {forms}")
+
+
+if __name__ == "__main__":
+    main()
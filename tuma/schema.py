@@ -0,0 +1,176 @@
+"""Schéma explicite et compact des colonnes lues par le tableau de bord.
+
+    python -m tuma.schema soumissions.xlsx   # octets par colonne avant / après typage
+"""
+import argparse
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# Incrémenter lorsque le schéma change : les instantanés plus anciens sont alors ignorés
+SCHEMA_VERSION = 4
+
+TIME_COLUMN = "time"
+PERIOD_COLUMN = "Période"  # Mois de rapportage, dérivé de `time`
+# Texte d'origine des valeurs de `time` illisibles (devenues manquantes au typage)
+UNREADABLE_TIME_COLUMN = "time_illisible"
+LABEL_COLUMNS = ["organisation", "Province", "Zone_sante", "Aire_sante"]
+
+# Groupes du formulaire dont tous les champs sont des compteurs
+COUNTER_PREFIXES = (
+    "Information_groupe/",
+    "totalcase",
+    "VBG/",
+    "CPN/",
+    "accouchement_naissance/",
+    "deces_accouchements/",
+    "acceptante/",
+    "communication_changement_comportement/",
+    "IST/",
+)
+# Champs à choix unique codés : valeurs admises (toute autre valeur devient manquante)
+CODE_VALUES = {"Statut_group": (1, 2, 3, 4)}
+CODE_COLUMNS = list(CODE_VALUES)
+
+# Texte libre (identifiants, noms de groupes...) : chaînes Arrow, plus compactes que les objets Python
+TEXT_DTYPE = pd.StringDtype("pyarrow")
+
+# Entiers nullables candidats pour les compteurs, du plus petit au plus grand
+_UNSIGNED = ("UInt8", "UInt16", "UInt32", "UInt64")
+_SIGNED = ("Int8", "Int16", "Int32", "Int64")
+
+
+def is_counter(column):
+    return column.startswith(COUNTER_PREFIXES)
+
+
+def counter_columns(columns):
+    return [c for c in columns if is_counter(c)]
+
+
+def type_columns(df):
+    """Type en place la date et les compteurs de `df`, sans toucher aux libellés.
+
+    Applicable page par page : les catégories des libellés ne sont fixées qu'une
+    fois, sur le jeu complet, par `apply_schema`.
+    """
+    if TIME_COLUMN in df.columns and not pd.api.types.is_datetime64_any_dtype(df[TIME_COLUMN]):
+        raw = df[TIME_COLUMN]
+        parsed = pd.to_datetime(raw, errors="coerce")
+        unreadable = parsed.isna() & raw.notna() & (raw.astype(str).str.strip() != "")
+        if unreadable.any():
+            # Conservées pour le contrôle de qualité : sinon la date disparaît sans trace
+            df[UNREADABLE_TIME_COLUMN] = raw.astype(str).where(unreadable)
+        df[TIME_COLUMN] = parsed
+    for column in counter_columns(df.columns) + [c for c in CODE_COLUMNS if c in df.columns]:
+        dtype = df[column].dtype
+        if not pd.api.types.is_numeric_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype):
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+    return df
+
+
+def reporting_period(df):
+    """Mois de rapportage de chaque soumission (la colonne `time` est typée à l'ingestion)."""
+    return df[TIME_COLUMN].dt.to_period("M").rename(PERIOD_COLUMN)
+
+
+def compact_counter(values):
+    """Plus petit entier nullable (non signé si possible) contenant `values`.
+
+    Une colonne aux valeurs non entières reste telle quelle (float64).
+    """
+    array = values.to_numpy(dtype="float64", na_value=np.nan)
+    missing = np.isnan(array)
+    present = array[~missing]
+    if present.size and (present % 1 != 0).any():
+        return values
+    low, high = (present.min(), present.max()) if present.size else (0, 0)
+    for name in _UNSIGNED if low >= 0 else _SIGNED:
+        info = np.iinfo(name.lower())
+        if info.min <= low and high <= info.max:
+            # Construction directe (données + masque) : bien plus rapide que `astype`
+            data = np.where(missing, 0, array).astype(name.lower())
+            return pd.Series(pd.arrays.IntegerArray(data, missing), index=values.index, name=values.name)
+    return values
+
+
+def apply_schema(df):
+    """Renvoie une copie de `df` aux types compacts (date, libellés, compteurs, codes)."""
+    df = type_columns(df.copy())
+    for column in LABEL_COLUMNS:
+        if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("string").astype("category")
+    for column in counter_columns(df.columns):
+        df[column] = compact_counter(df[column])
+    # Colonnes restantes hétérogènes (texte et nombres mêlés) : stockées en texte
+    for column in df.columns[(df.dtypes == object) | (df.dtypes == "string")]:
+        df[column] = df[column].astype(TEXT_DTYPE)
+    return restore_dtypes(df)
+
+
+def restore_dtypes(df):
+    """Types que Parquet ne conserve pas : champs codés en catégories à valeurs fixes."""
+    for column, values in CODE_VALUES.items():
+        if column in df.columns:
+            df[column] = df[column].astype(pd.CategoricalDtype(values))
+    return df
+
+
+def arrow_schema(df):
+    """Schéma Arrow explicite pour un DataFrame passé par `apply_schema`."""
+    inferred = pa.Schema.from_pandas(df, preserve_index=False)
+    fields = []
+    for field in inferred:
+        if field.name == TIME_COLUMN:
+            field = pa.field(field.name, pa.timestamp("ns"))
+        elif field.name in LABEL_COLUMNS:
+            field = pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
+        elif field.name in CODE_COLUMNS:
+            field = pa.field(field.name, pa.dictionary(pa.int8(), pa.int64()))
+        elif is_counter(field.name):
+            dtype = df[field.name].dtype
+            field = pa.field(field.name, pa.from_numpy_dtype(getattr(dtype, "numpy_dtype", dtype)))
+        fields.append(field)
+    return pa.schema(fields, metadata=inferred.metadata)
+
+
+def memory_report(before, after):
+    """Type et octets occupés par colonne, avant et après `apply_schema`."""
+    report = pd.DataFrame({
+        "type_avant": before.dtypes.astype(str),
+        "octets_avant": before.memory_usage(deep=True, index=False),
+        "type_apres": after.dtypes.astype(str),
+        "octets_apres": after.memory_usage(deep=True, index=False),
+    }).rename_axis("colonne")
+    report["facteur"] = (report["octets_avant"] / report["octets_apres"]).round(1)
+    return report.sort_values("octets_avant", ascending=False)
+
+
+def log_memory_report(before, after):
+    report = memory_report(before, after)
+    total_before, total_after = report["octets_avant"].sum(), report["octets_apres"].sum()
+    logger.info("Typage compact : %.1f Mo -> %.1f Mo (x%.1f)", total_before / 2**20, total_after / 2**20,
+                total_before / max(total_after, 1))
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Octets par colonne avant et après typage compact")
+    parser.add_argument("fichier", help="Export XLSX, CSV ou Parquet des soumissions")
+    args = parser.parse_args(argv)
+    path = Path(args.fichier)
+    readers = {".xlsx": pd.read_excel, ".csv": pd.read_csv, ".parquet": pd.read_parquet}
+    before = readers[path.suffix.lower()](path)
+    report = memory_report(before, apply_schema(before))
+    with pd.option_context("display.max_rows", None, "display.width", 200):
+        print(report.to_string())
+    print(f"Total : {report['octets_avant'].sum() / 2**20:.1f} Mo -> {report['octets_apres'].sum() / 2**20:.1f} Mo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Instantané Parquet typé des soumissions, pour un démarrage à chaud rapide."""
+import json
+import logging
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from tuma.partitions import matching_partitions, partition_table
+from tuma.quality import quality_path, validate, write_quality
+from tuma.schema import SCHEMA_VERSION, TEXT_DTYPE, apply_schema, arrow_schema, log_memory_report, restore_dtypes
+
+_META_KEY = b"tuma"
+
+
+def write_snapshot(df, path, source_state=None, duplicates=None):
+    """Écrit `df` typé dans `path` (remplacement atomique) et renvoie le DataFrame typé.
+
+    `df` est rangé par partition (`sort_partitions`) : chaque partition organisation ×
+    mois est écrite dans son propre groupe de lignes, listé dans les métadonnées.
+
+    `duplicates` : nombre de doublons écartés par clé de déduplication, conservé dans
+    les métadonnées (`df.attrs["doublons"]`).
+
+    Les règles de qualité sont évaluées au passage ; leur rapport est écrit à côté
+    de l'instantané (`quality_path`), pour la même version.
+    """
+    typed = apply_schema(df)
+    if logging.getLogger("tuma.schema").isEnabledFor(logging.INFO):
+        log_memory_report(df, typed)
+    df = typed
+    schema = arrow_schema(df)
+    meta = {
+        "schema_version": SCHEMA_VERSION,
+        "written_at": datetime.now(timezone.utc).isoformat(),
+        "source": source_state or {},
+        "doublons": duplicates or {},
+        "partitions": partition_table(df),
+    }
+    schema = schema.with_metadata({**(schema.metadata or {}), _META_KEY: json.dumps(meta).encode()})
+    table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with pq.ParquetWriter(tmp_path, table.schema) as writer:
+        start = 0
+        for _, _, size in meta["partitions"]:
+            writer.write_table(table.slice(start, size), row_group_size=size)
+            start += size
+    report = validate(df)
+    report.version = meta["written_at"]
+    write_quality(report, quality_path(path))
+    tmp_path.replace(path)
+    df.attrs["version"] = meta["written_at"]
+    df.attrs["doublons"] = meta["doublons"]
+    return df
+
+
+def snapshot_metadata(path):
+    """Métadonnées de l'instantané, ou None s'il est absent ou d'un autre schéma."""
+    if not path.exists():
+        return None
+    raw = (pq.read_schema(path).metadata or {}).get(_META_KEY)
+    if raw is None:
+        return None
+    meta = json.loads(raw)
+    if meta.get("schema_version") != SCHEMA_VERSION:
+        return None
+    return meta
+
+
+def read_snapshot(path, organisation=None, periode=None):
+    """Relit l'instantané, ou None s'il est absent ou périmé.
+
+    `df.attrs["version"]` identifie la version des données (date d'écriture) et
+    sert de clé aux structures dérivées (cube, index de filtrage...).
+    `organisation` et `periode` (mois) : seules les partitions retenues sont lues ; le
+    jeu partiel reçoit alors une version distincte de celle du jeu complet.
+    """
+    meta = snapshot_metadata(path)
+    if meta is None:
+        return None
+    text = {pa.string(): TEXT_DTYPE, pa.large_string(): TEXT_DTYPE}
+    version = meta["written_at"]
+    if organisation or periode:
+        groups = matching_partitions(meta["partitions"], organisation, periode)
+        table = pq.ParquetFile(path).read_row_groups(groups)
+        version = json.dumps([version, sorted(map(str, organisation or [])), sorted(map(str, periode or []))])
+    else:
+        table = pq.read_table(path)
+    df = restore_dtypes(table.to_pandas(types_mapper=text.get))
+    df.attrs["version"] = version
+    df.attrs["doublons"] = meta.get("doublons", {})
+    return df
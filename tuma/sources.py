@@ -0,0 +1,109 @@
+"""Formulaires sources du consortium : récupération parallèle et fusion en un seul jeu de données."""
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from tuma import config
+from tuma.kobo import KoboClient
+from tuma.store import SubmissionStore, sync_submissions
+
+logger = logging.getLogger(__name__)
+
+# Formulaire d'origine de chaque soumission : les `_id` ne sont uniques qu'au sein d'un formulaire
+SOURCE_COLUMN = "_form"
+KEY_COLUMNS = [SOURCE_COLUMN, "_id"]
+
+
+class FormSource:
+    """Un formulaire Kobo et son magasin local.
+
+    `organisation` renseigne la colonne "organisation" des formulaires propres à un
+    partenaire ; `columns` renomme les champs qui diffèrent du formulaire du consortium ;
+    `timeout` (secondes) s'applique à chaque requête vers ce formulaire.
+    """
+
+    def __init__(self, form, organisation=None, server=None, token=None, timeout=None, columns=None,
+                 directory=None, client=None):
+        self.form_id = str(form)
+        self.organisation = organisation
+        self.columns = dict(columns or {})
+        self.store = SubmissionStore(directory, form_id=self.form_id)
+        self.client = client or KoboClient(server, token, timeout)
+        self.last_error = None
+
+    def __repr__(self):
+        return f"FormSource({self.form_id!r}, organisation={self.organisation!r})"
+
+    def sync(self):
+        """Nouvelles soumissions du formulaire (DataFrame), ajoutées au magasin local."""
+        return self.normalize(sync_submissions(self.store, self.client))
+
+    def normalize(self, df):
+        """Aligne les colonnes du formulaire sur celles attendues par les filtres et les sections."""
+        df = df.rename(columns=self.columns)
+        if self.organisation is not None:
+            if "organisation" in df.columns:
+                df["organisation"] = df["organisation"].fillna(self.organisation)
+            else:
+                df["organisation"] = self.organisation
+        df[SOURCE_COLUMN] = self.form_id
+        return df
+
+    def load_frame(self):
+        return self.normalize(self.store.load_frame())
+
+    def read_xlsx(self):
+        return self.normalize(pd.read_excel(io.BytesIO(self.client.export_xlsx(self.form_id))))
+
+
+def configured_sources(directory=None):
+    """Formulaires déclarés dans `config.KOBO_SOURCES`."""
+    return [FormSource(directory=directory, **spec) for spec in config.KOBO_SOURCES]
+
+
+def _run_all(sources, task):
+    """Exécute `task(source)` pour toutes les sources en parallèle ; renvoie {source: résultat}.
+
+    Un formulaire en échec est journalisé (`source.last_error`) et absent du résultat :
+    les autres sont tout de même fusionnés. Si tous échouent, la première erreur est
+    propagée (et journalisée par l'appelant), les suivantes sont journalisées ici.
+    """
+    results = {}
+    errors = []
+    with ThreadPoolExecutor(max_workers=len(sources), thread_name_prefix="tuma-source") as pool:
+        futures = {pool.submit(task, source): source for source in sources}
+        for future, source in futures.items():
+            try:
+                results[source] = future.result()
+                source.last_error = None
+            except Exception as error:
+                source.last_error = error
+                errors.append((source, error))
+    # Chaque échec n'est journalisé qu'une fois
+    for source, error in errors[1:] if errors and not results else errors:
+        logger.error("Formulaire %s injoignable", source.form_id, exc_info=error)
+    if errors and not results:
+        raise errors[0][1]
+    return results
+
+
+def sync_sources(sources):
+    """Synchronise tous les formulaires en parallèle ; renvoie {source: DataFrame des nouvelles soumissions}."""
+    return _run_all(sources, FormSource.sync)
+
+
+def read_xlsx_sources(sources):
+    """Exports XLSX complets de tous les formulaires, téléchargés en parallèle."""
+    return _run_all(sources, FormSource.read_xlsx)
+
+
+def merge_frames(frames):
+    """Concatène des soumissions de plusieurs formulaires ; une ligne par (formulaire, `_id`)."""
+    frames = [df for df in frames if not df.empty]
+    if not frames:
+        return pd.DataFrame()
+    df = pd.concat(frames, ignore_index=True)
+    keys = [column for column in KEY_COLUMNS if column in df.columns]
+    return df.drop_duplicates(keys, keep="last").sort_values(keys, ignore_index=True)
@@ -0,0 +1,105 @@
+"""Magasin local des soumissions Kobo et synchronisation incrémentale."""
+import json
+import threading
+from pathlib import Path
+
+from tuma import config
+from tuma.kobo import KoboClient, chunks_to_frame, submissions_to_frame
+
+# Une seule synchronisation à la fois par magasin (plusieurs sessions Streamlit) ;
+# des formulaires différents se synchronisent en parallèle
+_sync_locks = {}
+_sync_locks_guard = threading.Lock()
+
+
+def _sync_lock(store):
+    with _sync_locks_guard:
+        return _sync_locks.setdefault(store.directory.resolve(), threading.Lock())
+
+
+class SubmissionStore:
+    """Soumissions brutes en JSON lignes, avec l'état de la dernière synchronisation.
+
+    Le fichier n'est jamais réécrit : les nouvelles soumissions sont ajoutées à la fin
+    (si un même `_id` y figure plusieurs fois, la dernière version l'emporte au chargement).
+
+    La synchronisation ne demande que les `_id` supérieurs au dernier connu : une
+    soumission modifiée sur le serveur après avoir été synchronisée garde son `_id` et
+    n'est donc pas récupérée. Pour reprendre ces modifications, supprimer le dossier du
+    formulaire (nouveau téléchargement complet) ou utiliser le mode "xlsx".
+    """
+
+    def __init__(self, directory=None, form_id=None):
+        self.form_id = str(form_id or config.KOBO_FORM_ID)
+        self.directory = Path(directory or config.DATA_DIR) / self.form_id
+        self.records_path = self.directory / "submissions.jsonl"
+        self.state_path = self.directory / "state.json"
+
+    def state(self):
+        if not self.state_path.exists():
+            return {"last_id": None, "last_submission_time": None, "count": 0}
+        return json.loads(self.state_path.read_text(encoding="utf-8"))
+
+    def append(self, records):
+        """Ajoute des soumissions au magasin et met à jour l'état."""
+        if not records:
+            return self.state()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with self.records_path.open("a", encoding="utf-8") as handle:
+            for record in records:
+                handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        state = self.state()
+        last = max(records, key=lambda r: r.get("_id", 0))
+        if state["last_id"] is None or last.get("_id", 0) > state["last_id"]:
+            state["last_id"] = last.get("_id")
+            state["last_submission_time"] = last.get("_submission_time")
+        state["count"] += len(records)
+        # Écriture atomique : un état partiel ferait re-télécharger ou sauter des soumissions
+        tmp_path = self.state_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(state), encoding="utf-8")
+        tmp_path.replace(self.state_path)
+        return state
+
+    def iter_pages(self, size=None):
+        """Soumissions du magasin par paquets de `size` (par défaut la taille de page de l'API)."""
+        if not self.records_path.exists():
+            return
+        size = size or config.PAGE_SIZE
+        page = []
+        with self.records_path.open(encoding="utf-8") as handle:
+            for line in handle:
+                if line.strip():
+                    page.append(json.loads(line))
+                if len(page) >= size:
+                    yield page
+                    page = []
+        if page:
+            yield page
+
+    def load_frame(self):
+        """Toutes les soumissions du magasin, une ligne par `_id` (dernière version).
+
+        Converties paquet par paquet : seul un paquet de JSON brut est en mémoire à la fois.
+        """
+        return chunks_to_frame(submissions_to_frame(page) for page in self.iter_pages())
+
+
+def sync_submissions(store=None, client=None):
+    """Récupère les soumissions postérieures au dernier `_id` connu et les ajoute au magasin.
+
+    Chaque page est convertie en colonnes typées dès son arrivée, pendant que la
+    suivante se télécharge : la mémoire occupée par le JSON brut dépend de la taille
+    de page, pas du nombre de soumissions. Renvoie le DataFrame des soumissions
+    récupérées (vide s'il n'y en a aucune).
+    """
+    store = store or SubmissionStore()
+    client = client or KoboClient()
+    with _sync_lock(store):
+        since_id = store.state()["last_id"]
+        chunks = []
+        # Ajout page par page : une interruption ne perd que la page en cours
+        for page in client.iter_pages(store.form_id, since_id=since_id):
+            store.append(page)
+            chunks.append(submissions_to_frame(page))
+    return chunks_to_frame(chunks)
+
@@ -0,0 +1,141 @@
+"""Générateur de soumissions Kobo synthétiques, à la structure exacte lue par le tableau de bord.
+
+Exemple, 100 000 soumissions au format de l'instantané :
+
+    python -m tuma.synthetic --lignes 100000 --sortie synthetique.parquet
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from tuma.cube import GROUP_COUNT, STATUT_CODES
+from tuma.indicators import INDICATORS
+
+# Hiérarchie géographique : province -> zone de santé -> nombre d'aires de santé
+GEOGRAPHY = {
+    "Sud-Kivu": {"Uvira": 22, "Fizi": 18, "Bukavu": 12, "Kadutu": 10, "Ibanda": 9, "Mwenga": 14, "Kabare": 16},
+    "Nord-Kivu": {"Goma": 11, "Karisimbi": 13, "Nyiragongo": 8, "Rutshuru": 20, "Beni": 17},
+    "Tanganyika": {"Kalemie": 19, "Nyemba": 12, "Moba": 15},
+}
+ORGANISATIONS = {"ADJ": 0.3, "CARE": 0.3, "PARDE": 0.2, "SARCAF": 0.2}
+CURSUS_ORGANISATIONS = ("PARDE", "SARCAF")
+
+# Colonnes brutes lues par les sections (les mesures dérivées du cube en sont exclues)
+_DERIVED = {GROUP_COUNT, *STATUT_CODES.values()}
+COUNTER_COLUMNS = sorted({c for i in INDICATORS for c in i.columns} - _DERIVED)
+CURSUS_COLUMNS = [c for c in COUNTER_COLUMNS if c.startswith("Information_groupe/")]
+HEALTH_COLUMNS = [c for c in COUNTER_COLUMNS if c not in CURSUS_COLUMNS]
+
+# Totaux saisis dans le formulaire, égaux à la somme de leurs tranches d'âge
+TOTALS = {
+    "IST/Nouv_feminY7/TotNouvCaseF": ["IST/Nouv_feminY7/infer15Y7", "IST/Nouv_feminY7/quinze_24Y7", "IST/Nouv_feminY7/Vingt5Y7"],
+    "IST/Nouv_feminZ/TotNouvCaseM": ["IST/Nouv_feminZ/infer15YZ", "IST/Nouv_feminZ/quinze_24YZ", "IST/Nouv_feminZ/Vingt5YZ"],
+    "IST/Nouv_femin/TotalCasContactIST_F": ["IST/Nouv_femin/infer15", "IST/Nouv_femin/quinze_24", "IST/Nouv_femin/Vingt5"],
+    "IST/Nouv_garc/TotalCasContactIST_M": ["IST/Nouv_garc/infer151", "IST/Nouv_garc/quinze_241", "IST/Nouv_garc/Vingt51"],
+    "IST/contacts_new_case1/totalCasTraiteSyndromeF": [
+        "IST/contacts_new_case1/infer154", "IST/contacts_new_case1/quinze_244", "IST/contacts_new_case1/Vingt54"],
+    "IST/contacts_new_case/totalCasTraiteSyndromeM": [
+        "IST/contacts_new_case/infer153", "IST/contacts_new_case/quinze_243", "IST/contacts_new_case/Vingt53"],
+    "IST/contacts_new_caseY/overall3L": [
+        "IST/contacts_new_caseY/infer153L", "IST/contacts_new_caseY/quinze_243L", "IST/contacts_new_caseY/Vingt53L"],
+    "IST/contacts_new_caseR/overall3R": [
+        "IST/contacts_new_caseR/infer153R", "IST/contacts_new_caseR/quinze_243R", "IST/contacts_new_caseR/Vingt53R"],
+}
+
+
+def _aires():
+    rows = []
+    for province, zones in GEOGRAPHY.items():
+        for zone, count in zones.items():
+            rows.extend((province, zone, f"{zone} {k:02d}") for k in range(1, count + 1))
+    return pd.DataFrame(rows, columns=["Province", "Zone_sante", "Aire_sante"])
+
+
+def generate_frame(rows, seed=0, start_id=1, start_month="2023-01", months=24):
+    """DataFrame de `rows` soumissions, comme lu depuis l'export XLSX (compteurs en float64).
+
+    Les organisations PARDE et SARCAF ne renseignent que le cursus, ADJ et CARE
+    que les indicateurs de santé ; les autres champs restent vides.
+    """
+    rng = np.random.default_rng(seed)
+    aires = _aires()
+    geo = aires.iloc[rng.integers(0, len(aires), rows)].reset_index(drop=True)
+    organisation = rng.choice(list(ORGANISATIONS), size=rows, p=list(ORGANISATIONS.values()))
+    cursus = np.isin(organisation, CURSUS_ORGANISATIONS)
+
+    month_starts = pd.period_range(start_month, periods=months, freq="M").to_timestamp()
+    time = month_starts[rng.integers(0, months, rows)] + pd.to_timedelta(rng.integers(0, 28, rows), unit="D")
+    ids = np.arange(start_id, start_id + rows)
+
+    df = pd.DataFrame({
+        "_id": ids,
+        "_uuid": [f"{seed:04x}-{i:012x}" for i in ids],
+        "_submission_time": (time + pd.to_timedelta(rng.integers(1, 72, rows), unit="h")).strftime("%Y-%m-%dT%H:%M:%S"),
+        "time": time,
+        "organisation": organisation,
+        "Province": geo["Province"],
+        "Zone_sante": geo["Zone_sante"],
+        "Aire_sante": geo["Aire_sante"],
+        "Nom_group": np.where(cursus, pd.Series(ids).map("Groupe {}".format), None),
+        "Statut_group": np.where(cursus, rng.integers(1, 5, rows), np.nan),
+    })
+
+    counters = {}
+    debut = rng.poisson(25, rows).astype("float64")
+    counters["Information_groupe/Effectif_debut"] = debut
+    counters["Information_groupe/Effectif_fin"] = debut - rng.binomial(debut.astype(np.int64), 0.15)
+    for column in HEALTH_COLUMNS:
+        if column not in TOTALS:
+            counters[column] = rng.poisson(rng.uniform(0.5, 12), rows).astype("float64")
+    for total, parts in TOTALS.items():
+        counters[total] = sum(counters[p] for p in parts)
+    for column in CURSUS_COLUMNS:
+        counters[column][~cursus] = np.nan
+    for column in HEALTH_COLUMNS:
+        counters[column][cursus] = np.nan
+    return pd.concat([df, pd.DataFrame(counters)[COUNTER_COLUMNS]], axis=1)
+
+
+def frame_to_records(df):
+    """Soumissions au format JSON de l'API Kobo (valeurs en texte, champs vides omis)."""
+    records = []
+    for row in df.to_dict("records"):
+        record = {}
+        for key, value in row.items():
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                continue
+            if key in ("_id",):
+                record[key] = int(value)
+            elif key == "time":
+                record[key] = value.strftime("%Y-%m-%d")
+            elif isinstance(value, float):
+                record[key] = str(int(value)) if value.is_integer() else str(value)
+            else:
+                record[key] = str(value)
+        records.append(record)
+    return records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lignes", type=int, default=10_000)
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--mois", type=int, default=24, help="Nombre de mois de rapportage couverts")
+    parser.add_argument("--sortie", required=True, help="Fichier .parquet, .xlsx ou .csv")
+    args = parser.parse_args(argv)
+
+    df = generate_frame(args.lignes, seed=args.graine, months=args.mois)
+    path = Path(args.sortie)
+    if path.suffix == ".parquet":
+        df.to_parquet(path, index=False)
+    elif path.suffix == ".xlsx":
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    print(f"{len(df)} soumissions écrites dans {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Tuiles des indicateurs : une seule grille HTML par section, sur une feuille de style partagée.
+
+Toutes les tuiles d'une section (titres de lignes compris) forment un seul élément
+Markdown, au lieu d'un élément (et d'un message au navigateur) par tuile, chacun avec
+son style en ligne. La feuille de style `KPI_STYLESHEET` est envoyée une fois par page.
+"""
+import html
+
+from tuma.indicators import format_value, section_rows
+
+KPI_STYLESHEET = """<style>
+.tuma-kpi-row {
+    display: grid;
+    grid-template-columns: repeat(var(--tuma-kpi-columns), minmax(0, 1fr));
+    gap: 1rem;
+    margin-bottom: 1rem;
+}
+.tuma-kpi {
+    display: flex;
+    flex-direction: column;
+    align-items: center;
+    justify-content: center;
+    border: 2px solid green;
+    border-radius: 5px;
+    background-color: orange;
+    color: black;
+    font-size: 22px;
+    font-weight: bold;
+    padding: 5px;
+    margin: 3px;
+    text-align: center;
+}
+.tuma-kpi-label {
+    font-size: 12px;
+    font-weight: normal;
+}
+@media (max-width: 640px) {
+    .tuma-kpi-row { grid-template-columns: minmax(0, 1fr); }
+}
+</style>"""
+
+
+def kpi_tile(label, value):
+    """HTML d'une tuile (libellé, valeur déjà formatée)."""
+    return (f'<div class="tuma-kpi"><div class="tuma-kpi-label">{html.escape(str(label))}</div>'
+            f'<div>{html.escape(str(value))}</div></div>')
+
+
+def kpi_grid(section, results):
+    """HTML de toutes les tuiles de la section `section` : une grille par ligne du registre.
+
+    Sans ligne vide ni indentation : le bloc reste un seul bloc HTML pour le rendu Markdown.
+    """
+    parts = ['<div class="tuma-kpi-grid">']
+    for title, indicators in section_rows(section):
+        if title:
+            parts.append(f"<h3>{html.escape(title)}</h3>")
+        parts.append(f'<div class="tuma-kpi-row" style="--tuma-kpi-columns: {len(indicators)}">')
+        parts.extend(kpi_tile(i.label, format_value(i, results[i.key])) for i in indicators)
+        parts.append("</div>")
+    parts.append("</div>")
+    return "".join(parts)
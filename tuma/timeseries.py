@@ -0,0 +1,81 @@
+"""Séries dérivées des indicateurs : cumul, moyenne mobile sur 3 mois et variation mensuelle.
+
+Une `TimeSeries` conserve, pour une sélection, les sommes mensuelles des indicateurs
+avec leurs cumuls et leurs sommes glissantes. Lorsqu'une actualisation apporte de
+nouvelles soumissions, `extend` ajoute leurs sommes mensuelles et ne recalcule les
+séries dérivées qu'à partir du premier mois touché : l'historique n'est pas reparcouru.
+Les taux sont recalculés à partir des sommes (cumulées ou glissantes), jamais moyennés.
+"""
+import numpy as np
+import pandas as pd
+
+WINDOW = 3  # Mois de la moyenne mobile
+KINDS = ("Mensuel", "Cumul", "Moyenne 3 mois", "Variation mensuelle")
+
+
+def _complete(monthly):
+    """Tous les mois du premier au dernier (mois sans soumission : zéro)."""
+    if monthly.empty:
+        return monthly
+    months = pd.period_range(monthly.index.min(), monthly.index.max(), freq="M")
+    return monthly.reindex(months, fill_value=0)
+
+
+class TimeSeries:
+    """Sommes mensuelles, cumuls et sommes glissantes des indicateurs-sommes d'une sélection.
+
+    `monthly` est le résultat de `IndicatorEngine.monthly_sums` ; `cumulative` et
+    `rolling` ne sont fournis que par `extend`, qui les a déjà mis à jour.
+    """
+
+    def __init__(self, indicators, monthly, cumulative=None, rolling=None):
+        self.indicators = indicators
+        self.monthly = _complete(monthly)
+        self.cumulative = self.monthly.cumsum() if cumulative is None else cumulative
+        self.rolling = self.monthly.rolling(WINDOW, min_periods=1).sum() if rolling is None else rolling
+
+    @property
+    def nbytes(self):
+        return int(sum(f.memory_usage(deep=True).sum() for f in (self.monthly, self.cumulative, self.rolling)))
+
+    def extend(self, delta):
+        """Nouvelle série avec les sommes mensuelles `delta` ajoutées (soumissions reçues depuis)."""
+        if delta.empty:
+            return self
+        if self.monthly.empty or delta.index.min() < self.monthly.index.min():
+            # Mois antérieurs à l'historique : tout est à recalculer (cas exceptionnel)
+            return TimeSeries(self.indicators, self.monthly.add(delta, fill_value=0))
+        monthly = _complete(self.monthly.add(delta, fill_value=0))
+        # Les mois antérieurs au premier mois touché ne changent pas
+        start = monthly.index.get_loc(delta.index.min())
+        tail = monthly.iloc[start:].cumsum()
+        if start:
+            tail += self.cumulative.iloc[start - 1]
+        cumulative = pd.concat([self.cumulative.iloc[:start], tail])
+        first = max(start - WINDOW + 1, 0)
+        window = monthly.iloc[first:].rolling(WINDOW, min_periods=1).sum().iloc[start - first:]
+        rolling = pd.concat([self.rolling.iloc[:start], window])
+        return TimeSeries(self.indicators, monthly, cumulative, rolling)
+
+    def frame(self, kind, keys, periods=None):
+        """Série `kind` (voir `KINDS`) des indicateurs `keys`, restreinte aux mois `periods`.
+
+        Même forme que `IndicatorResult.timeline` : colonne "time" (mois en texte)
+        puis une colonne par indicateur. Le cumul porte sur tout l'historique.
+        """
+        if kind == "Cumul":
+            values = self.indicators.add_ratios(self.cumulative)
+        elif kind == "Moyenne 3 mois":
+            values = self.indicators.add_ratios(self.rolling)
+            months = np.minimum(np.arange(1, len(values) + 1), WINDOW)
+            sums = self.indicators.sum_keys
+            values[sums] = values[sums].div(months, axis=0)
+        elif kind == "Variation mensuelle":
+            values = self.indicators.add_ratios(self.monthly).diff()
+        else:
+            values = self.indicators.add_ratios(self.monthly)
+        if periods:
+            values = values[values.index.isin(periods)]
+        timeline = values[list(keys)].reset_index(names="time")
+        timeline["time"] = timeline["time"].astype(str)
+        return timeline